@@ -5,9 +5,15 @@ from src.views.students_view import show_students
 from src.views.rooms_view import show_rooms
 from src.views.bookings_view import show_bookings
 from src.views.fees_view import show_fees
+from src.views.perf_view import show_performance
+from src.services.lifecycle_service import start_background
+from src.services.auth_service import is_admin
 
 st.set_page_config(page_title="Hostel Management System", page_icon="🏨", layout="wide")
 
+# ⏰ completes bookings past their end date (one thread per server process)
+start_background()
+
 # Login gate
 if "user" not in st.session_state:
     tab1, tab2 = st.tabs(["🔐 Login", "🆕 Sign Up"])
@@ -23,13 +29,20 @@ def go(page: str):
     st.session_state["nav_choice"] = page
     st.rerun()
 
+pages = ["Dashboard", "Students", "Rooms", "Bookings", "Fees"]
+# ⏱️ server-wide timings are for admins only
+if is_admin(st.session_state["user"]):
+    pages.append("Performance")
+if st.session_state["nav_choice"] not in pages:
+    st.session_state["nav_choice"] = "Dashboard"
+
 with st.sidebar:
     st.title("🏨 Hostel MS")
     st.write(f"👤 {st.session_state['user']['name']}")
     choice = st.selectbox(
         "Navigate",
-        ["Dashboard", "Students", "Rooms", "Bookings", "Fees"],
-        index=["Dashboard", "Students", "Rooms", "Bookings", "Fees"].index(st.session_state["nav_choice"])
+        pages,
+        index=pages.index(st.session_state["nav_choice"])
     )
     if st.button("Logout"):
         st.session_state.clear()
@@ -44,3 +57,4 @@ elif page == "Students": show_students()
 elif page == "Rooms": show_rooms()
 elif page == "Bookings": show_bookings()
 elif page == "Fees": show_fees()
+elif page == "Performance" and is_admin(st.session_state["user"]): show_performance()
@@ -0,0 +1,5 @@
+"""
+Headless performance benchmarks: synthetic owners, rooms, students,
+bookings and fees at several scales, timed hot paths, and a regression
+check against a stored baseline. Run with `python -m benchmarks --help`.
+"""
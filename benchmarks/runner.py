@@ -0,0 +1,135 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+from .synthetic import SCALES
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# a scenario regresses when its median is this much slower than the baseline's...
+THRESHOLD = 0.5
+# ...and slower by at least this many milliseconds (sub-ms timings are noise)
+MIN_DELTA_MS = 1.0
+
+
+def run_scale(name: str, repeat: int, seed: int = 0, only: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Generate one scale into a throwaway data dir and time every scenario
+    (or those whose name starts with one of `only`). Meant to run in a fresh
+    process: the services keep process-wide caches and singletons.
+    """
+    from src.utils import io
+    tmp = tempfile.mkdtemp(prefix=f"hostel-bench-{name}-")
+    io.DATA_DIR = tmp
+    try:
+        from .synthetic import generate
+        from .scenarios import SCENARIOS, time_scenario, _flush_snapshots
+        t0 = time.perf_counter()
+        data = generate(SCALES[name], seed)
+        generated = time.perf_counter() - t0
+        timings = {s.name: time_scenario(s, data, repeat)
+                   for s in SCENARIOS if not only or s.name.startswith(tuple(only))}
+        _flush_snapshots()
+        return {"rows": data.rows, "generate_s": round(generated, 3), "scenarios": timings}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run(scales: Sequence[str], repeat: int, seed: int = 0, only: Sequence[str] = ()) -> Dict[str, Any]:
+    """Every scale in its own spawned process, one after another."""
+    import numpy, pandas
+    report: Dict[str, Any] = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pandas.__version__,
+            "numpy": numpy.__version__,
+            "platform": platform.platform(),
+            "backend": os.environ.get("HOSTEL_STORAGE_BACKEND", "csv"),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "scales": {},
+    }
+    ctx = multiprocessing.get_context("spawn")
+    for name in scales:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            report["scales"][name] = pool.submit(run_scale, name, repeat, seed, tuple(only)).result()
+    return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float = THRESHOLD,
+            min_delta_ms: float = MIN_DELTA_MS) -> List[str]:
+    """Scenarios whose median got slower than the baseline's by more than
+    `threshold` (a fraction) and `min_delta_ms`; unknown ones are skipped."""
+    regressions = []
+    for scale, result in report.get("scales", {}).items():
+        known = baseline.get("scales", {}).get(scale, {}).get("scenarios", {})
+        for name, timing in result.get("scenarios", {}).items():
+            base = known.get(name)
+            if base is None:
+                continue
+            now, before = timing["median_ms"], base["median_ms"]
+            if now > before * (1 + threshold) and now - before > min_delta_ms:
+                regressions.append(f"{scale}/{name}: {now:.2f} ms vs baseline {before:.2f} ms "
+                                   f"(+{(now / before - 1) * 100 if before else float('inf'):.0f}%)")
+    return regressions
+
+
+def _table(report: Dict[str, Any]) -> str:
+    lines = []
+    for scale, result in report["scales"].items():
+        rows = ", ".join(f"{t}={n}" for t, n in result["rows"].items())
+        lines.append(f"[{scale}] {rows} (generated in {result['generate_s']:.1f}s)")
+        for name, t in result["scenarios"].items():
+            lines.append(f"  {name:<32} median {t['median_ms']:>10.2f} ms   min {t['min_ms']:>10.2f} ms")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Time the app's hot paths "
+                                     "on synthetic data and check them against a stored baseline.")
+    parser.add_argument("--scale", action="append", choices=sorted(SCALES),
+                        help="data size to run (repeatable; default: small)")
+    parser.add_argument("--scenario", action="append", default=[],
+                        help="only scenarios whose name starts with this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per scenario (default: 5)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"allowed slowdown as a fraction of the baseline (default: {THRESHOLD})")
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS,
+                        help=f"ignore slowdowns smaller than this (default: {MIN_DELTA_MS})")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store this run as the baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    report = run(args.scale or ["small"], args.repeat, args.seed, args.scenario)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+        print(_table(report), file=sys.stderr)
+    else:
+        print(text)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as fh:
+            fh.write(text + "\n")
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; nothing to compare", file=sys.stderr)
+        return 0
+    with open(args.baseline) as fh:
+        regressions = compare(report, json.load(fh), args.threshold, args.min_delta_ms)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
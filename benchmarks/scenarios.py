@@ -0,0 +1,214 @@
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+from src.services import data_store
+from src.services import availability_service
+from src.services.auth_service import users_store
+from src.services.student_service import students_store
+from src.services.booking_service import bookings_store
+from src.services.fee_service import fees_store
+from src.services.room_service import rooms_store
+from src.services.occupancy_service import occupancy
+from src.services.lookup_service import student_labels
+from src.services.metrics_service import metrics
+from src.services.ledger_service import ledger
+from src.services.booking_batch_service import booking_ops
+from src.services.lifecycle_service import lifecycle
+from src.services.snapshot_service import load_snapshot
+from src.services.search_service import student_search
+from src.utils.lookup import id_to_label
+from src.utils.seed_rooms import provision_rooms
+from .synthetic import Dataset
+
+STORES = (users_store, students_store, rooms_store, bookings_store, fees_store)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One timed hot path. `setup` runs (untimed) before every timed call."""
+    name: str
+    run: Callable[[Dataset], Any]
+    setup: Optional[Callable[[Dataset], None]] = None
+
+
+SCENARIOS: List[Scenario] = []
+
+
+def scenario(name: str, setup: Optional[Callable[[Dataset], None]] = None):
+    def register(fn: Callable[[Dataset], Any]) -> Callable[[Dataset], Any]:
+        SCENARIOS.append(Scenario(name, fn, setup))
+        return fn
+    return register
+
+
+def _owner(data: Dataset) -> int:
+    return data.owner_ids[0]
+
+
+def _flush_snapshots() -> None:
+    # settle pending background snapshot writes so they don't land inside a timing
+    for store in STORES:
+        if hasattr(store, "write_snapshots"):
+            store.write_snapshots()
+
+
+def _drop_memory_snapshots(data: Dataset) -> None:
+    _flush_snapshots()
+    data_store._SNAPSHOTS.clear()
+
+
+# ---------- stores ----------
+
+@scenario("store.create")
+def _create(data: Dataset) -> Any:
+    return students_store.create({"owner_id": _owner(data), "name": "Bench Student", "email": "bench@bench.test",
+                                  "phone": "+910000000000", "gender": "Female", "course": "CS"})
+
+
+@scenario("store.create_many")
+def _create_many(data: Dataset) -> Any:
+    today = pd.Timestamp.today().strftime("%Y-%m-%d")
+    return fees_store.create_many(pd.DataFrame({
+        "owner_id": _owner(data), "student_id": range(1, 101), "month": today[:7],
+        "amount": 40000.0, "paid_on": today, "status": "paid",
+    }))
+
+
+@scenario("store.list_all")
+def _list_all(data: Dataset) -> Any:
+    return bookings_store.list_all()
+
+
+@scenario("store.list_all.cold_csv", setup=_drop_memory_snapshots)
+def _list_all_cold_csv(data: Dataset) -> Any:
+    # what a cold start costs without the binary snapshots
+    binary = getattr(bookings_store, "binary_snapshot", False)
+    bookings_store.binary_snapshot = False
+    try:
+        return bookings_store.list_all()
+    finally:
+        bookings_store.binary_snapshot = binary
+
+
+@scenario("store.list_all.cold_snapshot", setup=_drop_memory_snapshots)
+def _list_all_cold_snapshot(data: Dataset) -> Any:
+    return bookings_store.list_all()
+
+
+@scenario("store.save_all")
+def _save_all(data: Dataset) -> Any:
+    return fees_store.save_all(fees_store.list_all())
+
+
+@scenario("batch.create_bookings")
+def _batch_bookings(data: Dataset) -> Any:
+    # 50 past stays: validated against students, rooms and beds, then one write
+    owner = _owner(data)
+    students = students_store.list_for_owner(owner)["id"].head(50).tolist()
+    rooms = rooms_store.list_for_owner(owner)["id"].head(50).tolist()
+    return booking_ops.create_bookings(owner, pd.DataFrame({
+        "student_id": students, "room_id": rooms[:len(students)],
+        "start_date": "2020-01-01", "end_date": "2020-07-01", "status": "completed",
+    }))
+
+
+_NEW_OWNERS = iter(range(1_000_000, 10_000_000, 100))
+
+
+@scenario("rooms.provision_100_owners")
+def _provision(data: Dataset) -> Any:
+    # onboarding: the default template for 100 owners without rooms, one batch
+    first = next(_NEW_OWNERS)
+    return provision_rooms(range(first, first + 100))
+
+
+@scenario("snapshot.load.cold", setup=_drop_memory_snapshots)
+def _snapshot_cold(data: Dataset) -> Any:
+    # everything the Bookings page reads, as one consistent bundle
+    return load_snapshot(_owner(data), ("students", "rooms", "bookings"))
+
+
+# ---------- derived state ----------
+
+@scenario("occupancy.recompute")
+def _recompute(data: Dataset) -> Any:
+    return occupancy.recompute(_owner(data))
+
+
+@scenario("availability.cold", setup=lambda data: availability_service._CACHE.clear())
+def _availability(data: Dataset) -> Any:
+    return availability_service.availability(_owner(data)).total_vacant
+
+
+@scenario("availability.free_beds")
+def _free_beds(data: Dataset) -> Any:
+    today = pd.Timestamp.today().normalize()
+    return availability_service.rooms_with_free_beds(_owner(data), today, today + pd.Timedelta(days=180))
+
+
+@scenario("lifecycle.tick.idle")
+def _lifecycle_tick(data: Dataset) -> Any:
+    # the every-minute check when nothing has expired since the last one
+    return lifecycle.tick("2000-01-01")
+
+
+@scenario("lookup.id_to_label")
+def _id_to_label(data: Dataset) -> Any:
+    return id_to_label(students_store.list_for_owner(_owner(data)), "id", "name")
+
+
+@scenario("lookup.student_labels")
+def _student_labels(data: Dataset) -> Any:
+    return student_labels.labels(_owner(data))
+
+
+@scenario("search.typeahead")
+def _typeahead(data: Dataset) -> Any:
+    # keystrokes in a student picker: a letter, a prefix, two words, a typo, a phone
+    owner = _owner(data)
+    return [student_search.search(owner, q) for q in ("a", "pri", "amit b", "priay", "98")]
+
+
+@scenario("auth.login_lookup")
+def _login(data: Dataset) -> Any:
+    return [users_store.find_by("email", email) for email in data.emails]
+
+
+@scenario("dashboard.summary")
+def _summary(data: Dataset) -> Any:
+    return metrics.summary(_owner(data))
+
+
+@scenario("dashboard.rebuild")
+def _rebuild(data: Dataset) -> Any:
+    return metrics.rebuild(_owner(data))
+
+
+@scenario("ledger.balances.cold", setup=lambda data: ledger.invalidate(_owner(data)))
+def _balances(data: Dataset) -> Any:
+    return ledger.balances(_owner(data))
+
+
+# ---------- timing ----------
+
+def time_scenario(s: Scenario, data: Dataset, repeat: int) -> Dict[str, float]:
+    """Milliseconds over `repeat` timed calls, after one untimed warm-up call."""
+    _flush_snapshots()
+    if s.setup:
+        s.setup(data)
+    s.run(data)
+    times = []
+    for _ in range(repeat):
+        if s.setup:
+            s.setup(data)
+        t0 = time.perf_counter()
+        s.run(data)
+        times.append((time.perf_counter() - t0) * 1000)
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "max_ms": round(max(times), 3),
+        "runs": repeat,
+    }
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from src.services.auth_service import users_store
+from src.services.student_service import students_store
+from src.services.booking_service import bookings_store
+from src.services.fee_service import fees_store
+from src.services.room_service import rooms_store
+from src.utils.seed_rooms import provision_rooms
+
+COURSES = ["CS", "EE", "ME", "CE", "BBA", "MBA", "BSc", "MSc"]
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Synthetic data size: every owner gets the default 100 rooms (provision_rooms)
+    plus this many students, bookings and fee rows."""
+    owners: int
+    students: int
+    bookings: int
+    fees: int
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(owners=2, students=300, bookings=600, fees=600),
+    "medium": Scale(owners=5, students=2_000, bookings=5_000, fees=5_000),
+    "large": Scale(owners=10, students=10_000, bookings=50_000, fees=50_000),
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    owner_ids: List[int]
+    emails: List[str]     # one login per owner
+    rows: Dict[str, int]  # rows written per table
+
+
+def generate(scale: Scale, seed: int = 0) -> Dataset:
+    """
+    Fill the stores (wherever io.DATA_DIR points) with reproducible data:
+    one user per owner, their 100 rooms, students, bookings (at most the
+    owner's beds active at once; the rest completed or cancelled history
+    over the past two years) and fee payments. Rooms are one provision_rooms
+    batch; the other tables are written with one create_many per owner.
+    """
+    rng = np.random.default_rng(seed)
+    emails = [f"owner{i}@bench.test" for i in range(1, scale.owners + 1)]
+    owner_ids = users_store.create_many(pd.DataFrame({
+        "name": [f"Owner {i}" for i in range(1, scale.owners + 1)], "email": emails, "password": "x",
+    }))
+    provision_rooms(owner_ids)
+    today = pd.Timestamp.today().normalize()
+    for owner in owner_ids:
+        students = students_store.create_many(pd.DataFrame({
+            "owner_id": owner,
+            "name": [f"Student {owner}-{i}" for i in range(scale.students)],
+            "email": [f"s{owner}-{i}@bench.test" for i in range(scale.students)],
+            "phone": [f"+91{n}" for n in rng.integers(7_000_000_000, 9_999_999_999, scale.students)],
+            "gender": rng.choice(["Male", "Female"], scale.students),
+            "course": rng.choice(COURSES, scale.students),
+        }))
+        rooms = rooms_store.list_for_owner(owner)
+        beds = np.repeat(rooms["id"].to_numpy("int64"), rooms["capacity"].to_numpy("int64"))
+
+        n = scale.bookings
+        active = min(len(beds) * 4 // 5, n)
+        start = today - pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+        status = rng.choice(["completed", "cancelled"], n, p=[0.9, 0.1]).astype(object)
+        status[:active] = "active"
+        room_id = rng.choice(beds, n)
+        room_id[:active] = rng.permutation(beds)[:active]
+        bookings_store.create_many(pd.DataFrame({
+            "owner_id": owner,
+            "student_id": rng.choice(students, n),
+            "room_id": room_id,
+            "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": (start + pd.Timedelta(days=180)).strftime("%Y-%m-%d"),
+            "status": status,
+        }))
+
+        paid_on = today - pd.to_timedelta(rng.integers(0, 730, scale.fees), unit="D")
+        fees_store.create_many(pd.DataFrame({
+            "owner_id": owner,
+            "student_id": rng.choice(students, scale.fees),
+            "month": paid_on.strftime("%Y-%m"),
+            "amount": rng.choice([40000.0, 50000.0, 20000.0, 25000.0], scale.fees),
+            "paid_on": paid_on.strftime("%Y-%m-%d"),
+            "status": rng.choice(["paid", "pending"], scale.fees, p=[0.85, 0.15]),
+        }))
+    rows = {
+        "users": scale.owners, "rooms": 100 * scale.owners, "students": scale.students * scale.owners,
+        "bookings": scale.bookings * scale.owners, "fees": scale.fees * scale.owners,
+    }
+    return Dataset(list(owner_ids), emails, rows)
+
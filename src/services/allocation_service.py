@@ -0,0 +1,175 @@
+import heapq
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set
+import pandas as pd
+from .availability_service import rooms_with_free_beds, _day, _stays
+from .booking_service import bookings_store
+from .room_service import rooms_store, TYPE_PRICE
+from .student_service import students_store
+
+PLAN_COLUMNS = ["student_id", "student_name", "gender", "course", "room_id", "room_no", "type", "price"]
+
+
+@dataclass
+class AllocationPlan:
+    """Who goes where. `unassigned` lists students that could not be placed, with a reason."""
+    assignments: pd.DataFrame
+    unassigned: pd.DataFrame
+    start_date: str
+    end_date: str
+    created_ids: Optional[List[int]] = None
+
+    @property
+    def dry_run(self) -> bool:
+        return self.created_ids is None
+
+
+class _Room:
+    __slots__ = ("id", "room_no", "type", "free", "genders", "courses")
+
+    def __init__(self, rid: int, room_no: str, rtype: str, free: int):
+        self.id, self.room_no, self.type, self.free = rid, room_no, rtype, free
+        self.genders: Set[str] = set()
+        self.courses: Set[str] = set()
+
+
+def unassigned_students(owner_id: Any, start_date: Any, end_date: Any) -> pd.DataFrame:
+    """Students with no active booking overlapping [start_date, end_date)."""
+    students = students_store.list_for_owner(owner_id)
+    stays = _stays(bookings_store.list_for_owner(owner_id))
+    if students.empty or stays.empty:
+        return students
+    d1, d2 = _day(start_date), _day(end_date)
+    overlapping = stays[(stays["start"] < max(d2, d1 + 1)) & (stays["end"] > d1)]
+    booked = bookings_store.list_for_owner(owner_id).set_index("id")["student_id"].reindex(overlapping["id"])
+    return students[~students["id"].isin(booked.dropna())]
+
+
+def _occupants(owner_id: Any, d1: int, d2: int, students: pd.DataFrame) -> pd.DataFrame:
+    """room_id, gender, course of everyone already booked into a room during the range."""
+    bookings = bookings_store.list_for_owner(owner_id)
+    stays = _stays(bookings)
+    stays = stays[(stays["start"] < d2) & (stays["end"] > d1)]
+    if stays.empty or students.empty:
+        return pd.DataFrame(columns=["room_id", "gender", "course"])
+    who = bookings.set_index("id")["student_id"].reindex(stays["id"]).to_numpy()
+    info = students.set_index("id")
+    info = info[~info.index.duplicated()].reindex(who)
+    return pd.DataFrame({
+        "room_id": stays["room_id"].to_numpy(),
+        "gender": info["gender"].astype(str).to_numpy(),
+        "course": info["course"].astype(str).to_numpy(),
+    })
+
+
+def plan_allocation(owner_id: Any, start_date: Any, end_date: Any,
+                    student_ids: Optional[Iterable[int]] = None,
+                    same_gender: bool = True, group_by_course: bool = False,
+                    room_type: Optional[str] = None, budget: Optional[float] = None) -> AllocationPlan:
+    """
+    Pack students into rooms with free beds for [start_date, end_date).
+
+    Students (default: everyone without an overlapping active booking) are
+    grouped by gender when `same_gender` (rooms never mix genders) and by
+    course when `group_by_course` (course-mates share rooms where they can),
+    largest groups first. Each group fills rooms best-fit from a min-heap:
+    preferred `room_type` first, then rooms already holding course-mates,
+    then part-filled rooms, fewest free beds first, so empty rooms are only
+    opened once the gaps are used up. Room types priced above `budget`
+    (TYPE_PRICE) are never used.
+    """
+    d1, d2 = _day(start_date), _day(end_date)
+    d2 = max(d2, d1 + 1)
+    all_students = students_store.list_for_owner(owner_id)
+    if student_ids is None:
+        todo = unassigned_students(owner_id, start_date, end_date)
+    else:
+        todo = all_students[all_students["id"].isin([int(i) for i in student_ids])]
+
+    rooms = rooms_store.list_for_owner(owner_id)
+    free = rooms_with_free_beds(owner_id, start_date, end_date, min_free=1)
+    pool: Dict[int, _Room] = {}
+    if not rooms.empty:
+        for rid, room_no, rtype in zip(rooms["id"].tolist(),
+                                       rooms["room_no"].astype(str).tolist(), rooms["type"].astype(str).tolist()):
+            if pd.isna(rid) or int(rid) not in free:
+                continue
+            if budget is not None and TYPE_PRICE.get(rtype, 0) > budget:
+                continue
+            pool[int(rid)] = _Room(int(rid), room_no, rtype, free[int(rid)])
+    occupants = _occupants(owner_id, d1, d2, all_students)
+    for rid, gender, course in occupants.itertuples(index=False, name=None):
+        room = pool.get(int(rid))
+        if room is not None:
+            room.genders.add(gender)
+            room.courses.add(course)
+
+    todo = todo.assign(
+        _gender=todo["gender"].astype(str) if same_gender else "",
+        _course=todo["course"].astype(str) if group_by_course else "",
+    )
+    groups = sorted(todo.groupby(["_gender", "_course"], sort=False), key=lambda g: -len(g[1]))
+
+    placed: List[Dict[str, Any]] = []
+    left: List[Dict[str, Any]] = []
+    for (gender, course), group in groups:
+        heap = []
+        for room in pool.values():
+            if room.free <= 0:
+                continue
+            if same_gender and room.genders and room.genders != {gender}:
+                continue
+            key = (
+                0 if room_type is None or room.type == room_type else 1,
+                0 if group_by_course and course in room.courses else 1,
+                0 if room.genders else 1,
+                room.free,
+                room.room_no,
+            )
+            heap.append((key, room.id))
+        heapq.heapify(heap)
+        for sid, name, g, c in group[["id", "name", "gender", "course"]].itertuples(index=False, name=None):
+            if not heap:
+                left.append({"student_id": int(sid), "student_name": name,
+                             "reason": "no free bed matching the constraints"})
+                continue
+            key, rid = heap[0]
+            room = pool[rid]
+            room.free -= 1
+            room.genders.add(str(g))
+            room.courses.add(str(c))
+            placed.append({"student_id": int(sid), "student_name": name, "gender": g, "course": c,
+                           "room_id": rid, "room_no": room.room_no, "type": room.type,
+                           "price": TYPE_PRICE.get(room.type, 0)})
+            if room.free:
+                # now part-filled (and holding this course): refresh its place in the heap
+                heapq.heapreplace(heap, ((key[0], 0 if group_by_course else 1, 0, room.free, room.room_no), rid))
+            else:
+                heapq.heappop(heap)
+
+    return AllocationPlan(
+        assignments=pd.DataFrame(placed, columns=PLAN_COLUMNS),
+        unassigned=pd.DataFrame(left, columns=["student_id", "student_name", "reason"]),
+        start_date=str(pd.Timestamp(start_date).date()),
+        end_date=str(pd.Timestamp(end_date).date()),
+    )
+
+
+def allocate_students(owner_id: Any, start_date: Any, end_date: Any, dry_run: bool = False,
+                      **constraints: Any) -> AllocationPlan:
+    """
+    Plan (see plan_allocation) and, unless `dry_run`, book every placed
+    student in one create_many, which is one write and one block of ids.
+    The owner's bookings lock is held from planning to writing, so no
+    other booking can take a planned bed in between. Occupancy follows
+    from that single write.
+    """
+    with bookings_store.lock_for_owner(owner_id):
+        plan = plan_allocation(owner_id, start_date, end_date, **constraints)
+        if dry_run:
+            return plan
+        rows = plan.assignments[["student_id", "room_id"]].assign(
+            owner_id=owner_id, start_date=plan.start_date, end_date=plan.end_date, status="active",
+        )
+        plan.created_ids = bookings_store.create_many(rows) if not rows.empty else []
+    return plan
@@ -1,5 +1,39 @@
-from .data_store import CSVStore
+from typing import Any, Mapping
+from .storage import open_store
+from ..utils.schema import Schema, ID, TEXT
 
-USER_COLUMNS = ["id", "owner_id","name", "email", "password"]
+ADMIN = "admin"
+OWNER = "owner"
 
-users_store = CSVStore("users.csv", USER_COLUMNS, id_col="id")
+USER_SCHEMA = Schema({"id": ID, "owner_id": ID, "name": TEXT, "email": TEXT, "password": TEXT, "role": TEXT})
+USER_COLUMNS = USER_SCHEMA.columns
+
+users_store = open_store("users.csv", USER_SCHEMA, id_col="id", unique=[("email",)], append_only=True,
+                     binary_snapshot=True)
+
+
+def is_admin(user: Mapping[str, Any]) -> bool:
+    """True only for an account whose stored role is admin; a missing role is not."""
+    role = user.get("role")
+    return isinstance(role, str) and role == ADMIN
+
+
+def set_role(email: str, role: str) -> bool:
+    """Give the account with `email` the role `role`; False if there is no such account."""
+    user = users_store.find_by("email", (email or "").strip().lower())
+    if user.empty:
+        return False
+    users_store.upsert_many(user[["id"]].assign(role=role))
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Grant or revoke the admin role.")
+    parser.add_argument("emails", nargs="+")
+    parser.add_argument("--revoke", action="store_true", help="make the accounts plain owners again")
+    args = parser.parse_args()
+    role = OWNER if args.revoke else ADMIN
+    missing = [e for e in args.emails if not set_role(e, role)]
+    print(f"{role}: {len(args.emails) - len(missing)} account(s) updated"
+          + (f", not found: {', '.join(missing)}" if missing else ""))
@@ -0,0 +1,333 @@
+import bisect
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .data_store import Change, _owner_key
+from .room_service import rooms_store
+from .booking_service import bookings_store
+from . import occupancy_service
+from .occupancy_service import occupancy, _active_per_room
+from ..utils import perf
+
+
+@dataclass(frozen=True)
+class Availability:
+    """Per-room and per-type bed availability for one owner (arrays aligned by room)."""
+    room_ids: np.ndarray
+    room_nos: np.ndarray
+    room_types: np.ndarray
+    capacity: np.ndarray
+    occupied: np.ndarray
+    available: np.ndarray
+    by_type: pd.DataFrame   # index: type; columns: rooms, capacity, occupied, vacant
+
+    @property
+    def by_room(self) -> Dict[int, int]:
+        return dict(zip(self.room_ids.tolist(), self.available.tolist()))
+
+    @property
+    def total_capacity(self) -> int:
+        return int(self.capacity.sum())
+
+    @property
+    def total_occupied(self) -> int:
+        return int(self.occupied.sum())
+
+    @property
+    def total_vacant(self) -> int:
+        return int(self.available.sum())
+
+    def vacant_for_type(self, room_type: str) -> int:
+        return int(self.by_type["vacant"].get(room_type, 0))
+
+    def frame(self) -> pd.DataFrame:
+        """One row per room: id, room_no, type, capacity, occupied, available."""
+        return pd.DataFrame({
+            "id": self.room_ids, "room_no": self.room_nos, "type": self.room_types,
+            "capacity": self.capacity, "occupied": self.occupied, "available": self.available,
+        })
+
+
+def compute_availability(rooms: pd.DataFrame, active_per_room: Dict[int, int]) -> Availability:
+    """Available beds = capacity - active bookings, for every room in one vectorized pass."""
+    if rooms is None or rooms.empty or "id" not in rooms.columns:
+        empty = np.zeros(0, dtype="int64")
+        by_type = pd.DataFrame(columns=["rooms", "capacity", "occupied", "vacant"], dtype="int64")
+        labels = np.zeros(0, dtype=object)
+        return Availability(empty, labels, labels, empty, empty, empty, by_type)
+
+    ids = rooms["id"]
+    keep = ids.notna().to_numpy()
+    room_ids = ids[keep].to_numpy("int64")
+    types = (rooms["type"].astype(str) if "type" in rooms.columns
+             else pd.Series("", index=rooms.index)).to_numpy()[keep]
+    room_nos = (rooms["room_no"].astype(str) if "room_no" in rooms.columns
+                else ids.astype(str)).to_numpy()[keep]
+    capacity = (rooms["capacity"] if "capacity" in rooms.columns
+                else pd.Series(0, index=rooms.index)).fillna(0).to_numpy("int64")[keep]
+
+    if active_per_room:
+        known = np.fromiter(active_per_room.keys(), dtype="int64", count=len(active_per_room))
+        counts = np.fromiter(active_per_room.values(), dtype="int64", count=len(active_per_room))
+        order = np.argsort(known)
+        known, counts = known[order], counts[order]
+        pos = np.clip(np.searchsorted(known, room_ids), 0, len(known) - 1)
+        active = np.where(known[pos] == room_ids, counts[pos], 0)
+    else:
+        active = np.zeros(len(room_ids), dtype="int64")
+
+    occupied = np.minimum(np.maximum(active, 0), np.maximum(capacity, 0))
+    available = np.maximum(capacity - active, 0)
+
+    by_type = (
+        pd.DataFrame({"type": types, "capacity": capacity, "occupied": occupied, "vacant": available})
+        .groupby("type", sort=True)
+        .agg(rooms=("capacity", "size"), capacity=("capacity", "sum"),
+             occupied=("occupied", "sum"), vacant=("vacant", "sum"))
+    )
+    return Availability(room_ids, room_nos, types, capacity, occupied, available, by_type)
+
+
+_CACHE: Dict[str, Tuple[Tuple[int, int, int], Availability]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def availability(owner_id: Any, at=None) -> Availability:
+    """One owner's availability today, recomputed only when their rooms or
+    bookings changed or the day rolled over (a reservation starting later
+    doesn't take a bed yet).
+
+    With `at` (an OwnerSnapshot holding rooms and bookings) it is computed
+    for that snapshot's versions instead of the latest ones.
+    """
+    key = _owner_key(owner_id)
+    rooms_at = at.of(rooms_store) if at is not None else None
+    bookings_at = at.of(bookings_store) if at is not None else None
+    pinned = rooms_at is not None and bookings_at is not None
+    day = occupancy_service._today()
+    if pinned:
+        stamp = (rooms_at[1], bookings_at[1], day)
+    else:
+        stamp = (rooms_store.version_for_owner(owner_id), bookings_store.version_for_owner(owner_id), day)
+    with _CACHE_LOCK:
+        hit = _CACHE.get(key)
+    perf.cache("availability", hit is not None and hit[0] == stamp)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    if pinned:
+        counts = {int(rid): int(n) for rid, n in _active_per_room(bookings_at[0], day).items()}
+        result = compute_availability(rooms_at[0], counts)
+    else:
+        result = compute_availability(rooms_store.list_for_owner(owner_id), occupancy.counts(owner_id))
+    with _CACHE_LOCK:
+        _CACHE[key] = (stamp, result)
+    return result
+
+
+def filter_rooms(grid: pd.DataFrame, room_type: Optional[str] = None, min_free: int = 0,
+                 room_from: Optional[float] = None, room_to: Optional[float] = None) -> pd.DataFrame:
+    """Narrow an Availability.frame() by type, free beds and room-number range (vectorized).
+
+    Room numbers compare numerically ("07" is between 5 and 10); rooms whose
+    number isn't numeric only match when no range is given.
+    """
+    keep = np.ones(len(grid), dtype=bool)
+    if room_type:
+        keep &= (grid["type"] == room_type).to_numpy()
+    if min_free:
+        keep &= (grid["available"] >= min_free).to_numpy()
+    if room_from is not None or room_to is not None:
+        num = pd.to_numeric(grid["room_no"], errors="coerce")
+        if room_from is not None:
+            keep &= (num >= room_from).to_numpy()
+        if room_to is not None:
+            keep &= (num <= room_to).to_numpy()
+    return grid[keep]
+
+
+def page_of(df: pd.DataFrame, page: int, page_size: int) -> Tuple[pd.DataFrame, int]:
+    """Rows of 1-based `page` and the number of pages (at least 1)."""
+    pages = max((len(df) + page_size - 1) // page_size, 1)
+    page = min(max(int(page), 1), pages)
+    return df.iloc[(page - 1) * page_size: page * page_size], pages
+
+
+# ---------- date ranges ----------
+
+def _day(value: Any) -> int:
+    """Days since the epoch for a date, datetime or ISO string."""
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype("int64"))
+
+
+# day numbers standing in for a missing start / end date: the stay is open on that side
+_OPEN_START, _OPEN_END = -(1 << 40), 1 << 40
+
+
+def _stays(bookings: pd.DataFrame) -> pd.DataFrame:
+    """Active bookings as half-open day ranges [start, end): checkout day is free for the next guest.
+    A missing date leaves that side open, as occupancy counts it (`_in_house`)."""
+    cols = ["id", "room_id", "start", "end"]
+    need = {"id", "room_id", "status", "start_date", "end_date"}
+    if bookings is None or bookings.empty or not need <= set(bookings.columns):
+        return pd.DataFrame(columns=cols)
+    active = bookings[bookings["status"] == "active"]
+    out = active[active["id"].notna() & active["room_id"].notna()]
+    if out.empty:
+        return pd.DataFrame(columns=cols)
+    start, end = occupancy_service._days(out["start_date"]), occupancy_service._days(out["end_date"])
+    no_start, no_end = np.isnat(start), np.isnat(end)
+    start = np.where(no_start, _OPEN_START, start.astype("int64"))
+    end = np.where(no_end, _OPEN_END, end.astype("int64"))
+    return pd.DataFrame({
+        "id": out["id"].to_numpy("int64"),
+        "room_id": out["room_id"].to_numpy("int64"),
+        "start": start,
+        # a same-day (or inverted) stay still holds the bed for that day
+        "end": np.maximum(end, start + 1),
+    })
+
+
+class _RoomStays:
+    """One room's active stays, sorted by start day."""
+
+    __slots__ = ("starts", "ends", "ids")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.ids: List[int] = []
+
+    def add(self, booking_id: int, start: int, end: int) -> None:
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, booking_id)
+
+    def remove(self, booking_id: int) -> None:
+        i = self.ids.index(booking_id)
+        del self.starts[i], self.ends[i], self.ids[i]
+
+    def copy(self) -> "_RoomStays":
+        other = _RoomStays()
+        other.starts, other.ends, other.ids = list(self.starts), list(self.ends), list(self.ids)
+        return other
+
+    def peak(self, d1: int, d2: int) -> int:
+        """Most stays that overlap at any one day of [d1, d2)."""
+        hi = bisect.bisect_left(self.starts, d2)
+        events = []
+        for s, e in zip(self.starts[:hi], self.ends[:hi]):
+            if e > d1:
+                events.append((max(s, d1), 1))
+                events.append((e, -1))
+        # at equal days checkouts (-1) sort before check-ins, so back-to-back stays share a bed
+        events.sort()
+        best = cur = 0
+        for _, step in events:
+            cur += step
+            best = max(best, cur)
+        return best
+
+
+class BookingCalendar:
+    """
+    Per-owner interval index over active bookings: {room_id: stays sorted by
+    start}. Built once per owner, then kept current by applying each booking
+    write's changed rows; an owner whose writes were missed is rebuilt on
+    next use.
+    """
+
+    def __init__(self, bookings):
+        self.bookings = bookings
+        self._rooms: Dict[str, Dict[int, _RoomStays]] = {}
+        self._where: Dict[str, Dict[int, int]] = {}  # booking id -> room id
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        bookings.subscribe(self.on_change)
+
+    def _add(self, key: str, stays: pd.DataFrame) -> None:
+        rooms, where = self._rooms[key], self._where[key]
+        for bid, rid, start, end in zip(*(stays[c].tolist() for c in ("id", "room_id", "start", "end"))):
+            rooms.setdefault(rid, _RoomStays()).add(bid, start, end)
+            where[bid] = rid
+
+    def _remove(self, key: str, booking_ids: Iterable[int]) -> None:
+        rooms, where = self._rooms[key], self._where[key]
+        for bid in booking_ids:
+            rid = where.pop(bid, None)
+            if rid is not None:
+                rooms[rid].remove(bid)
+
+    def _current(self, owner_id: Any) -> Dict[int, _RoomStays]:
+        # call with self._lock held
+        key = _owner_key(owner_id)
+        if key in self._rooms and self._versions.get(key) == self.bookings.version_for_owner(owner_id):
+            return self._rooms[key]
+        while True:
+            version = self.bookings.version_for_owner(owner_id)
+            stays = _stays(self.bookings.list_for_owner(owner_id))
+            if self.bookings.version_for_owner(owner_id) == version:
+                break
+        self._rooms[key], self._where[key] = {}, {}
+        self._add(key, stays)
+        self._versions[key] = version
+        return self._rooms[key]
+
+    def on_change(self, change: Change) -> None:
+        key = _owner_key(change.owner_id)
+        with self._lock:
+            if key not in self._rooms or self._versions.get(key) != change.version_before:
+                # not built or out of step: drop it, the next query rebuilds
+                self._rooms.pop(key, None)
+                self._where.pop(key, None)
+                self._versions.pop(key, None)
+                return
+            if change.before is not None and "id" in change.before.columns:
+                self._remove(key, change.before["id"].dropna().astype("int64").tolist())
+            self._add(key, _stays(change.after))
+            self._versions[key] = change.version_after
+
+    def booked(self, owner_id: Any, room_id: int, start: Any, end: Any) -> int:
+        """Most beds of `room_id` taken by active bookings on any day in [start, end)."""
+        d1, d2 = _day(start), _day(end)
+        d2 = max(d2, d1 + 1)
+        with self._lock:
+            stays = self._current(owner_id).get(int(room_id))
+            return stays.peak(d1, d2) if stays is not None else 0
+
+    def room_stays(self, owner_id: Any, room_id: int) -> _RoomStays:
+        """A private copy of one room's active stays, to try out changes on."""
+        with self._lock:
+            stays = self._current(owner_id).get(int(room_id))
+            return stays.copy() if stays is not None else _RoomStays()
+
+    def booked_per_room(self, owner_id: Any, start: Any, end: Any) -> Dict[int, int]:
+        d1, d2 = _day(start), _day(end)
+        d2 = max(d2, d1 + 1)
+        with self._lock:
+            return {rid: stays.peak(d1, d2) for rid, stays in self._current(owner_id).items() if stays.ids}
+
+
+calendar = BookingCalendar(bookings_store)
+
+
+def free_beds(owner_id: Any, room_id: int, start: Any, end: Any) -> int:
+    """Beds of one room free on every day from `start` up to (not including) `end`."""
+    avail = availability(owner_id)
+    hit = np.flatnonzero(avail.room_ids == int(room_id))
+    if not len(hit):
+        return 0
+    return max(int(avail.capacity[hit[0]]) - calendar.booked(owner_id, room_id, start, end), 0)
+
+
+def rooms_with_free_beds(owner_id: Any, start: Any, end: Any, min_free: int = 1) -> Dict[int, int]:
+    """{room_id: free beds} for every room with at least `min_free` beds free throughout [start, end)."""
+    avail = availability(owner_id)
+    booked = calendar.booked_per_room(owner_id, start, end)
+    taken = np.fromiter((booked.get(rid, 0) for rid in avail.room_ids.tolist()),
+                        dtype="int64", count=len(avail.room_ids))
+    free = np.maximum(avail.capacity - taken, 0)
+    keep = free >= min_free
+    return dict(zip(avail.room_ids[keep].tolist(), free[keep].tolist()))
@@ -0,0 +1,76 @@
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Union
+import pandas as pd
+from .booking_service import bookings_store
+from .fee_service import fees_store
+from .student_service import students_store
+
+# A batch: a DataFrame or a list of dicts, one row per item.
+Rows = Union[pd.DataFrame, Sequence[Dict[str, Any]]]
+
+
+class BatchError(ValueError):
+    """A batch failed validation and nothing was written. `problems` holds
+    (position in the batch, message) for every rejected row."""
+
+    def __init__(self, problems: List[Tuple[int, str]]):
+        self.problems = sorted(problems)
+        shown = "; ".join(f"row {pos}: {msg}" for pos, msg in self.problems[:5])
+        more = len(self.problems) - 5
+        super().__init__(shown + (f" (and {more} more)" if more > 0 else ""))
+
+
+def as_frame(rows: Rows, columns: Sequence[str]) -> pd.DataFrame:
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    return df.reset_index(drop=True).reindex(columns=list(columns))
+
+
+def as_ids(values: pd.Series) -> pd.Series:
+    """Integer ids as nullable Int64 (anything else becomes <NA>)."""
+    num = pd.to_numeric(values, errors="coerce")
+    return num.where(num == num.round()).astype("Int64")
+
+
+def as_dates(values: pd.Series) -> pd.Series:
+    """Dates normalized to midnight (unparseable ones become NaT)."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors="coerce", format="mixed")
+    return values.dt.normalize()
+
+
+def as_days(values: pd.Series) -> pd.Series:
+    return (values - pd.Timestamp(0)).dt.days
+
+
+# Owner locks are always taken in this order, so two batches touching the
+# same stores can't deadlock (bookings writes then take the occupancy
+# tracker and rooms locks, as everywhere else).
+LOCK_ORDER = (students_store, bookings_store, fees_store)
+
+
+@contextmanager
+def locked(owner_id: Any, *stores) -> Iterator[None]:
+    with ExitStack() as stack:
+        for store in [s for s in LOCK_ORDER if any(s is t for t in stores)]:
+            stack.enter_context(store.lock_for_owner(owner_id))
+        yield
+
+
+class Batch:
+    """Problems found while validating one batch, by row position."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.problems: List[Tuple[int, str]] = []
+
+    def reject(self, mask: pd.Series, message: Union[str, pd.Series]) -> None:
+        for pos in mask[mask].index:
+            self.problems.append((int(pos), message if isinstance(message, str) else str(message[pos])))
+
+    def ok(self) -> pd.Series:
+        bad = {pos for pos, _ in self.problems}
+        return pd.Series([i not in bad for i in range(self.size)], dtype=bool)
+
+    def raise_if_any(self) -> None:
+        if self.problems:
+            raise BatchError(self.problems)
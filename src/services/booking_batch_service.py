@@ -0,0 +1,199 @@
+from datetime import date
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import pandas as pd
+from .availability_service import calendar, _day
+from .batch_service import Batch, Rows, as_dates, as_days, as_frame, as_ids, locked
+from .booking_service import bookings_store
+from .fee_service import fees_store
+from .fee_batch_service import fee_rows
+from .room_service import rooms_store
+from .student_service import students_store
+from ..utils import perf
+from ..utils.undo import all_or_nothing
+
+BOOKING_STATUSES = ("active", "completed", "cancelled")
+
+
+@dataclass(frozen=True)
+class PaidBookings:
+    booking_ids: List[int]
+    fee_ids: List[int]
+
+
+def _bed_problems(owner_id: Any, capacity: Dict[int, int], stays: pd.DataFrame,
+                  ending: Optional[Dict[int, Tuple[int, int, int]]] = None) -> List[Tuple[int, str]]:
+    """
+    Try a batch's new active stays (columns pos, room_id, start, end as day
+    numbers) on copies of their rooms' calendars, in batch order, so rows
+    competing for the same bed are caught as well as clashes with existing
+    bookings. `ending` ({booking id: (room_id, start, new end)}) shortens
+    existing stays first, e.g. the bookings a transfer closes.
+    """
+    rooms: Dict[int, Any] = {}
+
+    def room(rid: int):
+        if rid not in rooms:
+            rooms[rid] = calendar.room_stays(owner_id, rid)
+        return rooms[rid]
+
+    for bid, (rid, start, end) in (ending or {}).items():
+        held = room(rid)
+        if bid in held.ids:
+            held.remove(bid)
+        if end > start:
+            held.add(bid, start, end)
+
+    problems = []
+    for pos, rid, d1, d2 in stays[["pos", "room_id", "start", "end"]].itertuples(index=False, name=None):
+        d2 = max(d2, d1 + 1)
+        if room(rid).peak(d1, d2) >= capacity.get(rid, 0):
+            problems.append((pos, f"room {rid} has no free bed for the whole of those dates"))
+            continue
+        room(rid).add(-1 - pos, d1, d2)
+    return problems
+
+
+class BookingService:
+    """
+    Batch booking operations, usable from views, scripts and benchmarks
+    alike (no Streamlit). Every call takes the owner's locks, reads each
+    store it needs once, validates the whole batch (BatchError, nothing
+    written), then writes each affected store once. If a later write
+    fails, the earlier ones are undone before the error propagates.
+    """
+
+    def __init__(self, bookings, fees, students, rooms):
+        self.bookings = bookings
+        self.fees = fees
+        self.students = students
+        self.rooms = rooms
+
+    def _capacity(self, owner_id: Any) -> Dict[int, int]:
+        rooms = self.rooms.list_for_owner(owner_id)
+        rooms = rooms[rooms["id"].notna()]
+        return dict(zip(rooms["id"].astype("int64").tolist(), rooms["capacity"].fillna(0).astype("int64").tolist()))
+
+    def _checked(self, owner_id: Any, rows: Rows, extra: Sequence[str] = ()) -> Tuple[pd.DataFrame, Batch]:
+        """Validate booking rows (student_id, room_id, start_date, end_date, status)
+        against the owner's students, rooms and free beds."""
+        df = as_frame(rows, ["student_id", "room_id", "start_date", "end_date", "status", *extra])
+        batch = Batch(len(df))
+        df["student_id"], df["room_id"] = as_ids(df["student_id"]), as_ids(df["room_id"])
+        df["start_date"], df["end_date"] = as_dates(df["start_date"]), as_dates(df["end_date"])
+        df["status"] = df["status"].fillna("active").astype(str).str.strip().str.lower()
+
+        students = set(as_ids(self.students.list_for_owner(owner_id)["id"]).dropna().tolist())
+        capacity = self._capacity(owner_id)
+        batch.reject(~df["student_id"].isin(students), "unknown student")
+        batch.reject(~df["room_id"].isin(capacity), "unknown room")
+        batch.reject(df["start_date"].isna() | df["end_date"].isna(), "missing or invalid dates")
+        batch.reject(df["end_date"] < df["start_date"], "end_date is before start_date")
+        batch.reject(~df["status"].isin(BOOKING_STATUSES), "unknown status")
+
+        active = df[batch.ok() & (df["status"] == "active")]
+        stays = pd.DataFrame({
+            "pos": active.index, "room_id": active["room_id"].astype("int64"),
+            "start": as_days(active["start_date"]), "end": as_days(active["end_date"]),
+        })
+        batch.problems += _bed_problems(owner_id, capacity, stays)
+        return df, batch
+
+    @perf.timed("batch.create_bookings")
+    def create_bookings(self, owner_id: Any, rows: Rows) -> List[int]:
+        """Create bookings (status defaults to active); returns their ids in batch order."""
+        with locked(owner_id, self.bookings):
+            df, batch = self._checked(owner_id, rows)
+            batch.raise_if_any()
+            if df.empty:
+                return []
+            return self.bookings.create_many(df.assign(owner_id=owner_id))
+
+    @perf.timed("batch.pay_and_book")
+    def pay_and_book(self, owner_id: Any, rows: Rows) -> PaidBookings:
+        """
+        Record a paid fee and an active booking per row (student_id, room_id,
+        start_date, end_date, amount, optional paid_on / month): one fees
+        write and one bookings write, both or neither.
+        """
+        with locked(owner_id, self.bookings, self.fees):
+            df, batch = self._checked(owner_id, as_frame(rows, ["student_id", "room_id", "start_date", "end_date",
+                                                              "amount", "paid_on", "month"]).assign(status="active"),
+                                      extra=["amount", "paid_on", "month"])
+            fees = fee_rows(df, batch, status="paid")
+            batch.raise_if_any()
+            if df.empty:
+                return PaidBookings([], [])
+            with all_or_nothing() as undo:
+                fee_ids = self.fees.create_many(fees.assign(owner_id=owner_id))
+                undo.append(lambda: self.fees.delete_many(fee_ids, owner_id=owner_id))
+                booking_ids = self.bookings.create_many(
+                    df[["student_id", "room_id", "start_date", "end_date", "status"]].assign(owner_id=owner_id))
+        return PaidBookings(booking_ids, fee_ids)
+
+    @perf.timed("batch.cancel_bookings")
+    def cancel_bookings(self, owner_id: Any, booking_ids: Iterable[int]) -> int:
+        """Mark bookings cancelled in one write; returns how many changed."""
+        with locked(owner_id, self.bookings):
+            ids = as_ids(pd.Series(list(booking_ids), dtype=object))
+            mine = self.bookings.list_for_owner(owner_id)
+            batch = Batch(len(ids))
+            batch.reject(~ids.isin(set(as_ids(mine["id"]).dropna().tolist())), "unknown booking")
+            batch.raise_if_any()
+            todo = mine[mine["id"].isin(ids.tolist()) & (mine["status"] != "cancelled")]
+            if not todo.empty:
+                self.bookings.upsert_many(pd.DataFrame({"id": todo["id"], "status": "cancelled"}),
+                                          owner_id=owner_id)
+            return len(todo)
+
+    @perf.timed("batch.transfer_students")
+    def transfer_students(self, owner_id: Any, moves: Rows, on: Any = None) -> List[int]:
+        """
+        Move students (rows of student_id, room_id) to another room from
+        `on` (default today): the active booking they hold that day ends
+        then (status completed) and a new active booking runs in the new
+        room until the old end date. Returns the new booking ids. One
+        update and one insert on bookings, undone together on failure.
+        """
+        day = pd.Timestamp(on or date.today()).normalize()
+        d = _day(day)
+        with locked(owner_id, self.bookings):
+            df = as_frame(moves, ["student_id", "room_id"])
+            batch = Batch(len(df))
+            df["student_id"], df["room_id"] = as_ids(df["student_id"]), as_ids(df["room_id"])
+            capacity = self._capacity(owner_id)
+
+            bookings = self.bookings.list_for_owner(owner_id)
+            current = bookings[(bookings["status"] == "active") & (bookings["start_date"] <= day)
+                               & (bookings["end_date"] > day)]
+            current = current.drop_duplicates("student_id").set_index("student_id")
+            held = df["student_id"].map(current["id"]) if not current.empty else pd.Series(pd.NA, index=df.index)
+            batch.reject(~df["room_id"].isin(capacity), "unknown room")
+            batch.reject(held.isna(), f"no active booking on {day.date()}")
+            batch.reject(df["student_id"].duplicated(), "student moved twice in one batch")
+            old = current.reindex(df["student_id"]).reset_index()
+            batch.reject(old["room_id"].eq(df["room_id"]).fillna(False).astype(bool), "already in that room")
+
+            ok = batch.ok()
+            old, new = old[ok], df[ok]
+            ending = {int(b): (int(r), _day(s), d) for b, r, s in zip(old["id"], old["room_id"], old["start_date"])}
+            stays = pd.DataFrame({"pos": new.index, "room_id": new["room_id"].astype("int64"), "start": d,
+                                  "end": as_days(old["end_date"]).to_numpy()})
+            batch.problems += _bed_problems(owner_id, capacity, stays, ending)
+            batch.raise_if_any()
+            if new.empty:
+                return []
+
+            with all_or_nothing() as undo:
+                before = bookings[bookings["id"].isin(old["id"].tolist())]
+                self.bookings.upsert_many(pd.DataFrame({"id": old["id"].to_numpy(), "end_date": day,
+                                                        "status": "completed"}), owner_id=owner_id)
+                undo.append(lambda: self.bookings.upsert_many(before, owner_id=owner_id))
+                return self.bookings.create_many(pd.DataFrame({
+                    "owner_id": owner_id, "student_id": new["student_id"].to_numpy(),
+                    "room_id": new["room_id"].to_numpy(), "start_date": day,
+                    "end_date": old["end_date"].to_numpy(), "status": "active",
+                }))
+
+
+booking_ops = BookingService(bookings_store, fees_store, students_store, rooms_store)
@@ -1,3 +1,15 @@
-from .data_store import CSVStore
-BOOKING_COLUMNS = ["id", "owner_id", "student_id", "room_id", "start_date", "end_date", "status"]
-bookings_store = CSVStore("bookings.csv", BOOKING_COLUMNS, id_col="id")
+from .storage import open_store
+from ..utils.schema import Schema, ID, DATE, CATEGORY
+BOOKING_SCHEMA = Schema({
+    "id": ID, "owner_id": ID, "student_id": ID, "room_id": ID,
+    "start_date": DATE, "end_date": DATE, "status": CATEGORY,
+})
+BOOKING_COLUMNS = BOOKING_SCHEMA.columns
+bookings_store = open_store(
+    "bookings.csv", BOOKING_SCHEMA, id_col="id",
+    indexes=[("owner_id",), ("owner_id", "status"), ("room_id",), ("student_id",)],
+    append_only=True, partitioned=True, binary_snapshot=True,
+)
+
+# keep rooms.occupied in step with every booking write (subscribes on import)
+from . import occupancy_service  # noqa: E402,F401
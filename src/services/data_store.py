@@ -1,42 +1,897 @@
-from typing import List, Dict, Any
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from io import StringIO
+from typing import List, Dict, Any, Callable, Iterable, Optional, Sequence, Tuple, Union
+import numpy as np
 import pandas as pd
-from ..utils.io import read_csv, write_csv
-from ..utils.ids import next_id
+from ..utils.io import read_csv, write_csv, append_csv, csv_path, ensure_csv, list_partitions
+from ..utils.ids import IdSequence, next_id
+from ..utils.locks import ConflictError, FileLock, file_lock, record_checked_write
+from ..utils.schema import Schema, TEXT, concat
+from ..utils.columnar import read_columnar, read_meta, write_columnar
+from ..utils import perf
 
-class CSVStore:
-    def __init__(self, filename: str, columns: List[str], id_col: str = "id"):
+# Snapshots are shared between sessions and handed out as shallow views, so a
+# caller writing into its view must never reach the cached frame. That is
+# pandas >= 3's Copy-on-Write; older versions would need a process-wide option
+# flipped, so they are refused rather than silently sharing cached data.
+if int(pd.__version__.split(".")[0]) < 3:
+    raise ImportError(f"the data store needs pandas >= 3 (Copy-on-Write); found {pd.__version__}")
+
+JOURNAL_SUFFIX = ".journal"
+OP_COL = "_op"
+OP_UPSERT = "U"
+OP_DELETE = "D"
+
+# Below this many journal records compaction isn't worth a rewrite.
+COMPACT_MIN_RECORDS = 100
+
+# Binary columnar copy of a CSV's parsed contents (see binary_snapshot).
+SNAPSHOT_SUFFIX = ".snap"
+# Writes schedule a refresh this many seconds later; a burst of writes
+# refreshes the file once, with whatever is current by then.
+SNAPSHOT_DELAY = 2.0
+
+# Partition holding rows that carry no owner_id (legacy data).
+UNOWNED = "_unowned"
+MIGRATED_SUFFIX = ".migrated"
+
+Stamp = Tuple[Optional[Tuple[int, int]], ...]
+# normalized key -> positions of the rows holding it in a snapshot's frame
+Index = Dict[Any, List[int]]
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    frame: pd.DataFrame
+    stamp: Stamp  # (mtime_ns, size) of the CSV and its journal when parsed
+    version: int
+    base_rows: int = 0
+    journal_rows: int = 0
+    # hash indexes over `frame`, built on first lookup per column tuple
+    indexes: Dict[Tuple[str, ...], Index] = field(default_factory=dict, compare=False, repr=False)
+
+
+# Process-wide cache: one parsed snapshot per CSV path, shared by every
+# CSVStore instance and every Streamlit session in this server process.
+_SNAPSHOTS: Dict[str, _Snapshot] = {}
+_VERSIONS: Dict[str, int] = {}
+_COMPACTING: set = set()
+_SNAPSHOT_TIMERS: Dict[str, threading.Timer] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+log = logging.getLogger(__name__)
+
+
+class DuplicateKeyError(ValueError):
+    """A write would give two rows the same value for a unique key."""
+
+
+@dataclass(frozen=True)
+class Change:
+    """
+    Rows one write touched for one owner. `before` holds their previous
+    state (empty for inserts), `after` their new state (empty for deletes).
+    version_before/version_after are that owner's version_for_owner() around
+    the write, so a subscriber can tell whether it missed other writes.
+    """
+    owner_id: Any
+    before: pd.DataFrame
+    after: pd.DataFrame
+    version_before: int
+    version_after: int
+
+
+Versions = Union[int, Dict[str, int]]
+
+
+class _Observable:
+    """Lets services keep derived state in step with a store's writes."""
+
+    def subscribe(self, listener: Callable[[Change], None]) -> None:
+        """Call `listener` with a Change for every owner touched by a write."""
+        self._listeners.append(listener)
+
+    def _emit(self, before: pd.DataFrame, after: pd.DataFrame,
+              version_before: Versions, version_after: Versions) -> None:
+        if not self._listeners or (before.empty and after.empty):
+            return
+        keys_before = before["owner_id"].map(_owner_key) if "owner_id" in before.columns else None
+        keys_after = after["owner_id"].map(_owner_key) if "owner_id" in after.columns else None
+        owners: Dict[str, Any] = {}
+        for frame in (before, after):
+            if "owner_id" in frame.columns:
+                for owner in frame["owner_id"].drop_duplicates():
+                    owners.setdefault(_owner_key(owner), owner)
+        for key, owner in owners.items():
+            change = Change(
+                owner,
+                before[keys_before == key] if keys_before is not None else before.iloc[0:0],
+                after[keys_after == key] if keys_after is not None else after.iloc[0:0],
+                version_before.get(key, 0) if isinstance(version_before, dict) else version_before,
+                version_after.get(key, 0) if isinstance(version_after, dict) else version_after,
+            )
+            for listener in self._listeners:
+                try:
+                    listener(change)
+                except Exception:
+                    # the write itself already landed; derived state catches
+                    # up through its own version checks
+                    log.exception("store listener failed for %s", owner)
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _reparse(df: pd.DataFrame, schema: Optional[Schema] = None) -> pd.DataFrame:
+    """Round-trip rows through CSV text so they carry the dtypes a fresh read would give."""
+    text = StringIO(df.to_csv(index=False))
+    return schema.read_csv(text) if schema is not None else pd.read_csv(text)
+
+
+def _fold(base: pd.DataFrame, journal: pd.DataFrame, id_col: str) -> pd.DataFrame:
+    """Replay journal upserts/tombstones over the base rows, keeping base row order."""
+    if journal.empty or id_col not in base.columns:
+        return base
+    last = journal.drop_duplicates(subset=id_col, keep="last")
+    touched = base[id_col].isin(last[id_col]).to_numpy()
+    kept = base[~touched]
+    ups = last[last[OP_COL] == OP_UPSERT].drop(columns=OP_COL)
+    if ups.empty:
+        return kept.reset_index(drop=True)
+
+    # updated rows go back where the base row was, new ids go after the base
+    first_pos = pd.Series(np.arange(len(base)), index=base[id_col].to_numpy())
+    first_pos = first_pos[~first_pos.index.duplicated()]
+    ups_pos = ups[id_col].map(first_pos).to_numpy(dtype=float, copy=True)
+    new = np.isnan(ups_pos)
+    ups_pos[new] = len(base) + np.arange(new.sum())
+
+    order = np.concatenate([np.flatnonzero(~touched), ups_pos])
+    merged = concat([kept, ups]) if len(kept) else ups.reset_index(drop=True)
+    return merged.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
+
+
+def _owner_key(owner_id: Any) -> str:
+    """Directory name of an owner's partition."""
+    try:
+        return str(int(float(owner_id)))
+    except (TypeError, ValueError):
+        return UNOWNED
+
+
+def _index_column(col: pd.Series) -> list:
+    """Index form of a column: integral numbers as int, text stripped and lowercased."""
+    if pd.api.types.is_integer_dtype(col):
+        return col.tolist()
+    if pd.api.types.is_numeric_dtype(col):
+        return [int(v) if v == v and float(v).is_integer() else v for v in col.tolist()]
+    return col.astype(str).str.strip().str.lower().tolist()
+
+
+def _index_value(value: Any, numeric: bool) -> Any:
+    """Normalize a lookup value the way _index_column normalizes the column."""
+    if numeric:
+        try:
+            f = float(value)
+        except (TypeError, ValueError):
+            return None
+        return int(f) if f.is_integer() else f
+    return str(value).strip().lower()
+
+
+def _index_keys(frame: pd.DataFrame, cols: Tuple[str, ...]) -> list:
+    keys = [_index_column(frame[c]) for c in cols]
+    return keys[0] if len(cols) == 1 else list(zip(*keys))
+
+
+def _extend_index(index: Index, frame: pd.DataFrame, cols: Tuple[str, ...], offset: int = 0) -> Index:
+    """Add `frame`'s rows to `index`, as positions starting at `offset`."""
+    if frame.empty:
+        return index
+    for pos, key in enumerate(_index_keys(frame, cols), start=offset):
+        index.setdefault(key, []).append(pos)
+    return index
+
+
+class _CSVFile:
+    """One CSV on disk plus its journal and the shared snapshot parsed from both."""
+
+    def __init__(self, filename: str, columns: List[str], id_col: str, schema: Optional[Schema] = None,
+                 binary: bool = False):
         self.filename = filename
         self.columns = columns
         self.id_col = id_col
+        self.schema = schema
+        self.binary = binary
+        self.journal_schema = Schema({OP_COL: TEXT, **schema.dtypes}) if schema is not None else None
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _CSVFile) and other.filename == self.filename
+
+    def __hash__(self) -> int:
+        return hash(self.filename)
+
+    @property
+    def path(self) -> str:
+        return csv_path(self.filename)
+
+    @property
+    def store_name(self) -> str:
+        # per store, not per partition: <owner>/bookings.csv -> bookings.csv
+        return os.path.basename(self.filename)
+
+    @property
+    def _header_size(self) -> int:
+        return len(",".join(self.columns)) + 1
+
+    @property
+    def journal_path(self) -> str:
+        return csv_path(self.filename + JOURNAL_SUFFIX)
+
+    @property
+    def binary_path(self) -> str:
+        return csv_path(self.filename + SNAPSHOT_SUFFIX)
+
+    @property
+    def lock(self) -> FileLock:
+        """Exclusive write lock for this file (threads and other processes)."""
+        return file_lock(self.path)
+
+    def check_version(self, expected: Optional[int]) -> None:
+        """Raise ConflictError if the file changed since `expected` was read. Call under `lock`."""
+        if expected is None:
+            return
+        conflict = self.snapshot().version != expected
+        record_checked_write(self.path, conflict)
+        if conflict:
+            raise ConflictError(f"{self.filename} changed since it was read; reload and retry")
+
+    def _stamp(self) -> Stamp:
+        return (_file_stamp(self.path), _file_stamp(self.journal_path))
+
+    def _install(self, frame: pd.DataFrame, base_rows: int, journal_rows: int,
+                 version: Optional[int] = None, indexes: Optional[Dict] = None) -> _Snapshot:
+        if version is None:
+            version = _VERSIONS[self.path] = _VERSIONS.get(self.path, 0) + 1
+        snap = _Snapshot(frame, self._stamp(), version, base_rows, journal_rows, indexes or {})
+        _SNAPSHOTS[self.path] = snap
+        self.schedule_binary()
+        return snap
+
+    def snapshot(self) -> _Snapshot:
+        """Return the cached snapshot, re-parsing only if a backing file changed on disk."""
+        snap = _SNAPSHOTS.get(self.path)
+        hit = snap is not None and snap.stamp == self._stamp()
+        if perf.enabled():
+            perf.cache(f"snapshot:{self.store_name}", hit)
+        if hit:
+            return snap
+        with self.lock.thread_lock:
+            ensure_csv(self.path, self.columns)
+            stamp = self._stamp()
+            snap = _SNAPSHOTS.get(self.path)
+            if snap is None or snap.stamp != stamp:
+                # a header-only CSV (e.g. a new owner's partition) has nothing to parse
+                header_only = stamp[1] is None and stamp[0] is not None and stamp[0][1] == self._header_size
+                loaded = (self.schema.empty(), 0, 0) if header_only and self.schema is not None \
+                    else self._load_binary(stamp)
+                if self.binary and perf.enabled():
+                    perf.cache(f"binary:{self.store_name}", loaded is not None)
+                if loaded is not None:
+                    frame, base_rows, journal_rows = loaded
+                else:
+                    # stat before parsing: a write racing the parse leaves a stale
+                    # stamp behind, which simply forces another parse next time
+                    base = read_csv(self.filename, self.columns, self.schema)
+                    journal = pd.DataFrame()
+                    if stamp[1] is not None:
+                        journal = self.journal_schema.read_csv(self.journal_path) if self.schema is not None \
+                            else pd.read_csv(self.journal_path)
+                    frame = _fold(base, journal, self.id_col)
+                    base_rows, journal_rows = len(base), len(journal)
+                    self.schedule_binary()
+                version = _VERSIONS[self.path] = _VERSIONS.get(self.path, 0) + 1
+                snap = _Snapshot(frame, stamp, version, base_rows, journal_rows)
+                _SNAPSHOTS[self.path] = snap
+            return snap
+
+    def invalidate(self) -> None:
+        _SNAPSHOTS.pop(self.path, None)
+
+    # ---------- binary snapshot ----------
+
+    def _load_binary(self, stamp: Stamp) -> Optional[Tuple[pd.DataFrame, int, int]]:
+        """The frame from the binary snapshot, if it was taken of exactly these files."""
+        if not self.binary:
+            return None
+        meta = read_meta(self.binary_path)
+        if meta is None or tuple(tuple(s) if s else None for s in meta["stamp"]) != stamp:
+            return None
+        loaded = read_columnar(self.binary_path, self.schema)
+        if loaded is None:
+            return None
+        frame, meta = loaded
+        return frame, meta["base_rows"], meta["journal_rows"]
+
+    def write_binary(self) -> bool:
+        """Write the binary snapshot of the current contents now; False if they
+        changed underneath (the write that changed them schedules another)."""
+        snap = self.snapshot()
+        if snap.stamp != self._stamp():
+            return False
+        write_columnar(self.binary_path, self.schema.coerce(snap.frame), self.schema,
+                       {"stamp": snap.stamp, "base_rows": snap.base_rows, "journal_rows": snap.journal_rows})
+        return True
+
+    def schedule_binary(self) -> None:
+        """Refresh the binary snapshot SNAPSHOT_DELAY seconds from now (once per burst)."""
+        if not self.binary:
+            return
+        path = self.path
+        with _REGISTRY_LOCK:
+            if path in _SNAPSHOT_TIMERS:
+                return
+            timer = _SNAPSHOT_TIMERS[path] = threading.Timer(SNAPSHOT_DELAY, self._refresh_binary, (path,))
+        timer.daemon = True
+        timer.start()
+
+    def _refresh_binary(self, path: str) -> None:
+        with _REGISTRY_LOCK:
+            _SNAPSHOT_TIMERS.pop(path, None)
+        if self.path != path:
+            # the data directory moved since the write (tests, tooling)
+            return
+        try:
+            self.write_binary()
+        except Exception:
+            # only a cache: the next cold start parses the CSV instead
+            log.exception("could not write binary snapshot of %s", self.filename)
+
+    def flush_binary(self) -> None:
+        """Write a pending binary snapshot now instead of waiting for its timer."""
+        with _REGISTRY_LOCK:
+            timer = _SNAPSHOT_TIMERS.pop(self.path, None)
+        if timer is not None:
+            timer.cancel()
+        if self.binary:
+            self.write_binary()
 
+    def rewrite(self, df: pd.DataFrame) -> None:
+        """Replace the file's contents (and drop any journal)."""
+        with self.lock:
+            write_csv(self.filename, df)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self.invalidate()
+            self.schedule_binary()
+
+    def append(self, rows: pd.DataFrame, reparsed: bool = False) -> None:
+        """Append new rows to the CSV and fold them into the snapshot in place.
+        `reparsed`: the rows already went through _reparse."""
+        with self.lock:
+            snap = self.snapshot()
+            append_csv(self.filename, rows, self.columns)
+            if not reparsed:
+                rows = _reparse(rows, self.schema)
+            # a header-only CSV parses as all-object columns (without a schema); don't let that stick
+            frame = concat([snap.frame, rows]) if len(snap.frame) else rows
+            # appended rows only add positions, so built indexes carry over;
+            # lookups on the older snapshot ignore positions past its end
+            indexes = {cols: _extend_index(ix, rows, cols, len(snap.frame))
+                       for cols, ix in snap.indexes.items()}
+            self._install(frame, snap.base_rows + len(rows), snap.journal_rows, indexes=indexes)
+
+    def log(self, rows: pd.DataFrame, op: str) -> _Snapshot:
+        """Record upserts or tombstones in the journal and fold them into the snapshot."""
+        with self.lock:
+            snap = self.snapshot()
+            entries = rows.reindex(columns=self.columns)
+            entries.insert(0, OP_COL, op)
+            append_csv(self.filename + JOURNAL_SUFFIX, entries, [OP_COL] + self.columns)
+            frame = _fold(snap.frame, _reparse(entries, self.journal_schema), self.id_col)
+            return self._install(frame, snap.base_rows, snap.journal_rows + len(rows))
+
+    def compact(self) -> None:
+        """Rewrite the CSV from the folded snapshot and truncate the journal."""
+        with self.lock:
+            snap = self.snapshot()
+            if not snap.journal_rows:
+                return
+            write_csv(self.filename, snap.frame)
+            os.remove(self.journal_path)
+            # contents are unchanged, so readers keep the same version
+            self._install(snap.frame, len(snap.frame), 0, version=snap.version, indexes=snap.indexes)
+
+    def index(self, cols: Tuple[str, ...]) -> Tuple[_Snapshot, Index]:
+        """The current snapshot and its hash index on `cols` (built on first use)."""
+        snap = self.snapshot()
+        index = snap.indexes.get(cols)
+        if index is None:
+            with self.lock.thread_lock:
+                index = snap.indexes.get(cols)
+                if index is None:
+                    if all(c in snap.frame.columns for c in cols):
+                        index = _extend_index({}, snap.frame, cols)
+                    else:
+                        index = {}
+                    snap.indexes[cols] = index
+        return snap, index
+
+    def lookup(self, cols: Tuple[str, ...], values: Tuple[Any, ...]) -> pd.DataFrame:
+        """Rows whose normalized `cols` equal `values` (a view over the snapshot)."""
+        snap, index = self.index(cols)
+        frame = snap.frame
+        if not index:
+            return frame.iloc[0:0]
+        key = tuple(_index_value(v, pd.api.types.is_numeric_dtype(frame[c])) for c, v in zip(cols, values))
+        pos = [p for p in index.get(key[0] if len(cols) == 1 else key, ()) if p < len(frame)]
+        return frame.iloc[pos]
+
+    def garbage_ratio(self) -> float:
+        """Share of the records on disk that are journal entries superseding other rows."""
+        snap = self.snapshot()
+        total = snap.base_rows + snap.journal_rows
+        return snap.journal_rows / total if total else 0.0
+
+    def maybe_compact(self, ratio: float) -> None:
+        """Compact on a background thread once the garbage ratio reaches `ratio`."""
+        if self.snapshot().journal_rows < COMPACT_MIN_RECORDS or self.garbage_ratio() < ratio:
+            return
+        path = self.path
+        with _REGISTRY_LOCK:
+            if path in _COMPACTING:
+                return
+            _COMPACTING.add(path)
+
+        def run():
+            try:
+                self.compact()
+            finally:
+                with _REGISTRY_LOCK:
+                    _COMPACTING.discard(path)
+
+        threading.Thread(target=run, name=f"compact-{self.filename}", daemon=True).start()
+
+
+class CSVStore(_Observable):
+    def __init__(self, filename: str, columns: Union[List[str], Schema], id_col: str = "id",
+                 append_only: bool = False, compact_ratio: float = 0.3,
+                 partitioned: bool = False, indexes: Sequence[Sequence[str]] = (),
+                 unique: Sequence[Sequence[str]] = (), binary_snapshot: bool = False):
+        """
+        columns: the column list, or a Schema giving each column's dtype.
+        With a schema the CSV is parsed with those dtypes and every frame
+        the store returns or emits (including rows just written) is typed
+        the same way; without one pandas infers dtypes per read.
+
+        append_only: inserts append a single line, updates/deletes go to a
+        journal next to the CSV; the journal is compacted into the CSV in the
+        background once it holds `compact_ratio` of all records on disk.
+
+        partitioned: keep each owner's rows in their own file,
+        data/<owner_id>/<filename>, so owner-scoped reads and writes only
+        touch that hostel's data. A legacy single-file CSV is split into
+        partitions on first use (see migrate_to_partitions).
+
+        indexes / unique: column tuples looked up by value (find_by). Each is
+        an in-memory hash index over the snapshot, with text compared
+        trimmed and case-insensitively; the id column is always indexed.
+        `unique` keys are enforced on every insert and upsert (per owner on
+        partitioned stores) and raise DuplicateKeyError.
+
+        binary_snapshot: keep a memory-mappable columnar copy of each CSV's
+        parsed contents next to it (<file>.snap; needs a Schema). A cold
+        process maps it instead of parsing the CSV text, as long as the CSV
+        and journal are exactly as they were when it was written; it is
+        refreshed in the background shortly after writes. The CSV stays the
+        source of truth and the export/import format.
+        """
+        self.filename = filename
+        self.schema = columns if isinstance(columns, Schema) else None
+        self.columns = self.schema.columns if self.schema is not None else list(columns)
+        self.id_col = id_col
+        self.append_only = append_only
+        self.compact_ratio = compact_ratio
+        self.partitioned = partitioned
+        self.indexes = [tuple(ix) for ix in indexes]
+        self.unique = [tuple(ix) for ix in unique]
+        if binary_snapshot and self.schema is None:
+            raise ValueError("binary_snapshot needs a Schema for the columns")
+        self.binary_snapshot = binary_snapshot
+        self._file = _CSVFile(filename, self.columns, id_col, self.schema, binary_snapshot)
+        self._sequence = IdSequence(filename)
+        self._migrated = False
+        self._listeners: List[Callable[[Change], None]] = []
+
+    @property
+    def path(self) -> str:
+        return self._file.path
+
+    # ---------- file routing ----------
+
+    def _partition(self, key: str) -> _CSVFile:
+        return _CSVFile(os.path.join(key, self.filename), self.columns, self.id_col, self.schema,
+                        self.binary_snapshot)
+
+    def _file_for(self, owner_id: Any) -> _CSVFile:
+        if not self.partitioned:
+            return self._file
+        self._ensure_migrated()
+        return self._partition(_owner_key(owner_id))
+
+    def _files(self) -> List[_CSVFile]:
+        if not self.partitioned:
+            return [self._file]
+        self._ensure_migrated()
+        return [self._partition(key) for key in list_partitions(self.filename)]
+
+    def _split(self, df: pd.DataFrame) -> Dict[_CSVFile, pd.DataFrame]:
+        """Group rows by the file they live in."""
+        if not self.partitioned:
+            return {self._file: df}
+        owners = df["owner_id"] if "owner_id" in df.columns else pd.Series(None, index=df.index)
+        keys = owners.map(_owner_key)
+        return {self._partition(key): rows for key, rows in df.groupby(keys, sort=False)}
+
+    def _notify(self, f: _CSVFile, snap: _Snapshot, before: pd.DataFrame, after: pd.DataFrame) -> None:
+        """Emit a write to subscribers; `snap` is the file's snapshot from before it."""
+        if self._listeners:
+            self._emit(before, after, snap.version, f.snapshot().version)
+
+    def _ensure_migrated(self) -> None:
+        if not self._migrated:
+            self.migrate_to_partitions()
+
+    def migrate_to_partitions(self) -> int:
+        """Split a legacy single-file CSV into per-owner partitions.
+
+        The legacy file (and journal) is renamed with a `.migrated` suffix.
+        Rows already present in a partition win over legacy rows with the
+        same id. Returns the number of rows moved.
+        """
+        if not self.partitioned:
+            return 0
+        with self._file.lock:
+            self._migrated = True
+            if not os.path.exists(self._file.path):
+                return 0
+            legacy = self._file.snapshot().frame
+            for f, rows in self._split(legacy).items():
+                existing = f.snapshot().frame
+                if not existing.empty and self.id_col in existing.columns:
+                    rows = rows[~rows[self.id_col].isin(existing[self.id_col])]
+                    rows = concat([existing, rows])
+                f.rewrite(rows.reindex(columns=self.columns))
+            for path in (self._file.path, self._file.journal_path):
+                if os.path.exists(path):
+                    os.replace(path, path + MIGRATED_SUFFIX)
+            if os.path.exists(self._file.binary_path):
+                os.remove(self._file.binary_path)
+            self._file.invalidate()
+            return len(legacy)
+
+    # ---------- reads ----------
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter that changes whenever the store's contents change."""
+        return sum(f.snapshot().version for f in self._files())
+
+    def version_for_owner(self, owner_id: Any) -> int:
+        """Like `version`, but only tracks the file holding this owner's rows."""
+        return self._file_for(owner_id).snapshot().version
+
+    @perf.traced
     def list_all(self) -> pd.DataFrame:
-        """Read the CSV (auto-create with headers if missing)."""
-        return read_csv(self.filename, self.columns)
+        """Read the CSV (auto-create with headers if missing).
+
+        Returns a cheap read-only view over the shared snapshot; modifying it
+        (adding columns, assigning values) copies on write and never touches
+        the cache. Partitioned stores concatenate every owner's partition.
+        """
+        frames = [f.snapshot().frame for f in self._files()]
+        if not self.partitioned:
+            return frames[0].copy(deep=False)
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return self._empty()
+        return concat(frames)
+
+    @perf.traced
+    def list_for_owner(self, owner_id: Any, **filters: Any) -> pd.DataFrame:
+        """Rows belonging to one owner (read-only view, same rules as list_all),
+        optionally narrowed by column equality, e.g. status="active"."""
+        df = self._file_for(owner_id).snapshot().frame
+        if not self.partitioned:
+            if "owner_id" not in df.columns:
+                return df.iloc[0:0]
+            df = df[df["owner_id"] == owner_id]
+        for col, value in filters.items():
+            df = df[df[col] == value]
+        return df.copy(deep=False)
+
+    @perf.traced
+    def find_by(self, cols: Union[str, Sequence[str]], value: Any, owner_id: Any = None) -> pd.DataFrame:
+        """Rows whose `cols` equal `value` (a tuple for several columns), via the hash index.
+
+        Text is compared trimmed and case-insensitively, so
+        find_by("email", " A@x.com") finds "a@x.com".
+        """
+        cols = (cols,) if isinstance(cols, str) else tuple(cols)
+        values = (value,) if len(cols) == 1 else tuple(value)
+        files = [self._file_for(owner_id)] if owner_id is not None else self._files()
+        hits = [f.lookup(cols, values) for f in files]
+        hits = [h for h in hits if not h.empty]
+        if not hits:
+            return self._empty()
+        df = hits[0] if len(hits) == 1 else concat(hits)
+        if owner_id is not None and not self.partitioned:
+            df = df[df["owner_id"] == owner_id] if "owner_id" in df.columns else df.iloc[0:0]
+        return df.copy(deep=False)
+
+    def get_by_id(self, _id: Any, owner_id: Any = None) -> Optional[Dict[str, Any]]:
+        """One row as a dict, or None."""
+        df = self.find_by(self.id_col, _id, owner_id=owner_id)
+        return None if df.empty else df.iloc[0].to_dict()
+
+    def exists(self, cols: Union[str, Sequence[str]], value: Any, owner_id: Any = None) -> bool:
+        return not self.find_by(cols, value, owner_id=owner_id).empty
+
+    # ---------- writes ----------
+
+    def _typed(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows as the schema types them (unchanged without a schema)."""
+        return self.schema.coerce(df) if self.schema is not None else df
+
+    def _empty(self) -> pd.DataFrame:
+        return self._typed(pd.DataFrame(columns=self.columns))
+
+    def _normalize(self, records: pd.DataFrame, base: pd.DataFrame) -> pd.DataFrame:
+        """Fill columns missing from `records` with the existing row's values (or "")."""
+        records = records.reset_index(drop=True)
+        if self.id_col not in base.columns or base.empty:
+            return records.reindex(columns=self.columns, fill_value="")
+        current = base.drop_duplicates(self.id_col).set_index(self.id_col)
+        out = pd.DataFrame({self.id_col: records[self.id_col]})
+        for c in self.columns:
+            if c == self.id_col:
+                continue
+            if c in records.columns:
+                out[c] = records[c]
+            elif c in current.columns:
+                out[c] = records[self.id_col].map(current[c])
+            else:
+                out[c] = ""
+        return out[self.columns]
+
+    def _allocate_ids(self, n: int) -> List[int]:
+        """Reserve `n` consecutive ids from the store's persistent sequence."""
+        return self._sequence.allocate(
+            n, lambda: max((next_id(f.snapshot().frame, self.id_col) for f in self._files()), default=1)
+        )
+
+    def _observe_ids(self, rows: pd.DataFrame) -> None:
+        # explicit ids written by upserts/saves must never be handed out later
+        if self.id_col in rows.columns and not rows.empty:
+            top = pd.to_numeric(rows[self.id_col], errors="coerce").max()
+            if pd.notna(top):
+                self._sequence.observe(int(top))
+
+    def _check_unique(self, f: _CSVFile, rows: pd.DataFrame) -> None:
+        """Raise DuplicateKeyError if `rows` clash on a unique key with each other or
+        with other rows already in `f`. Call under `f.lock`."""
+        for cols in self.unique:
+            if rows.empty or not all(c in rows.columns for c in cols):
+                continue
+            keys = _index_keys(rows, cols)
+            snap, index = f.index(cols)
+            own_ids = set(_index_column(rows[self.id_col])) if self.id_col in rows.columns else set()
+            stored_ids = snap.frame[self.id_col] if self.id_col in snap.frame.columns else None
+            seen = set()
+            for key in keys:
+                if key in ("", "nan", None) or (isinstance(key, tuple) and "" in key):
+                    continue
+                taken = stored_ids is not None and any(
+                    p < len(stored_ids) and _index_value(stored_ids.iat[p], True) not in own_ids
+                    for p in index.get(key, ())
+                )
+                if taken or key in seen:
+                    raise DuplicateKeyError(f"{self.filename}: {'/'.join(cols)} {key!r} already exists")
+                seen.add(key)
 
+    def lock_for_owner(self, owner_id: Any) -> FileLock:
+        """Exclusive lock on one owner's rows, for read-check-write sequences.
+
+        Only that owner's partition is locked, so other hostels keep writing.
+        """
+        return self._file_for(owner_id).lock
+
+    @perf.traced_write
     def create(self, record: Dict[str, Any]) -> pd.DataFrame:
         """Append a single record and persist."""
-        df = self.list_all()
-        # normalize keys and assign next id if present
-        rec = {k: record.get(k, "") for k in self.columns}
+        self.create_many(pd.DataFrame([record]))
+        return self.list_for_owner(record.get("owner_id")) if self.partitioned else self.list_all()
+
+    @perf.traced_write
+    def create_many(self, records: pd.DataFrame) -> List[int]:
+        """Insert rows with a freshly allocated block of ids; returns the new ids."""
+        if records is None or records.empty:
+            return []
+        # normalize keys; ids are always assigned here
+        rows = records.reset_index(drop=True).reindex(columns=self.columns, fill_value="")
+        ids: List[int] = []
         if self.id_col in self.columns:
-            rec[self.id_col] = next_id(df, self.id_col)
-        df = pd.concat([df, pd.DataFrame([rec])], ignore_index=True)
-        write_csv(self.filename, df)
-        return df
+            ids = self._allocate_ids(len(rows))
+            rows[self.id_col] = ids
+        rows = self._typed(rows)
+        # one CSV round-trip for the whole batch rather than one per partition
+        reparsed = self.append_only and self.schema is not None
+        if reparsed:
+            rows = _reparse(rows, self.schema)
+        for f, part in self._split(rows).items():
+            with f.lock:
+                self._check_unique(f, part)
+                snap = f.snapshot()
+                if self.append_only:
+                    f.append(part, reparsed=reparsed)
+                else:
+                    f.rewrite(concat([snap.frame, part]))
+                self._notify(f, snap, part.iloc[0:0], part)
+        return ids
+
+    @perf.traced_write
+    def upsert_many(self, records: pd.DataFrame, owner_id: Any = None,
+                    expected_version: Optional[int] = None) -> None:
+        """Replace rows by id (columns left out keep their stored value); unknown ids are added.
 
-    def save_all(self, df: pd.DataFrame) -> None:
-        """Overwrite the CSV with the given dataframe (column-safe)."""
+        On partitioned stores rows are routed by their owner_id column, or by
+        `owner_id` when given. With `expected_version` (from
+        version_for_owner) the write raises ConflictError if the owner's rows
+        changed in the meantime.
+        """
+        if records is None or records.empty:
+            return
+        if owner_id is not None:
+            records = records.assign(owner_id=owner_id)
+        for f, part in self._split(records).items():
+            with f.lock:
+                f.check_version(expected_version)
+                snap = f.snapshot()
+                df = snap.frame
+                rows = self._typed(self._normalize(part, df))
+                self._check_unique(f, rows)
+                self._observe_ids(rows)
+                if self.append_only:
+                    f.log(rows, OP_UPSERT)
+                else:
+                    f.rewrite(_fold(df, rows.assign(**{OP_COL: OP_UPSERT}), self.id_col))
+                before = df[df[self.id_col].isin(rows[self.id_col])] if self.id_col in df.columns else df.iloc[0:0]
+                self._notify(f, snap, before, rows)
+                if self.append_only:
+                    f.maybe_compact(self.compact_ratio)
+
+    @perf.traced_write
+    def delete_many(self, ids: Iterable[int], owner_id: Any = None) -> None:
+        """Delete every row whose id is in `ids` (only in that owner's partition, if given)."""
+        ids = list(ids)
+        files = [self._file_for(owner_id)] if owner_id is not None else self._files()
+        for f in files:
+            with f.lock:
+                snap = f.snapshot()
+                df = snap.frame
+                if self.id_col not in df.columns:
+                    continue
+                hit = df[self.id_col].isin(ids)
+                if not hit.any():
+                    continue
+                if self.append_only:
+                    f.log(df.loc[hit, [self.id_col]], OP_DELETE)
+                else:
+                    f.rewrite(df[~hit])
+                self._notify(f, snap, df[hit], df.iloc[0:0])
+                if self.append_only:
+                    f.maybe_compact(self.compact_ratio)
+
+    def _conform(self, df: pd.DataFrame) -> pd.DataFrame:
         # ensure all declared columns exist, and order them
+        df = df.copy(deep=False)
         for c in self.columns:
             if c not in df.columns:
                 df[c] = ""
-        df = df[self.columns]
-        write_csv(self.filename, df)
+        return df[self.columns]
+
+    @perf.traced_write
+    def save_all(self, df: pd.DataFrame, expected_version: Optional[int] = None) -> None:
+        """Overwrite the CSV with the given dataframe (column-safe).
+
+        With `expected_version` (from `version`) the write raises
+        ConflictError instead of dropping changes made since that read.
+        """
+        df = self._typed(self._conform(df))
+        if not self.partitioned:
+            with self._file.lock:
+                self._file.check_version(expected_version)
+                snap = self._file.snapshot()
+                self._observe_ids(df)
+                self._file.rewrite(df)
+                self._notify(self._file, snap, snap.frame, df)
+            return
+        with self._file.lock:
+            if expected_version is not None:
+                conflict = self.version != expected_version
+                record_checked_write(self.path, conflict)
+                if conflict:
+                    raise ConflictError(f"{self.filename} changed since it was read; reload and retry")
+            self._observe_ids(df)
+            parts = self._split(df)
+            for f in self._files():
+                parts.setdefault(f, df.iloc[0:0])
+            for f, part in parts.items():
+                with f.lock:
+                    snap = f.snapshot()
+                    f.rewrite(part)
+                    self._notify(f, snap, snap.frame, part)
 
-    def delete_by_id(self, _id: int) -> pd.DataFrame:
+    @perf.traced_write
+    def save_for_owner(self, owner_id: Any, df: pd.DataFrame,
+                       expected_version: Optional[int] = None) -> None:
+        """Replace one owner's rows with `df`, leaving every other owner untouched.
+
+        With `expected_version` (from version_for_owner) the write raises
+        ConflictError instead of dropping changes made since that read.
+        """
+        df = self._typed(self._conform(df).assign(owner_id=owner_id))
+        f = self._file_for(owner_id)
+        with f.lock:
+            f.check_version(expected_version)
+            snap = f.snapshot()
+            self._observe_ids(df)
+            full = snap.frame
+            if self.partitioned:
+                before = full
+                f.rewrite(df)
+            else:
+                mine = full["owner_id"] == owner_id if "owner_id" in full.columns else pd.Series(False, index=full.index)
+                before = full[mine]
+                f.rewrite(concat([full[~mine], df]))
+            self._notify(f, snap, before, df)
+
+    @perf.traced_write
+    def delete_by_id(self, _id: int, owner_id: Any = None) -> pd.DataFrame:
         """Delete a row by id and persist."""
-        df = self.list_all()
-        if self.id_col in df.columns:
-            df = df[df[self.id_col] != _id]
-        write_csv(self.filename, df)
-        return df
+        self.delete_many([_id], owner_id=owner_id)
+        return self.list_for_owner(owner_id) if owner_id is not None else self.list_all()
+
+    # ---------- journal compaction ----------
+
+    def garbage_ratio(self, owner_id: Any = None) -> float:
+        """Share of the records on disk that are journal entries superseding other rows."""
+        if owner_id is not None or not self.partitioned:
+            return self._file_for(owner_id).garbage_ratio()
+        snaps = [f.snapshot() for f in self._files()]
+        total = sum(s.base_rows + s.journal_rows for s in snaps)
+        return sum(s.journal_rows for s in snaps) / total if total else 0.0
+
+    @perf.traced_write
+    def compact(self, owner_id: Any = None) -> None:
+        """Fold the journal into the CSV now (every partition unless `owner_id` is given)."""
+        files = [self._file_for(owner_id)] if owner_id is not None else self._files()
+        for f in files:
+            f.compact()
+
+    # ---------- binary snapshots ----------
+
+    def write_snapshots(self, owner_id: Any = None) -> None:
+        """Bring the binary snapshots up to date now (e.g. before shutdown)."""
+        files = [self._file_for(owner_id)] if owner_id is not None else self._files()
+        for f in files:
+            f.flush_binary()
@@ -0,0 +1,61 @@
+from datetime import date
+from typing import Any, Iterable, List
+import pandas as pd
+from .batch_service import Batch, Rows, as_dates, as_frame, as_ids, locked
+from .fee_service import fees_store
+from .student_service import students_store
+from ..utils import perf
+
+FEE_STATUSES = ("paid", "pending")
+
+
+def fee_rows(df: pd.DataFrame, batch: Batch, status: str) -> pd.DataFrame:
+    """Fee rows (student_id, month, amount, paid_on, status) from a batch; bad amounts are rejected."""
+    amount = pd.to_numeric(df["amount"], errors="coerce")
+    batch.reject(amount.isna() | (amount < 0), "amount must be a number of at least 0")
+    paid_on = as_dates(df["paid_on"]).fillna(pd.Timestamp(date.today()))
+    month = df["month"].where(df["month"].notna(), paid_on.dt.strftime("%Y-%m")).astype(str).str[:7]
+    return pd.DataFrame({"student_id": df["student_id"], "month": month, "amount": amount.astype(float),
+                         "paid_on": paid_on if status == "paid" else pd.NaT, "status": status})
+
+
+class FeeService:
+    """Batch fee operations (see booking_batch_service.BookingService for the guarantees)."""
+
+    def __init__(self, fees, students):
+        self.fees = fees
+        self.students = students
+
+    @perf.timed("batch.record_payments")
+    def record_payments(self, owner_id: Any, rows: Rows, status: str = "paid") -> List[int]:
+        """Add fee rows (student_id, amount, optional paid_on / month) in one write; returns their ids."""
+        if status not in FEE_STATUSES:
+            raise ValueError(f"unknown fee status {status!r}")
+        with locked(owner_id, self.fees):
+            df = as_frame(rows, ["student_id", "amount", "paid_on", "month"])
+            batch = Batch(len(df))
+            df["student_id"] = as_ids(df["student_id"])
+            students = set(as_ids(self.students.list_for_owner(owner_id)["id"]).dropna().tolist())
+            batch.reject(~df["student_id"].isin(students), "unknown student")
+            fees = fee_rows(df, batch, status)
+            batch.raise_if_any()
+            return self.fees.create_many(fees.assign(owner_id=owner_id)) if not fees.empty else []
+
+    @perf.timed("batch.mark_paid")
+    def mark_paid(self, owner_id: Any, fee_ids: Iterable[int], paid_on: Any = None) -> int:
+        """Mark pending fees paid on `paid_on` (default today) in one write; returns how many changed."""
+        day = pd.Timestamp(paid_on or date.today()).normalize()
+        with locked(owner_id, self.fees):
+            ids = as_ids(pd.Series(list(fee_ids), dtype=object))
+            mine = self.fees.list_for_owner(owner_id)
+            batch = Batch(len(ids))
+            batch.reject(~ids.isin(set(as_ids(mine["id"]).dropna().tolist())), "unknown fee")
+            batch.raise_if_any()
+            todo = mine[mine["id"].isin(ids.tolist()) & (mine["status"] != "paid")]
+            if not todo.empty:
+                self.fees.upsert_many(pd.DataFrame({"id": todo["id"], "status": "paid", "paid_on": day}),
+                                      owner_id=owner_id)
+            return len(todo)
+
+
+fee_ops = FeeService(fees_store, students_store)
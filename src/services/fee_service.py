@@ -1,3 +1,13 @@
-from .data_store import CSVStore
-FEE_COLUMNS = ["id", "owner_id","student_id", "month", "amount", "paid_on", "status"]
-fees_store = CSVStore("fees.csv", FEE_COLUMNS, id_col="id")
+from .storage import open_store
+from ..utils.schema import Schema, ID, TEXT, FLOAT, DATE, CATEGORY
+FEE_SCHEMA = Schema({
+    "id": ID, "owner_id": ID, "student_id": ID, "month": TEXT,
+    "amount": FLOAT, "paid_on": DATE, "status": CATEGORY,
+})
+FEE_COLUMNS = FEE_SCHEMA.columns
+fees_store = open_store(
+    "fees.csv", FEE_SCHEMA, id_col="id",
+    indexes=[("owner_id",), ("student_id",)],
+    append_only=True, partitioned=True, binary_snapshot=True,
+)
+
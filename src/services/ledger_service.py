@@ -0,0 +1,274 @@
+import threading
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+from .data_store import Change, _owner_key
+from .fee_service import fees_store
+from .booking_service import bookings_store
+from .room_service import rooms_store, TYPE_PRICE
+from .snapshot_service import load_snapshot
+from ..utils import perf
+
+# TYPE_PRICE is quoted for this many days of stay; a booking is charged pro rata
+PRICE_PERIOD_DAYS = 180
+# statuses that owe rent (cancelled bookings don't)
+CHARGED_STATUSES = ("active", "completed")
+# days after a booking starts before its unpaid rent counts as overdue
+GRACE_DAYS = 7
+
+BALANCE_COLUMNS = ["student_id", "charged", "paid", "balance"]
+COLLECTION_COLUMNS = ["month", "amount", "payments"]
+OVERDUE_COLUMNS = ["student_id", "balance", "due_since", "days_overdue"]
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def _days(values: pd.Series) -> pd.Series:
+    return (values.dt.floor("D") - pd.Timestamp(0)).dt.days
+
+
+def _charges(bookings: Optional[pd.DataFrame], room_price: Dict[int, float]) -> pd.DataFrame:
+    """One row per charged booking: id, student_id, due (day number), charge."""
+    cols = ["id", "student_id", "due", "charge"]
+    need = {"id", "student_id", "room_id", "start_date", "end_date", "status"}
+    if bookings is None or bookings.empty or not need <= set(bookings.columns):
+        return pd.DataFrame(columns=cols)
+    b = bookings[bookings["status"].isin(CHARGED_STATUSES)]
+    start, end = _days(b["start_date"]), _days(b["end_date"])
+    out = pd.DataFrame({
+        "id": b["id"],
+        "student_id": b["student_id"],
+        "due": start,
+        "price": b["room_id"].map(room_price),
+        # a same-day stay is still one day
+        "days": np.maximum(end - start, 1),
+    }).dropna()
+    if out.empty:
+        return pd.DataFrame(columns=cols)
+    return pd.DataFrame({
+        "id": out["id"].astype("int64").to_numpy(),
+        "student_id": out["student_id"].astype("int64").to_numpy(),
+        "due": out["due"].astype("int64").to_numpy(),
+        "charge": (out["price"] * out["days"] / PRICE_PERIOD_DAYS).round(2).to_numpy(),
+    })
+
+
+def _payments(fees: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Paid fee rows: student_id, month (of paid_on, else the fee's month), amount."""
+    cols = ["student_id", "month", "amount"]
+    if fees is None or fees.empty or not {"student_id", "amount", "status"} <= set(fees.columns):
+        return pd.DataFrame(columns=cols)
+    f = fees[fees["status"] == "paid"]
+    month = f["paid_on"].dt.strftime("%Y-%m") if "paid_on" in f.columns else pd.Series(pd.NA, index=f.index)
+    if "month" in f.columns:
+        month = month.fillna(f["month"].str[:7])
+    out = pd.DataFrame({"student_id": f["student_id"], "month": month, "amount": f["amount"]}).dropna()
+    out["student_id"] = out["student_id"].astype("int64")
+    return out
+
+
+def _room_prices(rooms: Optional[pd.DataFrame]) -> Dict[int, float]:
+    if rooms is None or rooms.empty or not {"id", "type"} <= set(rooms.columns):
+        return {}
+    rid = rooms["id"]
+    price = rooms["type"].map(TYPE_PRICE).astype(float).fillna(0)
+    return dict(zip(rid[rid.notna()].astype("int64").tolist(), price[rid.notna()].tolist()))
+
+
+def _add(totals: Dict[Any, float], series: pd.Series, sign: int) -> None:
+    for key, value in series.items():
+        totals[key] = totals.get(key, 0) + sign * value
+        if abs(totals[key]) < 1e-9:
+            del totals[key]
+
+
+@dataclass
+class _OwnerLedger:
+    versions: Dict[str, int] = field(default_factory=dict)
+    room_price: Dict[int, float] = field(default_factory=dict)
+    charges: pd.DataFrame = field(default_factory=pd.DataFrame)   # by booking id
+    paid: Dict[int, float] = field(default_factory=dict)          # per student
+    collected: Dict[str, float] = field(default_factory=dict)     # per month
+    payments: Dict[str, int] = field(default_factory=dict)        # per month
+    _balances: Optional[pd.DataFrame] = None
+
+    def balances(self) -> pd.DataFrame:
+        if self._balances is None:
+            charged = self.charges.groupby("student_id")["charge"].sum() if not self.charges.empty \
+                else pd.Series(dtype="float64")
+            paid = pd.Series(self.paid, dtype="float64")
+            df = pd.DataFrame({"charged": charged, "paid": paid}).fillna(0.0)
+            df.index.name = "student_id"
+            df["balance"] = (df["charged"] - df["paid"]).round(2)
+            self._balances = df.reset_index().reindex(columns=BALANCE_COLUMNS)
+        return self._balances
+
+
+class FeeLedger:
+    """
+    What each student owes against what they have paid. Bookings are
+    charged at their room type's TYPE_PRICE pro rata over start_date to
+    end_date (cancelled ones are not charged); fee rows with status "paid"
+    are payments. Per-owner totals are built with group-bys once, then
+    every fee and booking write is applied as a delta, so recording a
+    payment costs the same whatever the length of the history. A room whose
+    type (so price) changes, or that is deleted, rebuilds the owner on next
+    read, as do writes made by another process; other room writes, such as
+    occupancy counts, don't.
+    """
+
+    def __init__(self, fees, bookings, rooms):
+        self.stores = {"fees": fees, "bookings": bookings, "rooms": rooms}
+        self._owners: Dict[str, _OwnerLedger] = {}
+        self._lock = threading.RLock()
+        fees.subscribe(self._on_fees)
+        bookings.subscribe(self._on_bookings)
+        rooms.subscribe(self._on_rooms)
+
+    # ---------- building ----------
+
+    def _versions(self, owner_id: Any) -> Dict[str, int]:
+        return {name: store.version_for_owner(owner_id) for name, store in self.stores.items()}
+
+    @perf.timed("ledger.build")
+    def _build(self, owner_id: Any) -> _OwnerLedger:
+        snap = load_snapshot(owner_id, stores=self.stores)
+        fees, bookings, rooms = snap["fees"], snap["bookings"], snap["rooms"]
+        led = _OwnerLedger(versions=snap.versions, room_price=_room_prices(rooms))
+        led.charges = _charges(bookings, led.room_price).set_index("id")
+        pay = _payments(fees)
+        _add(led.paid, pay.groupby("student_id")["amount"].sum(), 1)
+        by_month = pay.groupby("month")["amount"]
+        _add(led.collected, by_month.sum(), 1)
+        led.payments = by_month.size().astype(int).to_dict()
+        return led
+
+    def _current(self, owner_id: Any) -> _OwnerLedger:
+        # call with self._lock held
+        key = _owner_key(owner_id)
+        led = self._owners.get(key)
+        hit = led is not None and led.versions == self._versions(owner_id)
+        perf.cache("ledger", hit)
+        if not hit:
+            led = self._owners[key] = self._build(owner_id)
+        return led
+
+    def invalidate(self, owner_id: Any) -> None:
+        with self._lock:
+            self._owners.pop(_owner_key(owner_id), None)
+
+    # ---------- deltas ----------
+
+    def _in_step(self, name: str, change: Change) -> Optional[_OwnerLedger]:
+        # call with self._lock held; the owner's ledger if `change` follows on from it
+        key = _owner_key(change.owner_id)
+        led = self._owners.get(key)
+        if led is None:
+            return None
+        if led.versions.get(name) != change.version_before:
+            # out of step: the next read rebuilds this owner
+            self._owners.pop(key, None)
+            return None
+        return led
+
+    def _on_fees(self, change: Change) -> None:
+        with self._lock:
+            led = self._in_step("fees", change)
+            if led is None:
+                return
+            for rows, sign in ((change.before, -1), (change.after, 1)):
+                pay = _payments(rows)
+                if pay.empty:
+                    continue
+                _add(led.paid, pay.groupby("student_id")["amount"].sum(), sign)
+                by_month = pay.groupby("month")["amount"]
+                _add(led.collected, by_month.sum(), sign)
+                for month, n in by_month.size().items():
+                    led.payments[month] = led.payments.get(month, 0) + sign * int(n)
+                    if led.payments[month] <= 0:
+                        led.payments.pop(month)
+            led.versions["fees"] = change.version_after
+            led._balances = None
+
+    def _on_bookings(self, change: Change) -> None:
+        with self._lock:
+            led = self._in_step("bookings", change)
+            if led is None:
+                return
+            gone = change.before["id"].dropna().astype("int64") \
+                if change.before is not None and "id" in change.before.columns else []
+            came = _charges(change.after, led.room_price).set_index("id")
+            charges = led.charges.drop(index=list(gone), errors="ignore")
+            led.charges = pd.concat([charges, came]) if not came.empty else charges
+            led.versions["bookings"] = change.version_after
+            led._balances = None
+
+    def _on_rooms(self, change: Change) -> None:
+        # only a room's price matters here, so the occupancy tracker's
+        # "occupied" writes (one per booking write) cost a version bump
+        with self._lock:
+            led = self._in_step("rooms", change)
+            if led is None:
+                return
+            gone = set(change.before["id"].dropna().astype("int64").tolist()) \
+                if change.before is not None and "id" in change.before.columns else set()
+            price = _room_prices(change.after)
+            repriced = any(rid in led.room_price and led.room_price[rid] != p for rid, p in price.items())
+            if repriced or gone - set(price):
+                # a room's type changed or it was deleted: re-charge from scratch
+                self._owners.pop(_owner_key(change.owner_id), None)
+                return
+            led.room_price.update(price)   # new rooms have no bookings yet
+            led.versions["rooms"] = change.version_after
+
+    # ---------- reads ----------
+
+    def balances(self, owner_id: Any) -> pd.DataFrame:
+        """student_id, charged, paid, balance (positive = owes) for every student with either."""
+        with self._lock:
+            return self._current(owner_id).balances().copy()
+
+    def balance(self, owner_id: Any, student_id: int) -> float:
+        b = self.balances(owner_id)
+        hit = b.loc[b["student_id"] == int(student_id), "balance"]
+        return float(hit.iloc[0]) if not hit.empty else 0.0
+
+    def collections(self, owner_id: Any) -> pd.DataFrame:
+        """Payments received per calendar month, oldest first."""
+        with self._lock:
+            led = self._current(owner_id)
+            df = pd.DataFrame({"amount": pd.Series(led.collected, dtype="float64"),
+                               "payments": pd.Series(led.payments, dtype="int64")}).fillna(0)
+        df.index.name = "month"
+        df["payments"] = df["payments"].astype("int64")
+        return df.sort_index().reset_index().reindex(columns=COLLECTION_COLUMNS)
+
+    def overdue(self, owner_id: Any, as_of: Any = None, grace_days: int = GRACE_DAYS) -> pd.DataFrame:
+        """
+        Students whose payments don't cover their charges. Payments settle
+        the oldest bookings first; `due_since` is the start of the first
+        booking left unpaid, and it counts once `grace_days` have passed.
+        """
+        today = int((np.datetime64(pd.Timestamp(as_of or date.today()).date(), "D") - _EPOCH).astype("int64"))
+        with self._lock:
+            led = self._current(owner_id)
+            charges, paid = led.charges, dict(led.paid)
+            bal = led.balances()
+        if charges.empty:
+            return pd.DataFrame(columns=OVERDUE_COLUMNS)
+        c = charges.sort_values(["student_id", "due"])
+        owed_so_far = c.groupby("student_id")["charge"].cumsum()
+        unpaid = c[owed_so_far > c["student_id"].map(paid).fillna(0) + 0.005]
+        first = unpaid.groupby("student_id")["due"].min()
+        first = first[first + grace_days <= today]
+        if first.empty:
+            return pd.DataFrame(columns=OVERDUE_COLUMNS)
+        out = bal.set_index("student_id").loc[first.index, ["balance"]]
+        out["due_since"] = (first.to_numpy() + _EPOCH).astype("datetime64[D]").astype(str)
+        out["days_overdue"] = (today - first).astype("int64").to_numpy()
+        return out.reset_index().sort_values("days_overdue", ascending=False, ignore_index=True) \
+            .reindex(columns=OVERDUE_COLUMNS)
+
+
+ledger = FeeLedger(fees_store, bookings_store, rooms_store)
@@ -0,0 +1,219 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+from .data_store import Change, _owner_key
+from .booking_service import bookings_store
+from .availability_service import _day
+from ..utils import perf
+
+log = logging.getLogger(__name__)
+
+# Seconds between ticks of the in-process scheduler; 0 switches it off.
+INTERVAL_ENV = "HOSTEL_LIFECYCLE_INTERVAL"
+INTERVAL = 60
+# Bookings written elsewhere (another server, a CLI import) are picked up by a
+# full re-read this often, besides the per-tick version check of known owners.
+RESYNC_EVERY = 3600
+BATCH_SIZE = 1000
+
+
+def _days(dates: pd.Series) -> List[int]:
+    return dates.to_numpy("datetime64[D]").astype("int64").tolist()
+
+
+def _today() -> int:
+    return _day(pd.Timestamp.today())
+
+
+class BookingLifecycle:
+    """
+    Completes ACTIVE bookings once their end_date has passed.
+
+    Active bookings sit in a min-heap of (end day, owner, booking id), fed by
+    the store's change events, so a tick only pops what is due instead of
+    scanning every booking. Due ids are re-checked against the store under
+    the owner's bookings lock and flipped to "completed" with one
+    upsert_many per batch; the occupancy tracker then adjusts just the rooms
+    those bookings held. Heap entries are hints: a booking edited since it
+    was pushed is skipped, and its new end_date has its own entry.
+
+    Nothing is persisted besides the bookings themselves, so a tick is
+    idempotent and a restart resumes by re-reading the active bookings once.
+    """
+
+    def __init__(self, bookings, batch_size: int = BATCH_SIZE, resync_every: float = RESYNC_EVERY):
+        self.bookings = bookings
+        self.batch_size = batch_size
+        self.resync_every = resync_every
+        self._heap: List[Tuple[int, str, int]] = []
+        self._owners: Dict[str, Any] = {}
+        self._versions: Dict[str, int] = {}
+        self._synced_at: Optional[float] = None
+        # _lock guards the heap and is never held while calling the store
+        # (change events arrive under the store's write lock); _tick_lock
+        # lets one tick or sync run at a time
+        self._lock = threading.Lock()
+        self._tick_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        bookings.subscribe(self.on_bookings_change)
+
+    # ---------- index ----------
+
+    def _push(self, owner_id: Any, rows: pd.DataFrame) -> None:
+        """Add the active rows' end days to the heap. Call under `_lock`."""
+        if rows.empty or not {"id", "status", "end_date"} <= set(rows.columns):
+            return
+        active = rows[(rows["status"] == "active") & rows["end_date"].notna() & rows["id"].notna()]
+        key = _owner_key(owner_id)
+        self._owners[key] = owner_id.item() if hasattr(owner_id, "item") else owner_id  # plain int, not numpy
+        for day, bid in zip(_days(active["end_date"]), active["id"].astype("int64").tolist()):
+            heapq.heappush(self._heap, (day, key, bid))
+
+    def on_bookings_change(self, change: Change) -> None:
+        with self._lock:
+            if self._synced_at is None:
+                return  # not tracking yet; the first sync reads everything
+            key = _owner_key(change.owner_id)
+            if self._versions.get(key) == change.version_before:
+                self._versions[key] = change.version_after
+            self._push(change.owner_id, change.after)
+
+    def _sync_owner(self, owner_id: Any) -> None:
+        version = self.bookings.version_for_owner(owner_id)
+        active = self.bookings.list_for_owner(owner_id, status="active")
+        key = _owner_key(owner_id)
+        with self._lock:
+            # replace the owner's entries rather than piling up copies
+            self._heap = [e for e in self._heap if e[1] != key]
+            heapq.heapify(self._heap)
+            self._push(owner_id, active)
+            self._versions[key] = version
+
+    @perf.timed("lifecycle.sync")
+    def sync(self) -> None:
+        """Rebuild the heap from every active booking (startup, then every `resync_every`)."""
+        with self._lock:
+            # writes from here on are pushed as they happen; doubles are harmless
+            self._synced_at = time.monotonic()
+            self._heap, self._versions = [], {}
+        active = self.bookings.list_all()
+        active = active[active["status"] == "active"] if "status" in active.columns else active.iloc[0:0]
+        owners = {}
+        for owner_id, rows in active.groupby("owner_id", sort=False):
+            owners[owner_id] = self.bookings.version_for_owner(owner_id)
+            with self._lock:
+                self._push(owner_id, rows)
+        with self._lock:
+            for owner_id, version in owners.items():
+                self._versions.setdefault(_owner_key(owner_id), version)
+
+    def _catch_up(self) -> None:
+        """Re-read owners whose bookings changed without this process seeing the write."""
+        with self._lock:
+            known = [(owner_id, self._versions.get(key)) for key, owner_id in self._owners.items()]
+        for owner_id, version in known:
+            if self.bookings.version_for_owner(owner_id) != version:
+                self._sync_owner(owner_id)
+
+    # ---------- ticks ----------
+
+    @perf.timed("lifecycle.tick")
+    def tick(self, today: Any = None) -> Dict[Any, int]:
+        """Complete every active booking that ended before `today` (default: now).
+
+        Returns {owner_id: bookings completed}; owners with none are left out.
+        """
+        day = _today() if today is None else _day(today)
+        with self._tick_lock:
+            if self._synced_at is None or time.monotonic() - self._synced_at >= self.resync_every:
+                self.sync()
+            else:
+                self._catch_up()
+            due: Dict[str, List[int]] = {}
+            with self._lock:
+                while self._heap and self._heap[0][0] < day:
+                    _, key, bid = heapq.heappop(self._heap)
+                    due.setdefault(key, []).append(bid)
+                owners = {key: self._owners[key] for key in due}
+
+            done = {}
+            try:
+                for key, ids in due.items():
+                    n = self._complete(owners[key], ids, day)
+                    if n:
+                        done[owners[key]] = n
+            except Exception:
+                # the popped entries are gone: re-read everything next tick
+                self._synced_at = None
+                raise
+            return done
+
+    def _complete(self, owner_id: Any, ids: List[int], day: int) -> int:
+        """Flip the still-active, still-expired bookings among `ids` to completed."""
+        with self.bookings.lock_for_owner(owner_id):
+            active = self.bookings.list_for_owner(owner_id, status="active")
+            rows = active[active["id"].isin(ids) & active["end_date"].notna()]
+            expired = rows.loc[[d < day for d in _days(rows["end_date"])], "id"].astype("int64").tolist()
+            for i in range(0, len(expired), self.batch_size):
+                self.bookings.upsert_many(
+                    pd.DataFrame({"id": expired[i:i + self.batch_size], "status": "completed"}), owner_id=owner_id,
+                )
+        return len(expired)
+
+    # ---------- background thread ----------
+
+    def start(self, interval: float = INTERVAL) -> bool:
+        """Tick every `interval` seconds on a daemon thread (once per process).
+
+        Returns False if it was already running or `interval` is 0.
+        """
+        with self._lock:
+            if not interval or (self._thread is not None and self._thread.is_alive() and not self._stop.is_set()):
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="booking-lifecycle", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                done = self.tick()
+                if done:
+                    log.info("completed %d expired booking(s) for %d owner(s)", sum(done.values()), len(done))
+            except Exception:
+                # the next tick retries; every step is safe to repeat
+                log.exception("booking lifecycle tick failed")
+            self._stop.wait(interval)
+
+
+lifecycle = BookingLifecycle(bookings_store)
+
+
+def start_background(interval: Optional[float] = None) -> bool:
+    """Start the in-process scheduler unless HOSTEL_LIFECYCLE_INTERVAL=0."""
+    if interval is None:
+        interval = float(os.environ.get(INTERVAL_ENV, INTERVAL))
+    return lifecycle.start(interval)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Complete bookings whose end date has passed.")
+    parser.add_argument("--once", action="store_true", help="run one tick and exit")
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="seconds between ticks")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if args.once:
+        done = lifecycle.tick()
+        print(f"completed {sum(done.values())} booking(s) for {len(done)} owner(s)")
+    else:
+        lifecycle._run(args.interval)
@@ -0,0 +1,113 @@
+import threading
+from typing import Any, Dict, List
+from .data_store import Change, _owner_key
+from .student_service import students_store
+from .room_service import rooms_store
+from ..utils.lookup import id_to_label
+from ..utils import perf
+
+
+class LabelLookup:
+    """
+    Per-owner id→label (and label→ids) maps for one store column, shared by
+    every session. Built once per owner with a vectorized zip, then kept
+    current by applying each write's changed rows; an owner whose writes
+    were missed (another process) is rebuilt on next use.
+    """
+
+    def __init__(self, store, label_col: str, id_col: str = "id"):
+        self.store = store
+        self.label_col = label_col
+        self.id_col = id_col
+        self._labels: Dict[str, Dict[int, str]] = {}
+        self._versions: Dict[str, int] = {}
+        self._reverse: Dict[str, Dict[str, List[int]]] = {}
+        self._lock = threading.RLock()
+        self._cache_name = f"labels:{store.filename}"
+        store.subscribe(self.on_change)
+
+    def _build(self, owner_id: Any) -> Dict[int, str]:
+        key = _owner_key(owner_id)
+        version = self.store.version_for_owner(owner_id)
+        labels = id_to_label(self.store.list_for_owner(owner_id), self.id_col, self.label_col)
+        self._reverse.pop(key, None)
+        if self.store.version_for_owner(owner_id) == version:
+            self._labels[key] = labels
+            self._versions[key] = version
+        return labels
+
+    def _current(self, owner_id: Any) -> Dict[int, str]:
+        # call with self._lock held
+        key = _owner_key(owner_id)
+        hit = key in self._labels and self._versions.get(key) == self.store.version_for_owner(owner_id)
+        perf.cache(self._cache_name, hit)
+        return self._labels[key] if hit else self._build(owner_id)
+
+    def labels(self, owner_id: Any, at=None) -> Dict[int, str]:
+        """id → label for one owner (a copy; safe to mutate). With `at` (an
+        OwnerSnapshot holding this store's table) the labels match that
+        snapshot rather than the store's latest rows."""
+        pinned = at.of(self.store) if at is not None else None
+        with self._lock:
+            if pinned is None:
+                return dict(self._current(owner_id))
+            key = _owner_key(owner_id)
+            frame, version = pinned
+            if key in self._labels and self._versions.get(key) == version:
+                return dict(self._labels[key])
+            return id_to_label(frame, self.id_col, self.label_col)
+
+    def label(self, owner_id: Any, _id: int, default: str = "") -> str:
+        with self._lock:
+            return self._current(owner_id).get(int(_id), default)
+
+    def _reverse_map(self, owner_id: Any) -> Dict[str, List[int]]:
+        # call with self._lock held
+        key = _owner_key(owner_id)
+        labels = self._current(owner_id)
+        rev = self._reverse.get(key) if labels is self._labels.get(key) else None
+        if rev is None:
+            rev = {}
+            for i, l in labels.items():
+                rev.setdefault(l, []).append(i)
+            if labels is self._labels.get(key):
+                self._reverse[key] = rev
+        return rev
+
+    def reverse(self, owner_id: Any) -> Dict[str, List[int]]:
+        """label → ids for one owner (labels such as names need not be unique)."""
+        with self._lock:
+            return {l: list(ids) for l, ids in self._reverse_map(owner_id).items()}
+
+    def ids_for(self, owner_id: Any, label: str) -> List[int]:
+        with self._lock:
+            return list(self._reverse_map(owner_id).get(str(label), ()))
+
+    def on_change(self, change: Change) -> None:
+        key = _owner_key(change.owner_id)
+        with self._lock:
+            labels = self._labels.get(key)
+            if labels is None or self._versions.get(key) != change.version_before:
+                # not cached or out of step: drop it, the next read rebuilds
+                self._labels.pop(key, None)
+                self._versions.pop(key, None)
+                self._reverse.pop(key, None)
+                return
+            rev = self._reverse.get(key)
+            if change.before is not None and self.id_col in change.before:
+                for i in change.before[self.id_col].dropna().astype("int64").tolist():
+                    old = labels.pop(i, None)
+                    if rev is not None and old is not None and i in rev.get(old, ()):
+                        rev[old].remove(i)
+                        if not rev[old]:
+                            del rev[old]
+            added = id_to_label(change.after, self.id_col, self.label_col)
+            labels.update(added)
+            if rev is not None:
+                for i, l in added.items():
+                    rev.setdefault(l, []).append(i)
+            self._versions[key] = change.version_after
+
+
+student_labels = LabelLookup(students_store, "name")
+room_labels = LabelLookup(rooms_store, "room_no")
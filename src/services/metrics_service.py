@@ -0,0 +1,246 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+import pandas as pd
+from .data_store import Change, _owner_key
+from .student_service import students_store
+from .room_service import rooms_store
+from .booking_service import bookings_store
+from .snapshot_service import load_snapshot
+from . import occupancy_service
+from .occupancy_service import _in_house
+from ..utils import perf
+
+RECENT_N = 5
+# rows kept per ring buffer, so a few deletes don't force a refill from disk
+RECENT_KEEP = 4 * RECENT_N
+
+
+@dataclass(frozen=True)
+class DashboardSummary:
+    total_students: int
+    total_rooms: int
+    active_bookings: int
+    vacant_beds: int
+    vacancy_by_type: Dict[str, int]
+    recent_students: pd.DataFrame
+    recent_bookings: pd.DataFrame
+
+
+def _ids(df: Optional[pd.DataFrame]) -> List[int]:
+    if df is None or df.empty or "id" not in df.columns:
+        return []
+    return df["id"].dropna().astype("int64").tolist()
+
+
+def _int(value: Any) -> int:
+    return 0 if pd.isna(value) else int(value)
+
+
+def _records(df: Optional[pd.DataFrame]) -> List[Dict[str, Any]]:
+    if df is None or df.empty or "id" not in df.columns:
+        return []
+    return df[df["id"].notna()].to_dict("records")
+
+
+def _active_rooms(df: Optional[pd.DataFrame], day: int) -> List[int]:
+    """room_id of every booking in `df` in house on `day` (one entry per booking)."""
+    if df is None or df.empty or not {"room_id", "status"} <= set(df.columns):
+        return []
+    return df.loc[_in_house(df, day), "room_id"].astype("int64").tolist()
+
+
+def _n_active(df: Optional[pd.DataFrame]) -> int:
+    """ACTIVE bookings in `df`, current or still to come."""
+    if df is None or df.empty or "status" not in df.columns:
+        return 0
+    return int((df["status"] == "active").sum())
+
+
+@dataclass
+class _Ring:
+    """The last RECENT_KEEP rows of a table, in insertion order (id -> row)."""
+    rows: "OrderedDict[int, Dict[str, Any]]" = field(default_factory=OrderedDict)
+    short: bool = False  # deletes left fewer rows than the table could show
+
+    def apply(self, removed: Iterable[int], changed: List[Dict[str, Any]], total: int) -> None:
+        for i in removed:
+            self.rows.pop(i, None)
+        for row in changed:
+            # an update keeps its place, an insert goes last
+            self.rows[int(row["id"])] = row
+            if len(self.rows) > RECENT_KEEP:
+                self.rows.popitem(last=False)
+        self.short = len(self.rows) < min(RECENT_N, total)
+
+    def frame(self, columns: List[str]) -> pd.DataFrame:
+        rows = list(self.rows.values())[-RECENT_N:]
+        return pd.DataFrame(rows, columns=columns)
+
+
+@dataclass
+class _OwnerMetrics:
+    versions: Dict[str, int] = field(default_factory=dict)
+    day: int = 0                                            # `active` is as of this day
+    students: int = 0
+    room_type: Dict[int, str] = field(default_factory=dict)
+    room_cap: Dict[int, int] = field(default_factory=dict)
+    active: Dict[int, int] = field(default_factory=dict)   # bookings in house per room
+    bookings: int = 0
+    active_bookings: int = 0
+    vacant_by_type: Dict[str, int] = field(default_factory=dict)
+    recent_students: _Ring = field(default_factory=_Ring)
+    recent_bookings: _Ring = field(default_factory=_Ring)
+
+    def vacant(self, rid: int) -> int:
+        if rid not in self.room_cap:
+            return 0
+        return max(self.room_cap[rid] - self.active.get(rid, 0), 0)
+
+    def retally(self, rids: Iterable[int], mutate) -> None:
+        """Run `mutate()` and move the touched rooms' vacancy between type totals."""
+        rids = set(rids)
+        for rid in rids:
+            if rid in self.room_type:
+                t = self.room_type[rid]
+                self.vacant_by_type[t] = self.vacant_by_type.get(t, 0) - self.vacant(rid)
+        mutate()
+        for rid in rids:
+            if rid in self.room_type:
+                t = self.room_type[rid]
+                self.vacant_by_type[t] = self.vacant_by_type.get(t, 0) + self.vacant(rid)
+
+
+class DashboardMetrics:
+    """
+    Materialized per-owner dashboard figures: student / room / active
+    booking counts, beds vacant today in total and per room type (rebuilt
+    when the day rolls over), and the most
+    recent students and bookings. Every write to those stores is applied as
+    a delta; reads only compare versions. An owner whose writes were missed
+    (another process) is rebuilt from the tables, as is a recent-rows
+    buffer emptied by deletes. `rebuild` recounts one owner from scratch and
+    reports what had drifted.
+    """
+
+    def __init__(self, students, rooms, bookings):
+        self.stores = {"students": students, "rooms": rooms, "bookings": bookings}
+        self._owners: Dict[str, _OwnerMetrics] = {}
+        self._lock = threading.RLock()
+        students.subscribe(lambda c: self._apply("students", c))
+        rooms.subscribe(lambda c: self._apply("rooms", c))
+        bookings.subscribe(lambda c: self._apply("bookings", c))
+
+    # ---------- building ----------
+
+    def _versions(self, owner_id: Any) -> Dict[str, int]:
+        return {name: store.version_for_owner(owner_id) for name, store in self.stores.items()}
+
+    @perf.timed("dashboard.build")
+    def _build(self, owner_id: Any) -> _OwnerMetrics:
+        snap = load_snapshot(owner_id, stores=self.stores)
+        students, rooms, bookings = snap["students"], snap["rooms"], snap["bookings"]
+        m = _OwnerMetrics(versions=snap.versions, day=occupancy_service._today())
+        m.students = len(_ids(students))
+        for row in _records(rooms):
+            rid = int(row["id"])
+            m.room_type[rid] = str(row.get("type", ""))
+            m.room_cap[rid] = _int(row.get("capacity"))
+        for rid in _active_rooms(bookings, m.day):
+            m.active[rid] = m.active.get(rid, 0) + 1
+        m.bookings = len(_ids(bookings))
+        m.active_bookings = _n_active(bookings)
+        for rid, t in m.room_type.items():
+            m.vacant_by_type[t] = m.vacant_by_type.get(t, 0) + m.vacant(rid)
+        m.recent_students.apply([], _records(students.tail(RECENT_KEEP)), m.students)
+        m.recent_bookings.apply([], _records(bookings.tail(RECENT_KEEP)), m.bookings)
+        return m
+
+    def _current(self, owner_id: Any) -> _OwnerMetrics:
+        # call with self._lock held
+        key = _owner_key(owner_id)
+        m = self._owners.get(key)
+        stale = m is None or m.versions != self._versions(owner_id) \
+            or m.day != occupancy_service._today() \
+            or m.recent_students.short or m.recent_bookings.short
+        perf.cache("dashboard", not stale)
+        if stale:
+            m = self._owners[key] = self._build(owner_id)
+        return m
+
+    # ---------- deltas ----------
+
+    def _apply(self, name: str, change: Change) -> None:
+        key = _owner_key(change.owner_id)
+        with self._lock:
+            m = self._owners.get(key)
+            if m is None:
+                return
+            if m.versions.get(name) != change.version_before:
+                # out of step: the next read rebuilds this owner
+                self._owners.pop(key, None)
+                return
+            before, after = set(_ids(change.before)), set(_ids(change.after))
+            removed = before - after
+            if name == "students":
+                m.students += len(after - before) - len(removed)
+                m.recent_students.apply(removed, _records(change.after), m.students)
+            elif name == "rooms":
+                def mutate():
+                    for rid in removed:
+                        m.room_type.pop(rid, None)
+                        m.room_cap.pop(rid, None)
+                    for row in _records(change.after):
+                        rid = int(row["id"])
+                        m.room_type[rid] = str(row.get("type", ""))
+                        m.room_cap[rid] = _int(row.get("capacity"))
+                m.retally(before | after, mutate)
+            else:
+                gone, came = _active_rooms(change.before, m.day), _active_rooms(change.after, m.day)
+
+                def mutate():
+                    for rid in gone:
+                        m.active[rid] = m.active.get(rid, 0) - 1
+                    for rid in came:
+                        m.active[rid] = m.active.get(rid, 0) + 1
+                m.retally(gone + came, mutate)
+                m.active_bookings += _n_active(change.after) - _n_active(change.before)
+                m.bookings += len(after - before) - len(removed)
+                m.recent_bookings.apply(removed, _records(change.after), m.bookings)
+            m.versions[name] = change.version_after
+
+    # ---------- reads ----------
+
+    def summary(self, owner_id: Any) -> DashboardSummary:
+        with self._lock:
+            m = self._current(owner_id)
+            return DashboardSummary(
+                total_students=m.students,
+                total_rooms=len(m.room_cap),
+                active_bookings=m.active_bookings,
+                vacant_beds=sum(m.vacant_by_type.values()),
+                vacancy_by_type=dict(m.vacant_by_type),
+                recent_students=m.recent_students.frame(self.stores["students"].columns),
+                recent_bookings=m.recent_bookings.frame(self.stores["bookings"].columns),
+            )
+
+    def rebuild(self, owner_id: Any) -> List[str]:
+        """Recount one owner from the tables; returns the figures that had drifted."""
+        with self._lock:
+            key = _owner_key(owner_id)
+            old = self._owners.get(key)
+            fresh = self._owners[key] = self._build(owner_id)
+            if old is None:
+                return []
+            drift = []
+            for attr in ("students", "bookings", "active_bookings", "room_cap", "active", "vacant_by_type"):
+                a, b = getattr(old, attr), getattr(fresh, attr)
+                if attr == "active":
+                    a, b = {k: v for k, v in a.items() if v}, {k: v for k, v in b.items() if v}
+                if a != b:
+                    drift.append(attr)
+            return drift
+
+
+metrics = DashboardMetrics(students_store, rooms_store, bookings_store)
@@ -0,0 +1,156 @@
+import threading
+from typing import Any, Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+from .data_store import Change, _owner_key
+from .booking_service import bookings_store
+from .room_service import rooms_store
+from ..utils import perf
+
+
+def _today() -> int:
+    """Today as days since the epoch."""
+    return int(np.datetime64(pd.Timestamp.today().date(), "D").astype("int64"))
+
+
+def _days(col: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_datetime64_any_dtype(col):
+        col = pd.to_datetime(col, errors="coerce")
+    return col.to_numpy("datetime64[D]")
+
+
+def _in_house(bookings: pd.DataFrame, day: int) -> pd.Series:
+    """ACTIVE bookings whose stay [start_date, end_date) covers `day`, the same
+    half-open ranges as the booking calendar (a same-day stay holds its day).
+    A missing date leaves that side open."""
+    mask = (bookings["status"] == "active") & bookings["room_id"].notna()
+    if "start_date" in bookings.columns and "end_date" in bookings.columns:
+        start, end = _days(bookings["start_date"]), _days(bookings["end_date"])
+        today = np.datetime64(day, "D")
+        end = np.where(np.isnat(start) | np.isnat(end), end, np.maximum(end, start + np.timedelta64(1, "D")))
+        mask &= (np.isnat(start) | (start <= today)) & (np.isnat(end) | (end > today))
+    return mask
+
+
+def _active_per_room(bookings: pd.DataFrame, day: Optional[int] = None) -> pd.Series:
+    """Count bookings occupying a bed on `day` (default today) per room_id
+    (index: room_id, values: count). A reservation starting later doesn't."""
+    if bookings is None or bookings.empty or "room_id" not in bookings.columns or "status" not in bookings.columns:
+        return pd.Series(dtype="int64")
+    day = _today() if day is None else day
+    return bookings.loc[_in_house(bookings, day), "room_id"].astype("int64").value_counts()
+
+
+class OccupancyTracker:
+    """
+    Keeps rooms.occupied in step with ACTIVE bookings whose stay covers today.
+
+    Holds a per-owner {room_id: bookings in house} counter for one day in
+    memory and applies each booking write as a delta (create, status change,
+    room move, date change, delete), persisting only the room rows whose
+    occupancy changed. If a write happened that this process didn't see
+    (another server process, a restart), or the day has rolled over, the
+    owner's counters are rebuilt from the bookings first; a rollover also
+    persists every room whose stays began or ended. `recompute` is the full
+    verify/repair pass.
+    """
+
+    def __init__(self, rooms, bookings):
+        self.rooms = rooms
+        self.bookings = bookings
+        self._counts: Dict[str, Dict[int, int]] = {}
+        self._versions: Dict[str, int] = {}
+        self._days: Dict[str, int] = {}
+        self._locks: Dict[str, threading.RLock] = {}
+        self._registry_lock = threading.Lock()
+        bookings.subscribe(self.on_bookings_change)
+
+    def _lock(self, owner_id: Any) -> threading.RLock:
+        # one lock per owner: hostels update their counters independently
+        with self._registry_lock:
+            return self._locks.setdefault(_owner_key(owner_id), threading.RLock())
+
+    def _build(self, owner_id: Any, day: int) -> Dict[int, int]:
+        """Count one owner's bookings in house on `day` from scratch."""
+        while True:
+            version = self.bookings.version_for_owner(owner_id)
+            counts = _active_per_room(self.bookings.list_for_owner(owner_id), day)
+            if self.bookings.version_for_owner(owner_id) == version:
+                break
+        key = _owner_key(owner_id)
+        self._counts[key] = {int(rid): int(n) for rid, n in counts.items()}
+        self._versions[key] = version
+        self._days[key] = day
+        return self._counts[key]
+
+    def counts(self, owner_id: Any) -> Dict[int, int]:
+        """Bookings in house today per room for one owner."""
+        key = _owner_key(owner_id)
+        day = _today()
+        with self._lock(owner_id):
+            if key not in self._counts or self._versions.get(key) != self.bookings.version_for_owner(owner_id):
+                self._build(owner_id, day)
+            elif self._days.get(key) != day:
+                # stays began or ended overnight: move rooms.occupied along too
+                self._persist(owner_id, None, self._build(owner_id, day))
+            return dict(self._counts[key])
+
+    @perf.timed("occupancy.delta")
+    def on_bookings_change(self, change: Change) -> None:
+        key = _owner_key(change.owner_id)
+        day = _today()
+        with self._lock(change.owner_id):
+            before = _active_per_room(change.before, day)
+            after = _active_per_room(change.after, day)
+            touched = before.index.union(after.index)
+            counts = self._counts.get(key)
+            if counts is not None and self._versions.get(key) == change.version_before \
+                    and self._days.get(key) == day:
+                delta = after.sub(before, fill_value=0)
+                for rid, d in delta[delta != 0].items():
+                    counts[int(rid)] = counts.get(int(rid), 0) + int(d)
+                self._versions[key] = change.version_after
+            else:
+                # missed writes, a new day (or first use): the store already
+                # holds this change, so a rebuild includes it
+                rolled = counts is not None and self._days.get(key) != day
+                counts = self._build(change.owner_id, day)
+                if rolled:
+                    touched = None
+            self._persist(change.owner_id, touched, counts)
+
+    def _persist(self, owner_id: Any, room_ids: Iterable[int], counts: Dict[int, int]) -> int:
+        """Write occupied = min(bookings in house, capacity) for the given rooms
+        (None: all) where it changed."""
+        rooms = self.rooms.list_for_owner(owner_id)
+        if rooms.empty:
+            return 0
+        rooms = rooms[rooms["id"].isin(list(room_ids))] if room_ids is not None else rooms
+        if rooms.empty:
+            return 0
+        ids = rooms["id"].astype("int64")
+        capacity = rooms["capacity"].fillna(0).astype("int64")
+        active = ids.map(counts).fillna(0).astype("int64")
+        occupied = active.clip(upper=capacity).clip(lower=0)
+        current = rooms["occupied"].fillna(-1).astype("int64")
+        changed = occupied != current
+        if not changed.any():
+            return 0
+        self.rooms.upsert_many(
+            pd.DataFrame({"id": ids[changed].to_numpy(), "occupied": occupied[changed].to_numpy()}),
+            owner_id=owner_id,
+        )
+        return int(changed.sum())
+
+    @perf.timed("occupancy.recompute")
+    def recompute(self, owner_id: Any) -> int:
+        """Verify/repair: rebuild the owner's counters and fix every room row that drifted.
+
+        Returns the number of rooms corrected.
+        """
+        with self._lock(owner_id), self.rooms.lock_for_owner(owner_id):
+            counts = self._build(owner_id, _today())
+            return self._persist(owner_id, None, counts)
+
+
+occupancy = OccupancyTracker(rooms_store, bookings_store)
@@ -1,6 +1,30 @@
 
-from .data_store import CSVStore
+from dataclasses import dataclass
+from typing import Dict
+from .storage import open_store
+from ..utils.schema import Schema, ID, INT, TEXT, CATEGORY
 
-ROOM_COLUMNS = ["id","owner_id", "room_no", "type", "capacity", "occupied"]
+ROOM_SCHEMA = Schema({
+    "id": ID, "owner_id": ID, "room_no": TEXT, "type": CATEGORY, "capacity": INT, "occupied": INT,
+})
+ROOM_COLUMNS = ROOM_SCHEMA.columns
+
+
+@dataclass(frozen=True)
+class RoomType:
+    """Beds and fee (per 6 months) of one kind of room."""
+    capacity: int
+    price: int
+
+
+# The one place room kinds are defined; templates, prices and capacities all read from here
+ROOM_TYPES: Dict[str, RoomType] = {
+    "Double": RoomType(capacity=2, price=50000),
+    "Triple": RoomType(capacity=3, price=40000),
+}
+TYPE_PRICE = {name: t.price for name, t in ROOM_TYPES.items()}  # per 6 months
+TYPE_CAPACITY = {name: t.capacity for name, t in ROOM_TYPES.items()}
+
+rooms_store = open_store("rooms.csv", ROOM_SCHEMA, id_col="id", indexes=[("owner_id",)],
+                          append_only=True, partitioned=True, binary_snapshot=True)
 
-rooms_store = CSVStore("rooms.csv", ROOM_COLUMNS, id_col="id")
@@ -0,0 +1,325 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import Counter
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import pandas as pd
+from .data_store import Change, _owner_key
+from .student_service import students_store
+from ..utils import perf
+
+TOP_K = 10
+# Most ids a query scores; candidates are taken exact matches first, then
+# prefix matches in token order, so a one-letter query stays cheap.
+MAX_CANDIDATES = 500
+# A word matching more students than this is too common to intersect on.
+COMMON = 10 * MAX_CANDIDATES
+# Typos are looked for in words of at least FUZZY_MIN_LEN letters: one edit
+# (a wrong, missing, extra or swapped letter), two from FUZZY_TWO_EDITS on.
+FUZZY_MIN_LEN = 4
+FUZZY_TWO_EDITS = 7
+FUZZY_TOKENS = 50
+
+_WORD = re.compile(r"[a-z0-9]+")
+_PHONEISH = re.compile(r"^[+\d()\-]+$")
+
+
+def _grams(token: str) -> Set[str]:
+    """Bigrams with start/end markers: "jon" -> {"^j", "jo", "on", "n$"}."""
+    t = f"^{token}$"
+    return {t[i:i + 2] for i in range(len(t) - 1)}
+
+
+def _fuzzy(token: str) -> bool:
+    """Words get typo matching; numbers, emails and ids-in-emails don't."""
+    return token.isalpha()
+
+
+def _edits(a: str, b: str, limit: int) -> int:
+    """Edit distance with adjacent swaps (optimal string alignment), or
+    limit + 1 once it is certainly above `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _typo_score(term: str, token: str) -> float:
+    """0.75 for one edit, 0.5 for two, else 0. A token longer than the term is
+    also compared by its same-length prefix, so half-typed words match too
+    ("jhon" ~ "johnathan")."""
+    limit = 2 if len(term) >= FUZZY_TWO_EDITS else 1
+    d = min(_edits(term, t, limit) for t in {token, token[:len(term)]})
+    return 1.0 - 0.25 * d if d <= limit else 0.0
+
+
+def _doc_tokens(name: Any, email: Any, phone: Any, course: Any) -> Tuple[str, ...]:
+    out: Set[str] = set()
+    for text in (name, course, email):
+        if isinstance(text, str):
+            out.update(_WORD.findall(text.lower()))
+    if isinstance(email, str) and email.strip():
+        out.add(email.strip().lower())          # "john.s@..." prefixes the whole address
+    if isinstance(phone, str):
+        digits = re.sub(r"\D", "", phone)
+        if digits:
+            out.add(digits)
+            if len(digits) > 10:
+                out.add(digits[-10:])           # without the country code
+    return tuple(out)
+
+
+def _terms(query: str) -> List[str]:
+    """Lower-cased query words; phone numbers are kept as digits, emails whole."""
+    terms: List[str] = []
+    for chunk in str(query or "").lower().split():
+        if _PHONEISH.match(chunk):
+            digits = re.sub(r"\D", "", chunk)
+            if digits:
+                terms.append(digits)
+        elif "@" in chunk:
+            terms.append(chunk)
+        else:
+            terms.extend(_WORD.findall(chunk))
+    return terms
+
+
+class _OwnerIndex:
+    """One owner's students: sorted distinct tokens (prefix ranges by bisect),
+    token -> ids postings, bigram -> tokens for typo matching, id -> tokens."""
+
+    __slots__ = ("tokens", "postings", "grams", "docs", "labels")
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.postings: Dict[str, Set[int]] = {}
+        self.grams: Dict[str, Set[str]] = {}
+        self.docs: Dict[int, Tuple[str, ...]] = {}
+        self.labels: Dict[int, str] = {}
+
+    def add(self, sid: int, tokens: Tuple[str, ...], label: str, sort: bool = True) -> None:
+        self.remove(sid)
+        self.docs[sid] = tokens
+        self.labels[sid] = label
+        for t in tokens:
+            ids = self.postings.get(t)
+            if ids is None:
+                self.postings[t] = {sid}
+                if sort:
+                    bisect.insort(self.tokens, t)
+                if _fuzzy(t):
+                    for g in _grams(t):
+                        self.grams.setdefault(g, set()).add(t)
+            else:
+                ids.add(sid)
+
+    def remove(self, sid: int) -> None:
+        self.labels.pop(sid, None)
+        for t in self.docs.pop(sid, ()):
+            ids = self.postings[t]
+            ids.discard(sid)
+            if ids:
+                continue
+            del self.postings[t]
+            i = bisect.bisect_left(self.tokens, t)
+            if i < len(self.tokens) and self.tokens[i] == t:
+                del self.tokens[i]
+            if _fuzzy(t):
+                for g in _grams(t):
+                    self.grams[g].discard(t)
+
+    def prefixed(self, term: str) -> Iterable[str]:
+        """Tokens starting with `term`, in order (the exact token first)."""
+        i = bisect.bisect_left(self.tokens, term)
+        while i < len(self.tokens) and self.tokens[i].startswith(term):
+            yield self.tokens[i]
+            i += 1
+
+    def similar(self, term: str) -> Dict[str, float]:
+        """Word tokens `term` is probably a typo of, with their typo score."""
+        if len(term) < FUZZY_MIN_LEN or not _fuzzy(term):
+            return {}
+        grams = _grams(term)
+        # a typo keeps at least a third of the bigrams (the bigram index only
+        # shortlists; the edit distance decides)
+        shared = Counter(t for g in grams for t in self.grams.get(g, ()))
+        need = max(1, len(grams) // 3)
+        scored = {t: _typo_score(term, t) for t, n in shared.items() if n >= need}
+        best = sorted((t for t, s in scored.items() if s), key=lambda t: (-scored[t], t))
+        return {t: scored[t] for t in best[:FUZZY_TOKENS]}
+
+
+def _label(row: Dict[str, Any]) -> str:
+    parts = [row.get(c) for c in ("name", "email", "phone")]
+    return " · ".join(str(p) for p in parts if isinstance(p, str) and p)
+
+
+def _rows(df: pd.DataFrame) -> Iterable[Tuple[int, Tuple[str, ...], str]]:
+    if df is None or df.empty or "id" not in df.columns:
+        return []
+    cols = {c: (df[c].tolist() if c in df.columns else [None] * len(df)) for c in ("name", "email", "phone", "course")}
+    ids = pd.to_numeric(df["id"], errors="coerce").tolist()
+    out = []
+    for i, sid in enumerate(ids):
+        if sid != sid:   # NaN id
+            continue
+        row = {c: cols[c][i] for c in cols}
+        out.append((int(sid), _doc_tokens(row["name"], row["email"], row["phone"], row["course"]), _label(row)))
+    return out
+
+
+class StudentSearch:
+    """
+    Type-ahead over one owner's students by name, email, phone and course.
+
+    Each owner's index is built once from the store and then kept current by
+    applying every student write's changed rows; an owner whose writes were
+    missed (another process) is rebuilt on next use. A query ranks students
+    that match every query word, exactly (3), by prefix (2) or, when fewer
+    than k students match that way, through a likely typo (0.75 or 0.5).
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._owners: Dict[str, _OwnerIndex] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        store.subscribe(self.on_change)
+
+    @perf.timed("search.build")
+    def _build(self, owner_id: Any) -> _OwnerIndex:
+        key = _owner_key(owner_id)
+        version = self.store.version_for_owner(owner_id)
+        index = _OwnerIndex()
+        for sid, tokens, label in _rows(self.store.list_for_owner(owner_id)):
+            index.add(sid, tokens, label, sort=False)
+        index.tokens = sorted(index.postings)
+        if self.store.version_for_owner(owner_id) == version:
+            self._owners[key] = index
+            self._versions[key] = version
+        return index
+
+    def _current(self, owner_id: Any) -> _OwnerIndex:
+        # call with self._lock held
+        key = _owner_key(owner_id)
+        hit = key in self._owners and self._versions.get(key) == self.store.version_for_owner(owner_id)
+        perf.cache("search", hit)
+        return self._owners[key] if hit else self._build(owner_id)
+
+    def on_change(self, change: Change) -> None:
+        key = _owner_key(change.owner_id)
+        with self._lock:
+            index = self._owners.get(key)
+            if index is None or self._versions.get(key) != change.version_before:
+                # not built or out of step: drop it, the next query rebuilds
+                self._owners.pop(key, None)
+                self._versions.pop(key, None)
+                return
+            if change.before is not None and "id" in change.before:
+                for sid in change.before["id"].dropna().astype("int64").tolist():
+                    index.remove(sid)
+            for sid, tokens, label in _rows(change.after):
+                index.add(sid, tokens, label)
+            self._versions[key] = change.version_after
+
+    @perf.timed("search.query")
+    def search(self, owner_id: Any, query: str, k: int = TOP_K) -> List[int]:
+        """Ids of the (at most) k students best matching `query`, best first."""
+        terms = _terms(query)
+        if not terms or k <= 0:
+            return []
+        with self._lock:
+            index = self._current(owner_id)
+            hits = self._score(index, self._candidates(index, terms, {}), terms, {})
+            if len(hits) < k:
+                # not enough exact/prefix matches: allow typos in any word
+                typos = {term: index.similar(term) for term in terms}
+                hits = self._score(index, self._candidates(index, terms, typos), terms, typos)
+            hits.sort(key=lambda h: (-h[0], index.labels.get(h[1], "").lower(), h[1]))
+            return [sid for _, sid in hits[:k]]
+
+    @staticmethod
+    def _candidates(index: _OwnerIndex, terms: List[str], typos: Dict[str, Dict[str, float]]) -> List[int]:
+        """Up to MAX_CANDIDATES ids that match every term."""
+        if len(terms) == 1 and not typos:
+            # one word: exact token first, then prefixes in order; stop when full
+            out: Dict[int, None] = {}
+            for token in index.prefixed(terms[0]):
+                for sid in index.postings[token]:
+                    out[sid] = None
+                    if len(out) >= MAX_CANDIDATES:
+                        return list(out)
+            return list(out)
+        # several words: intersect their id sets, smallest first. Words matching
+        # too many students ("a", "9") are left to _score, which checks every word
+        sets = []
+        for term in terms:
+            ids: Optional[Set[int]] = set()
+            for token in chain(index.prefixed(term), typos.get(term, ())):
+                ids |= index.postings[token]
+                if len(ids) > COMMON:
+                    ids = None
+                    break
+            if ids is not None:
+                sets.append(ids)
+        if not sets:
+            return StudentSearch._candidates(index, [max(terms, key=len)], {})
+        sets.sort(key=len)
+        return list(islice(sets[0].intersection(*sets[1:]), MAX_CANDIDATES))
+
+    @staticmethod
+    def _score(index: _OwnerIndex, candidates: Iterable[int], terms: List[str],
+               typos: Dict[str, Dict[str, float]]) -> List[Tuple[float, int]]:
+        hits = []
+        for sid in candidates:
+            tokens = index.docs.get(sid, ())
+            total = 0.0
+            for term in terms:
+                near = typos.get(term) or {}
+                best = 0.0
+                for t in tokens:
+                    if t == term:
+                        best = 3.0
+                        break
+                    if t.startswith(term):
+                        best = 2.0
+                    elif best < 1.0:
+                        best = max(best, near.get(t, 0.0))
+                if not best:
+                    break
+                total += best
+            else:
+                hits.append((total, sid))
+        return hits
+
+    def labels(self, owner_id: Any, ids: Iterable[int]) -> Dict[int, str]:
+        """"Name · email · phone" for the given ids (unknown ids are left out)."""
+        with self._lock:
+            index = self._current(owner_id)
+            return {int(i): index.labels[int(i)] for i in ids if int(i) in index.labels}
+
+    def choices(self, owner_id: Any, query: str, k: int = TOP_K) -> Dict[int, str]:
+        """{id: label} for a type-ahead picker: the k best matches for `query`,
+        or the first k students (by id) while it is empty."""
+        ids: Optional[List[int]] = self.search(owner_id, query, k) if _terms(query) else None
+        with self._lock:
+            index = self._current(owner_id)
+            if ids is None:
+                ids = heapq.nsmallest(k, index.labels)
+            return {sid: index.labels[sid] for sid in ids if sid in index.labels}
+
+
+student_search = StudentSearch(students_store)
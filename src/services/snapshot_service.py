@@ -0,0 +1,99 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+from .student_service import students_store
+from .booking_service import bookings_store
+from .fee_service import fees_store
+from .room_service import rooms_store
+from ..utils import perf
+
+# In lock order (students → bookings → fees, then rooms), so the locked
+# fallback below can't deadlock with a batch write.
+TABLES = {"students": students_store, "bookings": bookings_store, "fees": fees_store, "rooms": rooms_store}
+LOCK_ORDER = tuple(TABLES)
+# Optimistic passes before falling back to loading under the owner's locks.
+ATTEMPTS = 3
+# Threads reading one page's tables at once. Parsing a CSV or snapshot holds
+# the GIL, so on local disk one thread (the caller's) is fastest; raise it when
+# the data directory is on network or otherwise slow storage and reads mostly
+# wait on I/O.
+WORKERS_ENV = "HOSTEL_SNAPSHOT_WORKERS"
+WORKERS = int(os.environ.get(WORKERS_ENV, "1"))
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _map(fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+    global _POOL
+    if WORKERS <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="snapshot")
+    return list(_POOL.map(fn, items))
+
+
+@dataclass(frozen=True)
+class OwnerSnapshot:
+    """
+    One owner's tables as of a single moment: no write to any of them
+    landed between the first and the last read. `versions` are each
+    table's version_for_owner at that moment (e.g. for expected_version).
+    """
+    owner_id: Any
+    tables: Dict[str, pd.DataFrame]
+    versions: Dict[str, int]
+    stores: Dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        return self.tables[name]
+
+    def of(self, store: Any) -> Optional[Tuple[pd.DataFrame, int]]:
+        """(frame, version) of `store`'s table, or None if it isn't in this snapshot."""
+        for name, s in self.stores.items():
+            if s is store and name in self.tables:
+                return self.tables[name], self.versions[name]
+        return None
+
+
+def _versions(stores: Dict[str, Any], owner_id: Any) -> Dict[str, int]:
+    return {name: store.version_for_owner(owner_id) for name, store in stores.items()}
+
+
+@perf.timed("snapshot.load")
+def load_snapshot(owner_id: Any, names: Optional[Sequence[str]] = None,
+                  stores: Optional[Dict[str, Any]] = None) -> OwnerSnapshot:
+    """
+    Read one owner's tables (`names`, default all of `stores`, default
+    TABLES), retrying until no write landed in between. With WORKERS > 1
+    the tables are read in parallel, so a page waits for its slowest table
+    rather than the sum of them. Under a steady stream of writes the last
+    attempt reads under the owner's locks.
+    """
+    stores = stores if stores is not None else TABLES
+    wanted = {name: stores[name] for name in (names if names is not None else stores)}
+    def read(store: Any) -> Tuple[int, pd.DataFrame]:
+        # a version read can itself load the table, so it belongs in the worker too
+        return store.version_for_owner(owner_id), store.list_for_owner(owner_id)
+
+    for _ in range(ATTEMPTS):
+        reads = _map(read, list(wanted.values()))
+        versions = dict(zip(wanted, (v for v, _ in reads)))
+        # every table is unchanged from its read until now, so together they
+        # are the owner's data as of now
+        if _versions(wanted, owner_id) == versions:
+            return OwnerSnapshot(owner_id, dict(zip(wanted, (f for _, f in reads))), versions, wanted)
+
+    # pinned: writers wait for this read (locks are held by this thread, so read here too)
+    order = sorted(wanted, key=lambda n: LOCK_ORDER.index(n) if n in LOCK_ORDER else len(LOCK_ORDER))
+    with ExitStack() as stack:
+        for name in order:
+            stack.enter_context(wanted[name].lock_for_owner(owner_id))
+        before = _versions(wanted, owner_id)
+        tables = {name: store.list_for_owner(owner_id) for name, store in wanted.items()}
+    return OwnerSnapshot(owner_id, tables, before, wanted)
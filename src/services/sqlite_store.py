@@ -0,0 +1,455 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
+import pandas as pd
+from ..utils.io import csv_path
+from ..utils.schema import Schema, ID, INT, FLOAT
+from ..utils.locks import FileLock, file_lock, record_wait, record_checked_write
+from ..utils import perf
+from .data_store import Change, ConflictError, DuplicateKeyError, _Observable, _index_value, _owner_key
+
+DB_FILENAME = "hostel.db"
+
+_LOCAL = threading.local()
+_SCHEMA_LOCK = threading.Lock()
+# (db path, table, owner key or None) -> (version, frame); shared across sessions
+_CACHE: Dict[Tuple[str, str, Optional[str]], Tuple[int, pd.DataFrame]] = {}
+
+
+def db_path() -> str:
+    return os.environ.get("HOSTEL_SQLITE_PATH") or csv_path(DB_FILENAME)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """One connection per thread and database (sqlite3 connections aren't shareable)."""
+    conns = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conns[path] = conn
+    return conn
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _py(v: Any) -> Any:
+    """Turn pandas/numpy scalars into something sqlite3 can bind."""
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    if isinstance(v, (datetime, date)):
+        # dates are stored as ISO text, like in the CSVs
+        ts = pd.Timestamp(v)
+        return str(ts.date()) if ts == ts.normalize() else ts.isoformat(sep=" ")
+    return v.item() if hasattr(v, "item") else v
+
+
+class SQLiteStore(_Observable):
+    """
+    Same contract as CSVStore, backed by one table in data/hostel.db.
+
+    columns: the column list, or a Schema (columns are then declared
+             INTEGER / REAL / TEXT and read back with the schema's dtypes).
+    indexes: column tuples to index, e.g. [("owner_id", "status")].
+    unique:  column tuples that must be unique, e.g. [("email",)]; like
+             CSVStore, text is compared trimmed and case-insensitively.
+    """
+
+    def __init__(self, filename: str, columns: Union[List[str], Schema], id_col: str = "id",
+                 indexes: Sequence[Sequence[str]] = (), unique: Sequence[Sequence[str]] = ()):
+        self.filename = filename
+        self.table = os.path.splitext(filename)[0]
+        self.schema = columns if isinstance(columns, Schema) else None
+        self.columns = self.schema.columns if self.schema is not None else list(columns)
+        self.id_col = id_col
+        self.indexes = [tuple(ix) for ix in indexes]
+        self.unique = [tuple(ix) for ix in unique]
+        self._ready: set = set()
+        self._listeners: List[Callable[[Change], None]] = []
+
+    # ---------- connection & schema ----------
+
+    def _conn(self) -> sqlite3.Connection:
+        path = db_path()
+        conn = _connect(path)
+        if path not in self._ready:
+            with _SCHEMA_LOCK:
+                self._create_schema(conn)
+                self._ready.add(path)
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        cols = ", ".join(
+            f"{_q(c)} INTEGER PRIMARY KEY" if c == self.id_col
+            else f"{_q(c)} {self._sql_type(c)}".rstrip()
+            for c in self.columns
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {_q(self.table)} ({cols})")
+        # tables created by an older column list just gain the new columns
+        have = {row[1] for row in conn.execute(f"PRAGMA table_info({_q(self.table)})")}
+        for c in self.columns:
+            if c not in have:
+                conn.execute(f"ALTER TABLE {_q(self.table)} ADD COLUMN {_q(c)}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _versions ("
+            " tbl TEXT NOT NULL, owner_key TEXT NOT NULL, version INTEGER NOT NULL,"
+            " PRIMARY KEY (tbl, owner_key))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _sequences (tbl TEXT PRIMARY KEY, last_id INTEGER NOT NULL)"
+        )
+        for cols, is_unique in [(ix, False) for ix in self.indexes] + [(ix, True) for ix in self.unique]:
+            name = f"{'ux' if is_unique else 'ix'}_{self.table}_{'_'.join(cols)}"
+            conn.execute(
+                f"CREATE {'UNIQUE ' if is_unique else ''}INDEX IF NOT EXISTS {_q(name)}"
+                f" ON {_q(self.table)} ({', '.join(_q(c) for c in cols)})"
+            )
+            if any(not self._is_int(c) for c in cols):
+                # find_by compares text normalized, so index that form too
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_q('nx_' + name[3:])}"
+                    f" ON {_q(self.table)} ({', '.join(self._key_sql(c) for c in cols)})"
+                )
+
+    def _sql_type(self, col: str) -> str:
+        if self.schema is None:
+            return "INTEGER" if col.endswith("_id") else ""
+        kind = self.schema.dtypes[col]
+        return "INTEGER" if kind in (ID, INT) else "REAL" if kind == FLOAT else "TEXT"
+
+    def _is_int(self, col: str) -> bool:
+        if col == self.id_col:
+            return True
+        if self.schema is not None:
+            return self.schema.dtypes.get(col) in (ID, INT)
+        return col.endswith("_id")
+
+    def _key_sql(self, col: str) -> str:
+        return _q(col) if self._is_int(col) else f"lower(trim({_q(col)}))"
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        start = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        record_wait(self.filename, time.perf_counter() - start)
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _bump(self, conn: sqlite3.Connection, owner_keys: Iterable[str]) -> None:
+        conn.executemany(
+            "INSERT INTO _versions (tbl, owner_key, version) VALUES (?, ?, 1)"
+            " ON CONFLICT (tbl, owner_key) DO UPDATE SET version = version + 1",
+            [(self.table, k) for k in set(owner_keys)],
+        )
+
+    def _check_version(self, conn: sqlite3.Connection, owner_id: Any, expected: Optional[int]) -> None:
+        """Raise ConflictError if the owner's rows changed since `expected` was read."""
+        if expected is None:
+            return
+        if owner_id is None:
+            (current,) = conn.execute(
+                "SELECT COALESCE(SUM(version), 0) FROM _versions WHERE tbl = ?", (self.table,)
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT version FROM _versions WHERE tbl = ? AND owner_key = ?",
+                (self.table, _owner_key(owner_id)),
+            ).fetchone()
+            current = row[0] if row else 0
+        conflict = int(current) != expected
+        record_checked_write(self.filename, conflict)
+        if conflict:
+            raise ConflictError(f"{self.table} changed since it was read; reload and retry")
+
+    def lock_for_owner(self, owner_id: Any) -> FileLock:
+        """Exclusive lock on one owner's rows, for read-check-write sequences."""
+        return file_lock(csv_path(os.path.join(_owner_key(owner_id), self.filename)))
+
+    def _versions_of(self, conn: sqlite3.Connection, keys: Iterable[str]) -> Dict[str, int]:
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        rows = conn.execute(
+            f"SELECT owner_key, version FROM _versions WHERE tbl = ? AND owner_key IN ({', '.join('?' for _ in keys)})",
+            [self.table] + keys,
+        )
+        return dict(rows.fetchall())
+
+    def _typed(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows as the schema types them (unchanged without a schema)."""
+        return self.schema.coerce(df) if self.schema is not None else df
+
+    def _select_ids(self, ids: Sequence[Any]) -> pd.DataFrame:
+        ids = [_py(i) for i in ids if _py(i) is not None]
+        if not ids:
+            return self._typed(pd.DataFrame(columns=self.columns))
+        return self._select(f"{_q(self.id_col)} IN ({', '.join('?' for _ in ids)})", ids)
+
+    def _allocate_ids(self, conn: sqlite3.Connection, n: int) -> List[int]:
+        """Reserve `n` ids from the table's sequence (never reused, even after deletes)."""
+        row = conn.execute("SELECT last_id FROM _sequences WHERE tbl = ?", (self.table,)).fetchone()
+        (top,) = conn.execute(f"SELECT COALESCE(MAX({_q(self.id_col)}), 0) FROM {_q(self.table)}").fetchone()
+        last = max(int(row[0]) if row else 0, int(top))
+        conn.execute(
+            "INSERT INTO _sequences (tbl, last_id) VALUES (?, ?)"
+            " ON CONFLICT (tbl) DO UPDATE SET last_id = excluded.last_id",
+            (self.table, last + n),
+        )
+        return list(range(last + 1, last + n + 1))
+
+    def _check_unique(self, conn: sqlite3.Connection, rows: pd.DataFrame) -> None:
+        """Raise DuplicateKeyError if `rows` clash on a unique key with each other or other rows."""
+        for cols in self.unique:
+            if rows.empty or not all(c in rows.columns for c in cols):
+                continue
+            where = " AND ".join(f"{self._key_sql(c)} = ?" for c in cols)
+            seen = set()
+            for rec in rows[[self.id_col, *cols]].itertuples(index=False, name=None):
+                key = tuple(_index_value(v, self._is_int(c)) for c, v in zip(cols, rec[1:]))
+                if any(k in ("", "nan", None) for k in key):
+                    continue
+                clash = conn.execute(
+                    f"SELECT 1 FROM {_q(self.table)} WHERE {where} AND {_q(self.id_col)} IS NOT ? LIMIT 1",
+                    [*key, _py(rec[0])],
+                ).fetchone()
+                if clash or key in seen:
+                    raise DuplicateKeyError(f"{self.table}: {'/'.join(cols)} {key!r} already exists")
+                seen.add(key)
+
+    def _owner_keys(self, df: pd.DataFrame) -> List[str]:
+        if "owner_id" not in df.columns:
+            return [_owner_key(None)]
+        return df["owner_id"].map(_owner_key).unique().tolist()
+
+    # ---------- reads ----------
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter that changes whenever the table's contents change."""
+        row = self._conn().execute(
+            "SELECT COALESCE(SUM(version), 0) FROM _versions WHERE tbl = ?", (self.table,)
+        ).fetchone()
+        return int(row[0])
+
+    def version_for_owner(self, owner_id: Any) -> int:
+        row = self._conn().execute(
+            "SELECT version FROM _versions WHERE tbl = ? AND owner_key = ?",
+            (self.table, _owner_key(owner_id)),
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def _select(self, where: str = "", params: Sequence[Any] = ()) -> pd.DataFrame:
+        sql = f"SELECT {', '.join(_q(c) for c in self.columns)} FROM {_q(self.table)}"
+        if where:
+            sql += f" WHERE {where}"
+        return self._typed(pd.read_sql_query(sql + f" ORDER BY {_q(self.id_col)}", self._conn(), params=list(params)))
+
+    def _cached(self, owner: Optional[str], version: int, load) -> pd.DataFrame:
+        key = (db_path(), self.table, owner)
+        hit = _CACHE.get(key)
+        if perf.enabled():
+            perf.cache(f"snapshot:{self.filename}", hit is not None and hit[0] == version)
+        if hit is None or hit[0] != version:
+            hit = _CACHE[key] = (version, load())
+        return hit[1].copy(deep=False)
+
+    @perf.traced
+    def list_all(self) -> pd.DataFrame:
+        """Every row in the table (read-only view over a cached frame)."""
+        return self._cached(None, self.version, self._select)
+
+    @perf.traced
+    def list_for_owner(self, owner_id: Any, **filters: Any) -> pd.DataFrame:
+        """One owner's rows, optionally narrowed by column equality, e.g. status="active".
+
+        Served from the owner_id / (owner_id, status) indexes.
+        """
+        if filters:
+            where = " AND ".join([f"{_q('owner_id')} = ?"] + [f"{_q(c)} = ?" for c in filters])
+            return self._select(where, [_py(owner_id)] + [_py(v) for v in filters.values()])
+        return self._cached(
+            _owner_key(owner_id), self.version_for_owner(owner_id),
+            lambda: self._select(f"{_q('owner_id')} = ?", [_py(owner_id)]),
+        )
+
+    @perf.traced
+    def find_by(self, cols: Any, value: Any, owner_id: Any = None) -> pd.DataFrame:
+        """Rows whose `cols` equal `value` (a tuple for several columns); text is
+        compared trimmed and case-insensitively."""
+        cols = (cols,) if isinstance(cols, str) else tuple(cols)
+        values = (value,) if len(cols) == 1 else tuple(value)
+        where = [f"{self._key_sql(c)} = ?" for c in cols]
+        params = [_index_value(v, self._is_int(c)) for c, v in zip(cols, values)]
+        if owner_id is not None:
+            where.append(f"{_q('owner_id')} = ?")
+            params.append(_py(owner_id))
+        return self._select(" AND ".join(where), params)
+
+    def get_by_id(self, _id: Any, owner_id: Any = None) -> Optional[Dict[str, Any]]:
+        """One row as a dict, or None."""
+        df = self.find_by(self.id_col, _id, owner_id=owner_id)
+        return None if df.empty else df.iloc[0].to_dict()
+
+    def exists(self, cols: Any, value: Any, owner_id: Any = None) -> bool:
+        return not self.find_by(cols, value, owner_id=owner_id).empty
+
+    # ---------- writes ----------
+
+    def _insert(self, conn: sqlite3.Connection, df: pd.DataFrame, verb: str = "INSERT") -> None:
+        cols = [c for c in self.columns if c in df.columns]
+        rows = [tuple(_py(v) for v in row) for row in df[cols].itertuples(index=False, name=None)]
+        conn.executemany(
+            f"{verb} INTO {_q(self.table)} ({', '.join(_q(c) for c in cols)})"
+            f" VALUES ({', '.join('?' for _ in cols)})",
+            rows,
+        )
+
+    def _conform(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy(deep=False)
+        for c in self.columns:
+            if c not in df.columns:
+                df[c] = ""
+        df = df[self.columns]
+        # blank / zero ids (e.g. rows added in a data editor) get fresh ones
+        ids = pd.to_numeric(df[self.id_col], errors="coerce")
+        return self._typed(df.assign(**{self.id_col: ids.where(ids > 0).astype("Int64")}))
+
+    @perf.traced_write
+    def create(self, record: Dict[str, Any]) -> pd.DataFrame:
+        """Insert a single record."""
+        self.create_many(pd.DataFrame([record]))
+        owner_id = record.get("owner_id")
+        return self.list_for_owner(owner_id) if owner_id not in (None, "") else self.list_all()
+
+    @perf.traced_write
+    def create_many(self, records: pd.DataFrame) -> List[int]:
+        """Insert rows with a freshly allocated block of ids; returns the new ids."""
+        if records is None or records.empty:
+            return []
+        rows = records.reset_index(drop=True).reindex(columns=self.columns, fill_value="")
+        with self._tx() as conn:
+            ids = self._allocate_ids(conn, len(rows))
+            rows = self._typed(rows.assign(**{self.id_col: ids}))
+            self._check_unique(conn, rows)
+            keys = self._owner_keys(rows)
+            before = self._versions_of(conn, keys)
+            self._insert(conn, rows)
+            self._bump(conn, keys)
+            after = self._versions_of(conn, keys)
+        self._emit(rows.iloc[0:0], rows, before, after)
+        return ids
+
+    @perf.traced_write
+    def upsert_many(self, records: pd.DataFrame, owner_id: Any = None,
+                    expected_version: Optional[int] = None) -> None:
+        """Replace rows by id (columns left out keep their stored value); unknown ids are added.
+
+        With `expected_version` (and `owner_id`) a concurrent change raises ConflictError.
+        """
+        if records is None or records.empty:
+            return
+        if owner_id is not None:
+            records = records.assign(owner_id=owner_id)
+        cols = [c for c in self.columns if c in records.columns]
+        records = self._typed(records)[cols]
+        sets = ", ".join(f"{_q(c)} = excluded.{_q(c)}" for c in cols if c != self.id_col)
+        rows = [tuple(_py(v) for v in row) for row in records[cols].itertuples(index=False, name=None)]
+        with self._tx() as conn:
+            self._check_version(conn, owner_id, expected_version)
+            self._check_unique(conn, records)
+            old = self._select_ids(records[self.id_col]) if self._listeners else None
+            keys = self._owner_keys(records)
+            before = self._versions_of(conn, keys)
+            conn.executemany(
+                f"INSERT INTO {_q(self.table)} ({', '.join(_q(c) for c in cols)})"
+                f" VALUES ({', '.join('?' for _ in cols)})"
+                f" ON CONFLICT ({_q(self.id_col)}) DO " + (f"UPDATE SET {sets}" if sets else "NOTHING"),
+                rows,
+            )
+            self._bump(conn, keys)
+            after = self._versions_of(conn, keys)
+            new = self._select_ids(records[self.id_col]) if self._listeners else None
+        if self._listeners:
+            self._emit(old, new, before, after)
+
+    @perf.traced_write
+    def delete_many(self, ids: Iterable[int], owner_id: Any = None) -> None:
+        """Delete every row whose id is in `ids` (only that owner's rows, if given)."""
+        ids = [_py(i) for i in ids]
+        if not ids:
+            return
+        marks = ", ".join("?" for _ in ids)
+        where, params = f"{_q(self.id_col)} IN ({marks})", list(ids)
+        if owner_id is not None:
+            where, params = where + f" AND {_q('owner_id')} = ?", params + [_py(owner_id)]
+        with self._tx() as conn:
+            old = self._select(where, params)
+            keys = self._owner_keys(old)
+            before = self._versions_of(conn, keys)
+            conn.execute(f"DELETE FROM {_q(self.table)} WHERE {where}", params)
+            self._bump(conn, keys)
+            after = self._versions_of(conn, keys)
+        self._emit(old, old.iloc[0:0], before, after)
+
+    @perf.traced_write
+    def delete_by_id(self, _id: int, owner_id: Any = None) -> pd.DataFrame:
+        """Delete a row by id."""
+        self.delete_many([_id], owner_id=owner_id)
+        return self.list_for_owner(owner_id) if owner_id is not None else self.list_all()
+
+    @perf.traced_write
+    def save_all(self, df: pd.DataFrame, expected_version: Optional[int] = None) -> None:
+        """Replace the whole table with the given dataframe (column-safe)."""
+        df = self._conform(df)
+        with self._tx() as conn:
+            self._check_version(conn, None, expected_version)
+            old = self._select() if self._listeners else None
+            keys = [r[0] for r in conn.execute(
+                "SELECT DISTINCT owner_key FROM _versions WHERE tbl = ?", (self.table,)
+            )] + self._owner_keys(df)
+            before = self._versions_of(conn, keys)
+            conn.execute(f"DELETE FROM {_q(self.table)}")
+            self._insert(conn, df)
+            self._bump(conn, keys)
+            after = self._versions_of(conn, keys)
+            new = self._select() if self._listeners else None
+        if self._listeners:
+            self._emit(old, new, before, after)
+
+    @perf.traced_write
+    def save_for_owner(self, owner_id: Any, df: pd.DataFrame,
+                       expected_version: Optional[int] = None) -> None:
+        """Replace one owner's rows with `df`, leaving every other owner untouched."""
+        df = self._conform(df).assign(owner_id=owner_id)
+        mine = f"{_q('owner_id')} = ?"
+        with self._tx() as conn:
+            self._check_version(conn, owner_id, expected_version)
+            old = self._select(mine, [_py(owner_id)]) if self._listeners else None
+            keys = [_owner_key(owner_id)]
+            before = self._versions_of(conn, keys)
+            conn.execute(f"DELETE FROM {_q(self.table)} WHERE {mine}", (_py(owner_id),))
+            self._insert(conn, df)
+            self._bump(conn, keys)
+            after = self._versions_of(conn, keys)
+            new = self._select(mine, [_py(owner_id)]) if self._listeners else None
+        if self._listeners:
+            self._emit(old, new, before, after)
+
+    @perf.traced_write
+    def compact(self, owner_id: Any = None) -> None:
+        """Checkpoint the WAL back into the database file."""
+        self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
@@ -0,0 +1,46 @@
+import os
+from typing import List, Dict, Any, Sequence, Union
+from ..utils.schema import Schema
+from .data_store import CSVStore
+from .sqlite_store import SQLiteStore
+
+# Deployment-wide choice of storage engine: "csv" (default) or "sqlite".
+BACKEND_ENV = "HOSTEL_STORAGE_BACKEND"
+
+Store = Union[CSVStore, SQLiteStore]
+
+# Every store opened by a service, so tooling (e.g. the SQLite import) can
+# rebuild it on either backend.
+STORE_SPECS: Dict[str, Dict[str, Any]] = {}
+
+def storage_backend() -> str:
+    return os.environ.get(BACKEND_ENV, "csv").strip().lower()
+
+def csv_store(spec: Dict[str, Any]) -> CSVStore:
+    return CSVStore(spec["filename"], spec["columns"], id_col=spec["id_col"],
+                    indexes=spec["indexes"], unique=spec["unique"], **spec["csv_options"])
+
+def sqlite_store(spec: Dict[str, Any]) -> SQLiteStore:
+    return SQLiteStore(spec["filename"], spec["columns"], id_col=spec["id_col"],
+                       indexes=spec["indexes"], unique=spec["unique"])
+
+def open_store(filename: str, columns: Union[List[str], Schema], id_col: str = "id",
+               indexes: Sequence[Sequence[str]] = (), unique: Sequence[Sequence[str]] = (),
+               **csv_options: Any) -> Store:
+    """
+    Build a store on the configured backend. `columns` is normally a
+    Schema, so both backends hand out frames with the same dtypes.
+    indexes/unique apply to both backends (SQL indexes, or in-memory hash
+    indexes for CSV); csv_options (append_only, partitioned, ...) only
+    apply to CSV.
+    """
+    spec = STORE_SPECS[filename] = {
+        "filename": filename, "columns": columns, "id_col": id_col,
+        "indexes": indexes, "unique": unique, "csv_options": csv_options,
+    }
+    backend = storage_backend()
+    if backend == "sqlite":
+        return sqlite_store(spec)
+    if backend != "csv":
+        raise ValueError(f"Unknown {BACKEND_ENV}={backend!r}; expected 'csv' or 'sqlite'")
+    return csv_store(spec)
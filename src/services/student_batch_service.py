@@ -0,0 +1,62 @@
+from typing import Any, Iterable, List
+import pandas as pd
+from .batch_service import Batch, BatchError, Rows, as_frame, as_ids, locked
+from .booking_service import bookings_store
+from .student_service import students_store, ImportReport, IMPORT_COLUMNS, validate_students, normalize_phone
+from ..utils import perf
+from ..utils.undo import all_or_nothing
+
+
+class StudentService:
+    """Batch student operations (see booking_batch_service.BookingService for the guarantees)."""
+
+    def __init__(self, students, bookings):
+        self.students = students
+        self.bookings = bookings
+
+    @perf.timed("batch.add_students")
+    def add_students(self, owner_id: Any, rows: Rows) -> List[int]:
+        """
+        Add students (name, email, phone, gender, course) in one write,
+        normalized and checked like a bulk import: name and email required,
+        no email or phone already used in this hostel or earlier in the batch.
+        """
+        with locked(owner_id, self.students):
+            df = as_frame(rows, IMPORT_COLUMNS).astype("string")
+            existing = self.students.list_for_owner(owner_id)
+            seen_email = set(existing["email"].astype(str).str.strip().str.lower()) - {"", "nan", "<NA>"}
+            seen_phone = set(normalize_phone(existing["phone"].astype("string").fillna(""))) - {""}
+            report = ImportReport()
+            good = validate_students(df, 0, seen_email, seen_phone, report)
+            if report.errors:
+                raise BatchError(report.errors)
+            if good.empty:
+                return []
+            return self.students.create_many(good.astype(object).assign(owner_id=owner_id).reset_index(drop=True))
+
+    @perf.timed("batch.remove_students")
+    def remove_students(self, owner_id: Any, student_ids: Iterable[int]) -> int:
+        """
+        Delete students, cancelling their active bookings first (one bookings
+        write, one students write, both or neither). Their fee history is
+        kept. Returns the number of students removed.
+        """
+        with locked(owner_id, self.students, self.bookings):
+            ids = as_ids(pd.Series(list(student_ids), dtype=object))
+            mine = self.students.list_for_owner(owner_id)
+            batch = Batch(len(ids))
+            batch.reject(~ids.isin(set(as_ids(mine["id"]).dropna().tolist())), "unknown student")
+            batch.raise_if_any()
+            ids = ids.drop_duplicates().tolist()
+            bookings = self.bookings.list_for_owner(owner_id)
+            active = bookings[bookings["student_id"].isin(ids) & (bookings["status"] == "active")]
+            with all_or_nothing() as undo:
+                if not active.empty:
+                    self.bookings.upsert_many(pd.DataFrame({"id": active["id"], "status": "cancelled"}),
+                                              owner_id=owner_id)
+                    undo.append(lambda: self.bookings.upsert_many(active, owner_id=owner_id))
+                self.students.delete_many(ids, owner_id=owner_id)
+            return len(ids)
+
+
+student_ops = StudentService(students_store, bookings_store)
@@ -1,6 +1,156 @@
+import io
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple, Union
+import pandas as pd
+from .storage import open_store
+from ..utils.schema import Schema, ID, TEXT, CATEGORY
 
-from .data_store import CSVStore
+STUDENT_SCHEMA = Schema({
+    "id": ID, "owner_id": ID, "name": TEXT, "email": TEXT, "phone": TEXT, "gender": CATEGORY, "course": TEXT,
+})
+STUDENT_COLUMNS = STUDENT_SCHEMA.columns
 
-STUDENT_COLUMNS = ["id", "owner_id","name", "email", "phone", "gender", "course"]
+students_store = open_store(
+    "students.csv", STUDENT_SCHEMA, id_col="id", indexes=[("owner_id",)],
+    append_only=True, partitioned=True, binary_snapshot=True,
+)
 
-students_store = CSVStore("students.csv", STUDENT_COLUMNS, id_col="id")
+# ---------- bulk import ----------
+
+IMPORT_COLUMNS = ["name", "email", "phone", "gender", "course"]
+REQUIRED_COLUMNS = ["name", "email"]
+GENDERS = {"male": "Male", "m": "Male", "female": "Female", "f": "Female", "other": "Other", "o": "Other"}
+HEADER_ALIASES = {
+    "full_name": "name", "student_name": "name", "e-mail": "email", "email_address": "email",
+    "mobile": "phone", "phone_number": "phone", "sex": "gender",
+    "course_/_dept": "course", "course/dept": "course", "dept": "course", "department": "course",
+}
+CHUNK_ROWS = 5000
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+@dataclass
+class ImportReport:
+    """Outcome of a bulk import; `errors` holds (file row number, message)."""
+    rows: int = 0
+    created_ids: List[int] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def accepted(self) -> int:
+        return self.rows - len({row for row, _ in self.errors})
+
+    def errors_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.errors, columns=["row", "error"])
+
+
+def _header(name: Any) -> str:
+    key = re.sub(r"\s+", "_", str(name).strip().lower())
+    return HEADER_ALIASES.get(key, key)
+
+
+def normalize_phone(phone: pd.Series) -> pd.Series:
+    # keep a leading + and the digits: "+91 98765-43210" -> "+919876543210"
+    s = phone.str.strip()
+    return s.str[:1].where(s.str[:1] == "+", "") + s.str.replace(r"\D", "", regex=True)
+
+
+def _read_chunks(source: Union[str, bytes, BinaryIO], filename: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Yield the upload as string DataFrames of at most `chunk_rows` rows (CSV or XLSX)."""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError as exc:  # optional: only needed for Excel uploads
+            raise ValueError("Reading .xlsx files needs the openpyxl package (pip install openpyxl).") from exc
+        sheet = load_workbook(source, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        header = [_header(h) for h in next(rows, ())]
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=header, dtype=object).astype("string")
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header, dtype=object).astype("string")
+        return
+    if ext not in (".csv", ".txt", ""):
+        raise ValueError(f"Unsupported file type {ext!r}; upload a .csv or .xlsx file.")
+    for chunk in pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_rows,
+                             skipinitialspace=True):
+        chunk.columns = [_header(c) for c in chunk.columns]
+        yield chunk.astype("string")
+
+
+def validate_students(chunk: pd.DataFrame, first_row: int, seen_email: set, seen_phone: set,
+              report: ImportReport) -> pd.DataFrame:
+    """Normalize one chunk and return its valid rows; problems go to `report.errors`."""
+    df = chunk.reindex(columns=IMPORT_COLUMNS).fillna("").astype("string")
+    for c in IMPORT_COLUMNS:
+        df[c] = df[c].str.strip()
+    df["email"] = df["email"].str.lower()
+    df["phone"] = normalize_phone(df["phone"])
+    # m/f/female/... -> Male/Female/Other; anything else non-blank counts as Other
+    known = df["gender"].str.lower().map(GENDERS)
+    df["gender"] = known.fillna(df["gender"].mask(df["gender"] != "", "Other"))
+    df.index = pd.RangeIndex(first_row, first_row + len(df))
+
+    problems = pd.Series("", index=df.index, dtype="string")
+    for c in REQUIRED_COLUMNS:
+        problems = problems.where(df[c] != "", problems + f"missing {c}; ")
+    bad_email = (df["email"] != "") & ~df["email"].str.match(_EMAIL)
+    problems = problems.where(~bad_email, problems + "invalid email; ")
+
+    # duplicates against the hostel's students, earlier chunks, and earlier rows of this chunk
+    dup_email = (df["email"] != "") & (df["email"].isin(seen_email) | df["email"].duplicated())
+    dup_phone = (df["phone"] != "") & (df["phone"].isin(seen_phone) | df["phone"].duplicated())
+    problems = problems.where(~dup_email, problems + "duplicate email; ")
+    problems = problems.where(~dup_phone, problems + "duplicate phone; ")
+
+    bad = problems != ""
+    report.errors.extend((int(r), msg.rstrip("; ")) for r, msg in problems[bad].items())
+    good = df[~bad]
+    seen_email.update(good["email"][good["email"] != ""].tolist())
+    seen_phone.update(good["phone"][good["phone"] != ""].tolist())
+    return good
+
+
+def import_students(owner_id: Any, source: Union[str, bytes, BinaryIO], filename: Optional[str] = None,
+                    dry_run: bool = False, chunk_rows: int = CHUNK_ROWS) -> ImportReport:
+    """
+    Bulk-add students for one owner from a CSV or XLSX file (path, bytes or
+    file object). The file is read and validated in chunks; every accepted
+    row is then written in a single create_many (one append, one block of
+    ids). Rows with a missing name/email, a malformed email, or an email or
+    phone already used in this hostel (or earlier in the file) are skipped
+    and listed in the report with their spreadsheet row number.
+    """
+    filename = filename or (source if isinstance(source, str) else getattr(source, "name", "upload.csv"))
+    report = ImportReport(dry_run=dry_run)
+    with students_store.lock_for_owner(owner_id):
+        existing = students_store.list_for_owner(owner_id)
+        seen_email = set(existing["email"].astype(str).str.strip().str.lower()) - {"", "nan"}
+        seen_phone = set(normalize_phone(existing["phone"].astype("string").fillna(""))) - {""}
+
+        accepted = []
+        first_row = 2  # row 1 is the header
+        for chunk in _read_chunks(source, filename, chunk_rows):
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing column(s): {', '.join(missing)}")
+            accepted.append(validate_students(chunk, first_row, seen_email, seen_phone, report))
+            first_row += len(chunk)
+            report.rows += len(chunk)
+
+        rows = pd.concat(accepted) if accepted else pd.DataFrame(columns=IMPORT_COLUMNS)
+        if not dry_run and not rows.empty:
+            rows = rows.astype(object).assign(owner_id=owner_id)
+            report.created_ids = students_store.create_many(rows.reset_index(drop=True))
+    report.errors.sort()
+    return report
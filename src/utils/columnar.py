@@ -0,0 +1,152 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .schema import Schema, ID, INT, FLOAT, TEXT, CATEGORY, DATE
+from . import perf
+
+# File layout: MAGIC, a little-endian u64 header length, the JSON header,
+# then every column buffer, each starting on an ALIGN-byte boundary.
+MAGIC = b"HSNAP01\n"
+ALIGN = 64
+_LEN = struct.Struct("<Q")
+
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+
+def _strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """String table: int64 offsets (len + 1) into one UTF-8 blob."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="int64")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype="uint8")
+
+
+def _encode(col: pd.Series, kind: str, table: List[str]) -> Dict[str, np.ndarray]:
+    """Column -> named numpy buffers. Text and categories go to the shared string table."""
+    if kind in (ID, INT):
+        return {"values": col.to_numpy("int32", na_value=0), "mask": col.isna().to_numpy()}
+    if kind == FLOAT:
+        return {"values": col.to_numpy("float64")}
+    if kind == DATE:
+        return {"values": col.to_numpy("datetime64[us]").view("int64")}
+    if kind == CATEGORY:
+        cats = col.cat.categories.astype(str).tolist()
+        start = len(table)
+        table.extend(cats)
+        return {"codes": col.cat.codes.to_numpy(), "strings": np.array([start, len(cats)], dtype="int64")}
+    # text: dictionary codes (-1 = missing); repeated values are stored once
+    codes, uniques = pd.factorize(col, use_na_sentinel=True)
+    start = len(table)
+    table.extend(str(u) for u in uniques)
+    return {"codes": codes.astype("int32"), "strings": np.array([start, len(uniques)], dtype="int64")}
+
+
+@perf.timed("snap.write")
+def write_columnar(path: str, frame: pd.DataFrame, schema: Schema, meta: Dict[str, Any]) -> None:
+    """Write `frame` (typed by `schema`) as a memory-mappable columnar file, atomically."""
+    table: List[str] = []
+    buffers: List[Tuple[str, str, np.ndarray]] = []
+    for c, kind in schema.dtypes.items():
+        for part, arr in _encode(frame[c], kind, table).items():
+            buffers.append((c, part, np.ascontiguousarray(arr)))
+    offsets, blob = _strings(table)
+    buffers += [("", "string_offsets", offsets), ("", "string_data", blob)]
+
+    layout, pos = [], 0
+    for c, part, arr in buffers:
+        pos += _pad(pos)
+        layout.append({"column": c, "part": part, "dtype": arr.dtype.str, "count": len(arr), "offset": pos})
+        pos += arr.nbytes
+    header = json.dumps({"meta": meta, "rows": len(frame), "schema": schema.dtypes, "buffers": layout}).encode()
+    start = len(MAGIC) + _LEN.size + len(header)
+    start += _pad(start)
+
+    # per thread: the refresh timer and flush_binary can write the same file at once
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC + _LEN.pack(len(header)) + header)
+        fh.write(b"\0" * (start - fh.tell()))
+        for (c, part, arr), spec in zip(buffers, layout):
+            fh.write(b"\0" * (start + spec["offset"] - fh.tell()))
+            fh.write(arr.tobytes())
+    os.replace(tmp, path)
+
+
+def read_meta(path: str) -> Optional[Dict[str, Any]]:
+    """Just the header's `meta` (cheap staleness check), or None if unreadable."""
+    try:
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                return None
+            (n,) = _LEN.unpack(fh.read(_LEN.size))
+            return json.loads(fh.read(n))["meta"]
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def read_columnar(path: str, schema: Schema) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+    """
+    Map the file and rebuild the frame without parsing: ids, numbers, dates
+    and category codes are numpy views over the mapping (read-only, and
+    pandas copies on write); text is rebuilt from the string table.
+    Returns None if the file is missing, corrupt or written for another schema.
+    """
+    try:
+        with open(path, "rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if mm[:len(MAGIC)] != MAGIC:
+            return None
+        (n,) = _LEN.unpack_from(mm, len(MAGIC))
+        head_end = len(MAGIC) + _LEN.size + n
+        header = json.loads(mm[len(MAGIC) + _LEN.size:head_end])
+        if header.get("schema") != schema.dtypes:
+            return None
+        start = head_end + _pad(head_end)
+        parts: Dict[Tuple[str, str], np.ndarray] = {
+            (b["column"], b["part"]): np.frombuffer(mm, dtype=b["dtype"], count=b["count"],
+                                                    offset=start + b["offset"])
+            for b in header["buffers"]
+        }
+    except (ValueError, KeyError, struct.error):
+        return None
+
+    offsets, blob = parts[("", "string_offsets")], parts[("", "string_data")].tobytes()
+
+    def strings(c: str) -> List[str]:
+        first, count = parts[(c, "strings")].tolist()
+        o = offsets[first:first + count + 1].tolist()
+        return [blob[a:b].decode("utf-8") for a, b in zip(o, o[1:])]
+
+    with perf.span("snap.read") as s:
+        frame = _frame(parts, schema, strings)
+        s.rows, s.bytes = len(frame), len(mm)
+    return frame, header["meta"]
+
+
+def _frame(parts: Dict[Tuple[str, str], np.ndarray], schema: Schema,
+           strings: Callable[[str], List[str]]) -> pd.DataFrame:
+    columns: Dict[str, Any] = {}
+    for c, kind in schema.dtypes.items():
+        if kind in (ID, INT):
+            columns[c] = pd.Series(pd.arrays.IntegerArray(parts[(c, "values")], parts[(c, "mask")]), copy=False)
+        elif kind in (FLOAT, DATE):
+            values = parts[(c, "values")]
+            columns[c] = pd.Series(values.view(DATE) if kind == DATE else values, copy=False)
+        elif kind == CATEGORY:
+            cats = pd.Index(strings(c), dtype=TEXT)
+            columns[c] = pd.Series(pd.Categorical.from_codes(parts[(c, "codes")], categories=cats, validate=False),
+                                   copy=False)
+        else:
+            lookup = np.array(strings(c) + [None], dtype=object)   # code -1 picks the trailing None
+            columns[c] = pd.Series(lookup[parts[(c, "codes")]], dtype=TEXT)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import pandas as pd
+from .locks import ConflictError, record_checked_write
+from .undo import all_or_nothing
+from . import perf
+
+
+@dataclass
+class EditorDelta:
+    """What a st.data_editor session changed, as store operations."""
+    updates: pd.DataFrame = field(default_factory=pd.DataFrame)   # full rows, by id
+    inserts: pd.DataFrame = field(default_factory=pd.DataFrame)   # rows without ids
+    deletes: List[int] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return self.updates.empty and self.inserts.empty and not self.deletes
+
+    @property
+    def size(self) -> int:
+        return len(self.updates) + len(self.inserts) + len(self.deletes)
+
+
+def has_pending_edits(state: Optional[Dict[str, Any]]) -> bool:
+    """Whether a data_editor's widget state holds edits not saved yet."""
+    state = state or {}
+    return any(state.get(k) for k in ("edited_rows", "added_rows", "deleted_rows"))
+
+
+def editor_delta(shown: pd.DataFrame, state: Optional[Dict[str, Any]], columns: Sequence[str],
+                 id_col: str = "id") -> EditorDelta:
+    """
+    Turn a data_editor's widget state (edited_rows / added_rows /
+    deleted_rows, keyed by row position in `shown`) into full rows to
+    upsert, rows to insert and ids to delete. Only the touched rows are
+    looked at; display-only columns not in `columns` are dropped.
+    """
+    state = state or {}
+    columns = [c for c in columns if c != "owner_id"]
+    ids = shown[id_col] if id_col in shown.columns else pd.Series(dtype="float64")
+
+    edited = state.get("edited_rows") or {}
+    deleted = {int(p) for p in state.get("deleted_rows") or []}
+    rows = []
+    for pos, changes in edited.items():
+        pos = int(pos)
+        if pos in deleted or pos >= len(shown):
+            continue
+        row = shown.iloc[pos].to_dict()
+        row.update(changes)
+        rows.append(row)
+    updates = pd.DataFrame(rows).reindex(columns=columns) if rows else pd.DataFrame(columns=columns)
+
+    added = [r for r in state.get("added_rows") or [] if any(v not in (None, "") for v in r.values())]
+    inserts = pd.DataFrame(added).reindex(columns=[c for c in columns if c != id_col]) if added \
+        else pd.DataFrame(columns=[c for c in columns if c != id_col])
+
+    deletes = pd.to_numeric(ids.iloc[sorted(p for p in deleted if p < len(shown))], errors="coerce")
+    return EditorDelta(updates, inserts, deletes.dropna().astype("int64").tolist())
+
+
+@perf.timed("editor.apply_delta")
+def apply_delta(store, owner_id: Any, delta: EditorDelta, expected_version: Optional[int] = None,
+                validate: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> None:
+    """
+    Apply an EditorDelta to one owner's rows as targeted upserts, inserts
+    and deletes, so the cost follows the size of the edit, not the table.
+    `validate` normalizes the touched rows (it sees updates and inserts
+    only). With `expected_version` (from version_for_owner when editing
+    began) the whole save raises ConflictError if the owner's rows changed
+    meanwhile, since the editor's row positions would no longer line up.
+    If a later write fails, the earlier ones are undone, so a save lands
+    whole or not at all.
+    """
+    if delta.empty:
+        return
+    updates, inserts = delta.updates, delta.inserts
+    if validate is not None:
+        updates = validate(updates) if not updates.empty else updates
+        inserts = validate(inserts) if not inserts.empty else inserts
+    with store.lock_for_owner(owner_id):
+        if expected_version is not None:
+            conflict = store.version_for_owner(owner_id) != expected_version
+            record_checked_write(store.filename, conflict)
+            if conflict:
+                raise ConflictError(f"{store.filename} changed since it was read; reload and retry")
+        id_col = getattr(store, "id_col", "id")
+        current = store.list_for_owner(owner_id)
+        touched = pd.to_numeric(updates[id_col], errors="coerce").dropna().astype("int64").tolist() \
+            if id_col in updates.columns else []
+        with all_or_nothing() as undo:
+            if not updates.empty:
+                was = current[current[id_col].isin(touched)]
+                store.upsert_many(updates, owner_id=owner_id)
+                undo.append(lambda: store.upsert_many(was, owner_id=owner_id))
+            if delta.deletes:
+                gone = current[current[id_col].isin(delta.deletes)]
+                store.delete_many(delta.deletes, owner_id=owner_id)
+                # upsert re-adds unknown ids, so the rows come back as they were
+                undo.append(lambda: store.upsert_many(gone, owner_id=owner_id))
+            if not inserts.empty:
+                store.create_many(inserts.assign(owner_id=owner_id))
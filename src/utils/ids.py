@@ -1,5 +1,10 @@
-
+import os
+from typing import Callable, List, Optional
 import pandas as pd
+from .io import csv_path
+from .locks import file_lock
+
+SEQ_SUFFIX = ".seq"
 
 def next_id(df: pd.DataFrame, id_col: str = "id") -> int:
     if df.empty:
@@ -8,3 +13,58 @@ def next_id(df: pd.DataFrame, id_col: str = "id") -> int:
         return int(df[id_col].max()) + 1
     except Exception:
         return 1
+
+
+class IdSequence:
+    """
+    Persistent, monotonic id counter for one store, kept in data/<file>.seq.
+    Allocating reads and rewrites one small file under an flock, so it is
+    O(1), safe across server processes, and never hands out an id again,
+    even after the row holding the highest id is deleted.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename + SEQ_SUFFIX
+        # highest value seen in the file; it only grows, so ids at or below
+        # it need no further bookkeeping
+        self._seen = 0
+
+    @property
+    def path(self) -> str:
+        return csv_path(self.filename)
+
+    def _read(self) -> Optional[int]:
+        try:
+            with open(self.path) as fh:
+                return int(fh.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, last: int) -> None:
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(str(last))
+        os.replace(tmp, self.path)
+
+    def allocate(self, n: int, floor: Callable[[], int]) -> List[int]:
+        """Reserve `n` consecutive ids. `floor()` (the next id the existing rows
+        allow) is only consulted the first time, when no counter exists yet."""
+        with file_lock(self.path):
+            last = self._read()
+            if last is None:
+                last = floor() - 1
+            self._write(last + n)
+            self._seen = last + n
+        return list(range(last + 1, last + n + 1))
+
+    def observe(self, _id: int) -> None:
+        """Move the counter past an id that was written explicitly (e.g. by an upsert)."""
+        if _id <= self._seen:
+            return
+        with file_lock(self.path):
+            last = self._read()
+            if last is None:
+                return
+            if _id > last:
+                self._write(_id)
+            self._seen = max(last, _id)
@@ -1,24 +1,58 @@
-
+import csv
 import os
+from typing import Optional
 import pandas as pd
+from .schema import Schema
+from . import perf
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 
 def ensure_csv(path: str, columns: list[str]) -> None:
     """Create the CSV with headers if it doesn't exist."""
     if not os.path.exists(path):
-        df = pd.DataFrame(columns=columns)
-        df.to_csv(path, index=False)
+        with open(path, "w", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerow(columns)
 
 def csv_path(filename: str) -> str:
-    os.makedirs(DATA_DIR, exist_ok=True)
-    return os.path.join(DATA_DIR, filename)
+    path = os.path.join(DATA_DIR, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def list_partitions(filename: str) -> list[str]:
+    """Sub-directories of the data dir (one per owner) that hold `filename`."""
+    if not os.path.isdir(DATA_DIR):
+        return []
+    return sorted(
+        d for d in os.listdir(DATA_DIR)
+        if os.path.isfile(os.path.join(DATA_DIR, d, filename))
+    )
 
-def read_csv(filename: str, columns: list[str]) -> pd.DataFrame:
+def read_csv(filename: str, columns: list[str], schema: Optional[Schema] = None) -> pd.DataFrame:
+    """Parse the CSV, with the schema's dtypes/usecols when given (else pandas infers them)."""
     path = csv_path(filename)
     ensure_csv(path, columns)
-    return pd.read_csv(path)
+    with perf.span("csv.read") as s:
+        df = schema.read_csv(path) if schema is not None else pd.read_csv(path)
+        if perf.enabled():
+            s.rows, s.bytes = len(df), os.path.getsize(path)
+    return df
 
 def write_csv(filename: str, df: pd.DataFrame) -> None:
+    """Write via a temp file + rename so readers never see a half-written CSV."""
     path = csv_path(filename)
-    df.to_csv(path, index=False)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with perf.span("csv.write") as s:
+        df.to_csv(tmp, index=False)
+        if perf.enabled():
+            s.rows, s.bytes = len(df), os.path.getsize(tmp)
+    os.replace(tmp, path)
+
+def append_csv(filename: str, df: pd.DataFrame, columns: list[str]) -> None:
+    """Append rows (no header) to the CSV, creating it with headers first if needed."""
+    path = csv_path(filename)
+    ensure_csv(path, columns)
+    with perf.span("csv.append") as s:
+        size = os.path.getsize(path) if perf.enabled() else 0
+        df.to_csv(path, mode="a", header=False, index=False)
+        if perf.enabled():
+            s.rows, s.bytes = len(df), os.path.getsize(path) - size
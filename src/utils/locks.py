@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover threads of this process
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+
+
+class ConflictError(RuntimeError):
+    """A versioned write found the data changed since the caller read it."""
+
+
+class _Counters:
+    __slots__ = ("acquired", "wait_total", "wait_max", "checked_writes", "conflicts")
+
+    def __init__(self):
+        self.acquired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checked_writes = 0
+        self.conflicts = 0
+
+
+_METRICS: Dict[str, _Counters] = defaultdict(_Counters)
+_METRICS_LOCK = threading.Lock()
+
+
+def _metric_key(path: str) -> str:
+    # per store, not per partition: data/<owner>/bookings.csv -> bookings.csv
+    return os.path.basename(path)
+
+
+def record_wait(path: str, seconds: float) -> None:
+    with _METRICS_LOCK:
+        m = _METRICS[_metric_key(path)]
+        m.acquired += 1
+        m.wait_total += seconds
+        m.wait_max = max(m.wait_max, seconds)
+
+
+def record_checked_write(path: str, conflict: bool) -> None:
+    with _METRICS_LOCK:
+        m = _METRICS[_metric_key(path)]
+        m.checked_writes += 1
+        m.conflicts += int(conflict)
+
+
+def store_metrics() -> Dict[str, Dict[str, float]]:
+    """Lock-wait and conflict-rate figures per store since the process started."""
+    with _METRICS_LOCK:
+        return {
+            name: {
+                "locks_acquired": m.acquired,
+                "lock_wait_avg_ms": 1000 * m.wait_total / m.acquired if m.acquired else 0.0,
+                "lock_wait_max_ms": 1000 * m.wait_max,
+                "checked_writes": m.checked_writes,
+                "conflicts": m.conflicts,
+                "conflict_rate": m.conflicts / m.checked_writes if m.checked_writes else 0.0,
+            }
+            for name, m in _METRICS.items()
+        }
+
+
+def reset_metrics() -> None:
+    with _METRICS_LOCK:
+        _METRICS.clear()
+
+
+class FileLock:
+    """
+    Re-entrant exclusive lock for one data file: a thread lock for this
+    process plus an flock on <path>.lock so other server processes wait too.
+    Each (store, owner) partition has its own, so unrelated hostels never
+    contend.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        start = time.perf_counter()
+        self.thread_lock.acquire()
+        if self._depth == 0:
+            if fcntl is not None:
+                fd = os.open(self.path + LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                self._fd = fd
+            record_wait(self.path, time.perf_counter() - start)
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self.thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+_LOCKS: Dict[str, FileLock] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def file_lock(path: str) -> FileLock:
+    """The process-wide lock guarding `path`."""
+    with _REGISTRY_LOCK:
+        lock = _LOCKS.get(path)
+        if lock is None:
+            lock = _LOCKS[path] = FileLock(path)
+        return lock
@@ -3,10 +3,8 @@ import pandas as pd
 
 def id_to_label(df: pd.DataFrame, id_col: str, label_col: str) -> Dict[int, str]:
     m: Dict[int, str] = {}
-    if id_col in df and label_col in df:
-        for _, row in df.iterrows():
-            try:
-                m[int(row[id_col])] = str(row[label_col])
-            except Exception:
-                continue
-    return m
+    if df is None or id_col not in df or label_col not in df:
+        return m
+    ids = pd.to_numeric(df[id_col], errors="coerce")
+    ok = ids.notna()
+    return dict(zip(ids[ok].astype("int64").tolist(), df.loc[ok, label_col].astype(str).tolist()))
@@ -0,0 +1,43 @@
+"""
+Storage migrations.
+
+    python -m src.utils.migrate            # split legacy single-file CSVs
+                                           # (data/students.csv, ...) into
+                                           # per-owner partitions
+    python -m src.utils.migrate sqlite     # import every CSV store into
+                                           # data/hostel.db
+
+Partitioned stores also migrate themselves lazily on first use; the first
+command just does it up front for every store. After the SQLite import, set
+HOSTEL_STORAGE_BACKEND=sqlite to serve the app from the database.
+"""
+import sys
+from ..services.storage import STORE_SPECS, csv_store, sqlite_store
+# imported for their side effect of registering the store specs
+from ..services import auth_service, student_service, room_service, booking_service, fee_service  # noqa: F401
+
+def migrate_all() -> dict[str, int]:
+    """Split every partitioned CSV store's legacy file into per-owner partitions."""
+    moved = {}
+    for spec in STORE_SPECS.values():
+        store = csv_store(spec)
+        if store.partitioned:
+            moved[store.filename] = store.migrate_to_partitions()
+    return moved
+
+def import_csv_into_sqlite() -> dict[str, int]:
+    """Copy every CSV store (all partitions, journals folded) into its SQLite table."""
+    imported = {}
+    for spec in STORE_SPECS.values():
+        df = csv_store(spec).list_all()
+        sqlite_store(spec).save_all(df)
+        imported[spec["filename"]] = len(df)
+    return imported
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["sqlite"]:
+        for filename, n in import_csv_into_sqlite().items():
+            print(f"{filename}: {n} rows imported into SQLite")
+    else:
+        for filename, n in migrate_all().items():
+            print(f"{filename}: {n} rows moved into per-owner partitions")
@@ -0,0 +1,217 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+
+# HOSTEL_PERF=1 records timing spans from startup; HOSTEL_PERF_EXPORT=<path>
+# also appends every finished span to that file as one JSON line.
+ENV = "HOSTEL_PERF"
+EXPORT_ENV = "HOSTEL_PERF_EXPORT"
+# durations kept per span name for percentiles
+RING_SIZE = 1024
+# latest spans of any name, for the admin page
+RECENT_SIZE = 500
+
+
+class _Series:
+    __slots__ = ("count", "errors", "total", "max", "rows", "bytes", "durations")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.durations = deque(maxlen=RING_SIZE)
+
+
+_ENABLED = os.environ.get(ENV, "").strip().lower() in ("1", "true", "yes", "on")
+_EXPORT: Optional[str] = os.environ.get(EXPORT_ENV) or None
+_SERIES: Dict[str, _Series] = defaultdict(_Series)
+_RECENT: deque = deque(maxlen=RECENT_SIZE)
+_CACHES: Dict[str, List[int]] = defaultdict(lambda: [0, 0])   # name -> [hits, misses]
+_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    return _ENABLED
+
+
+def enable(on: bool = True, export: Optional[str] = None) -> None:
+    """Switch recording on or off for this process; `export` also sets the JSONL file."""
+    global _ENABLED, _EXPORT
+    _ENABLED = on
+    if export is not None:
+        _EXPORT = export or None
+
+
+def _record(name: str, seconds: float, rows: Optional[int], nbytes: Optional[int], error: bool) -> None:
+    ms = seconds * 1000
+    entry = {"name": name, "at": round(time.time(), 3), "ms": round(ms, 3), "rows": rows, "bytes": nbytes}
+    if error:
+        entry["error"] = True
+    with _LOCK:
+        s = _SERIES[name]
+        s.count += 1
+        s.errors += int(error)
+        s.total += ms
+        s.max = max(s.max, ms)
+        s.rows += rows or 0
+        s.bytes += nbytes or 0
+        s.durations.append(ms)
+        _RECENT.append(entry)
+        if _EXPORT:
+            try:
+                with open(_EXPORT, "a") as fh:
+                    fh.write(json.dumps(entry) + "\n")
+            except OSError:
+                pass
+
+
+class Span:
+    """Times a `with` block; set `rows` / `bytes` inside it to record them too."""
+    __slots__ = ("name", "rows", "bytes", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: Optional[int] = None
+        self.bytes: Optional[int] = None
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _record(self.name, time.perf_counter() - self._start, self.rows, self.bytes, exc_type is not None)
+        return False
+
+
+class _NoSpan:
+    """Shared stand-in while recording is off: nothing is timed or kept."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """`with span("csv.read") as s: ...; s.bytes = n` (a no-op unless enabled)."""
+    return Span(name) if _ENABLED else _NO_SPAN
+
+
+def rows_of(value: Any) -> Optional[int]:
+    """Row count of a frame, series, list or dict result; None for anything else."""
+    if isinstance(value, (list, dict)) or hasattr(value, "shape"):
+        return len(value)
+    return None
+
+
+def timed(name: str) -> Callable:
+    """Decorator: time every call as span `name`, with the rows of its result."""
+    def wrap(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _ENABLED:
+                return fn(*args, **kwargs)
+            with Span(name) as s:
+                out = fn(*args, **kwargs)
+                s.rows = rows_of(out)
+                return out
+        return inner
+    return wrap
+
+
+def _traced(fn: Callable, writes: bool) -> Callable:
+    op = fn.__name__
+
+    @functools.wraps(fn)
+    def inner(self, *args, **kwargs):
+        if not _ENABLED:
+            return fn(self, *args, **kwargs)
+        with Span(f"{self.filename}.{op}") as s:
+            out = fn(self, *args, **kwargs)
+            if writes:
+                # a dict argument is one record
+                sizes = (1 if isinstance(a, dict) else rows_of(a) for a in args)
+                s.rows = next((n for n in sizes if n is not None), None)
+            else:
+                s.rows = rows_of(out)
+            return out
+    return inner
+
+
+def traced(fn: Callable) -> Callable:
+    """Store read method decorator: span "<filename>.<method>" with the rows returned."""
+    return _traced(fn, writes=False)
+
+
+def traced_write(fn: Callable) -> Callable:
+    """Store write method decorator: span "<filename>.<method>" with the rows
+    (frame, record or id list) passed in."""
+    return _traced(fn, writes=True)
+
+
+def cache(name: str, hit: bool) -> None:
+    """Count one lookup in the cache `name`."""
+    if not _ENABLED:
+        return
+    with _LOCK:
+        _CACHES[name][0 if hit else 1] += 1
+
+
+# ---------- reports ----------
+
+def span_metrics() -> Dict[str, Dict[str, float]]:
+    """Per span name: calls, latency percentiles over the last RING_SIZE calls, totals."""
+    with _LOCK:
+        series = {name: (s.count, s.errors, s.total, s.max, s.rows, s.bytes, np.fromiter(s.durations, float))
+                  for name, s in _SERIES.items()}
+    out = {}
+    for name, (count, errors, total, top, rows, nbytes, ring) in series.items():
+        p50, p90, p99 = np.percentile(ring, [50, 90, 99]) if len(ring) else (0.0, 0.0, 0.0)
+        out[name] = {
+            "calls": count, "errors": errors, "p50_ms": float(p50), "p90_ms": float(p90), "p99_ms": float(p99),
+            "max_ms": top, "total_ms": total, "rows": rows, "bytes": nbytes,
+        }
+    return out
+
+
+def cache_metrics() -> Dict[str, Dict[str, float]]:
+    """Hits, misses and hit rate per cache."""
+    with _LOCK:
+        return {
+            name: {"hits": h, "misses": m, "hit_rate": h / (h + m) if h + m else 0.0}
+            for name, (h, m) in _CACHES.items()
+        }
+
+
+def recent_spans(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """The latest finished spans, newest last."""
+    with _LOCK:
+        spans = list(_RECENT)
+    return spans[-limit:] if limit else spans
+
+
+def to_jsonl(spans: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(s) + "\n" for s in spans)
+
+
+def reset() -> None:
+    with _LOCK:
+        _SERIES.clear()
+        _RECENT.clear()
+        _CACHES.clear()
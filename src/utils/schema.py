@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List
+import pandas as pd
+
+# Column kinds. Ids are nullable so a blank cell stays <NA> instead of
+# turning the whole column float; int32 halves their memory.
+ID = "Int32"
+INT = "Int32"
+FLOAT = "float64"
+TEXT = "str"
+CATEGORY = "category"
+DATE = "datetime64[us]"
+
+
+def _blank_to_na(col: pd.Series) -> pd.Series:
+    if col.dtype == object or pd.api.types.is_string_dtype(col):
+        return col.mask(col.astype(str).str.strip() == "")
+    return col
+
+
+def _has_dtype(col: pd.Series, kind: str) -> bool:
+    if kind == CATEGORY:
+        return isinstance(col.dtype, pd.CategoricalDtype)
+    if kind == TEXT:
+        return col.dtype == pd.api.types.pandas_dtype(TEXT)
+    return col.dtype == pd.api.types.pandas_dtype(kind)
+
+
+def _convert(col: pd.Series, kind: str) -> pd.Series:
+    # blanks read back from CSV as missing, so store them that way
+    col = _blank_to_na(col)
+    if kind == TEXT:
+        # text columns keep "01" and "+91..." as written; a missing value stays
+        # missing rather than becoming the text "nan"
+        return col.astype(TEXT).mask(col.isna())
+    if kind == CATEGORY:
+        return col.astype(TEXT).mask(col.isna()).astype(CATEGORY)
+    if kind == DATE:
+        # CSV text is ISO; values from forms and editors may be date objects
+        fmt = "ISO8601" if pd.api.types.is_string_dtype(col) else "mixed"
+        return pd.to_datetime(col, errors="coerce", format=fmt).astype(DATE)
+    num = pd.to_numeric(col, errors="coerce")
+    if kind == INT:
+        # 2.0 is 2, 2.5 is not an id
+        num = num.where(num == num.round())
+    return num.astype(kind)
+
+
+@dataclass(frozen=True)
+class Schema:
+    """
+    A store's columns with their dtypes, in order, e.g.
+    Schema({"id": ID, "status": CATEGORY}). Passed to a store in place of
+    the plain column list, so every frame it hands out is typed the same
+    way whether it came from disk, a journal or a write.
+    """
+    dtypes: Dict[str, str]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.dtypes)
+
+    def read_options(self) -> Dict[str, Any]:
+        """Keyword arguments for pd.read_csv. Integer columns are left to the
+        C parser's own int64 inference and narrowed afterwards (it parses
+        nullable Int32 several times slower), and dates are read as text
+        and converted in one vectorized ISO pass, which beats parse_dates."""
+        dtype = {c: (TEXT if kind == DATE else kind) for c, kind in self.dtypes.items() if kind != INT}
+        return {"dtype": dtype, "usecols": lambda c: c in self.dtypes}
+
+    def empty(self) -> pd.DataFrame:
+        """A typed frame with no rows (what a header-only CSV reads as)."""
+        return pd.DataFrame({c: pd.Series(dtype=kind) for c, kind in self.dtypes.items()})
+
+    def coerce(self, df: pd.DataFrame) -> pd.DataFrame:
+        """`df` with the schema's columns, in order and typed; columns already
+        of the right dtype are passed through untouched."""
+        wrong = {c: kind for c, kind in self.dtypes.items() if c in df.columns and not _has_dtype(df[c], kind)}
+        missing = [c for c in self.dtypes if c not in df.columns]
+        if not wrong and not missing and list(df.columns) == self.columns:
+            return df
+        out = df.assign(**{c: _convert(df[c], kind) for c, kind in wrong.items()}) if wrong else df
+        if missing:
+            out = out.assign(**{c: pd.Series(pd.NA, index=out.index).pipe(_convert, self.dtypes[c])
+                                for c in missing})
+        return out[self.columns]
+
+    def read_csv(self, source: Any) -> pd.DataFrame:
+        """pd.read_csv with the schema's dtypes. Legacy cells the fast path
+        can't parse (e.g. an id written as "3.0") fall back to a plain read
+        that is coerced column by column."""
+        options = self.read_options()
+        try:
+            df = pd.read_csv(source, **options)
+        except (ValueError, TypeError):
+            if hasattr(source, "seek"):
+                source.seek(0)
+            df = pd.read_csv(source, usecols=options["usecols"])
+        return self.coerce(df)
+
+
+def concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat that keeps categorical columns categorical (plain concat
+    falls back to text as soon as two frames' categories differ)."""
+    frames = [f for f in frames if len(f.columns)]
+    if len(frames) > 1:
+        for c in frames[0].columns:
+            if not all(c in f.columns and isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames):
+                continue
+            cats = frames[0][c].cat.categories
+            for f in frames[1:]:
+                cats = cats.union(f[c].cat.categories, sort=False)
+            frames = [f if f[c].cat.categories.equals(cats) else f.assign(**{c: f[c].cat.set_categories(cats)})
+                      for f in frames]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
@@ -1,69 +1,139 @@
-from ..services.room_service import rooms_store
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
 import pandas as pd
+from ..services.room_service import rooms_store, ROOM_TYPES
 
-TYPE_CAPACITY = {"Triple": 3, "Double": 2}
 
-def generate_default_rooms(owner_id=None) -> bool:
+@dataclass(frozen=True)
+class RoomRun:
+    """`count` consecutive rooms of one type; `capacity` overrides the type's beds."""
+    type: str
+    count: int
+    capacity: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class Floor:
+    rooms: Tuple[RoomRun, ...]
+
+
+@dataclass(frozen=True)
+class Block:
+    """A building; its name prefixes room numbers ("A-101"), "" for none."""
+    floors: Tuple[Floor, ...]
+    name: str = ""
+
+
+@dataclass(frozen=True)
+class RoomTemplate:
     """
-    Create 100 rooms for a specific owner (user):
-      - 01–50  -> Triple (cap 3)
-      - 51–100 -> Double (cap 2)
+    A hostel layout. With `by_floor` rooms are numbered floor-first (101, 102,
+    ..., 201, ...); otherwise one running number per block (01 ... 100).
+    Numbers are zero-padded to two digits.
+    """
+    name: str
+    blocks: Tuple[Block, ...]
+    by_floor: bool = True
+    label: str = field(default="", compare=False)
+
+    def rooms(self) -> pd.DataFrame:
+        """room_no, type and capacity of every room, in numbering order."""
+        runs = [run for b in self.blocks for floor in b.floors for run in floor.rooms]
+        for run in runs:
+            if run.type not in ROOM_TYPES:
+                raise ValueError(f"Template {self.name!r}: unknown room type {run.type!r}")
+        counts = np.array([run.count for run in runs], dtype="int64")
+        types = np.repeat([run.type for run in runs], counts)
+        capacity = np.repeat([run.capacity or ROOM_TYPES[run.type].capacity for run in runs], counts)
+        return pd.DataFrame({"room_no": self._numbers(), "type": types, "capacity": capacity})
+
+    def _numbers(self) -> List[str]:
+        numbers: List[str] = []
+        for b in self.blocks:
+            prefix = f"{b.name}-" if b.name else ""
+            if self.by_floor:
+                for f, floor in enumerate(b.floors, 1):
+                    n = sum(run.count for run in floor.rooms)
+                    numbers += [f"{prefix}{f}{i:02d}" for i in range(1, n + 1)]
+            else:
+                n = sum(run.count for floor in b.floors for run in floor.rooms)
+                numbers += [f"{prefix}{i:02d}" for i in range(1, n + 1)]
+        return numbers
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any]) -> "RoomTemplate":
+        """
+        Build from plain data, e.g. loaded from JSON:
+          {"name": "annex", "blocks": [{"name": "A", "floors": [
+              [{"type": "Double", "count": 10}, {"type": "Triple", "count": 4, "capacity": 4}]]}]}
+        """
+        return cls(
+            name=spec["name"],
+            label=spec.get("label", ""),
+            by_floor=spec.get("by_floor", True),
+            blocks=tuple(
+                Block(name=b.get("name", ""),
+                      floors=tuple(Floor(tuple(RoomRun(**run) for run in floor)) for floor in b["floors"]))
+                for b in spec["blocks"]
+            ),
+        )
+
+
+TEMPLATES: Dict[str, RoomTemplate] = {t.name: t for t in (
+    RoomTemplate(
+        "default", by_floor=False, label="100 rooms: 01–50 Triple (3-share), 51–100 Double (2-share)",
+        blocks=(Block((Floor((RoomRun("Triple", 50), RoomRun("Double", 50))),)),),
+    ),
+    RoomTemplate(
+        "two-blocks", label="Blocks A and B, 3 floors of 10 Triple + 10 Double each (A-101 … B-320)",
+        blocks=tuple(Block(tuple(Floor((RoomRun("Triple", 10), RoomRun("Double", 10))) for _ in range(3)), name)
+                     for name in ("A", "B")),
+    ),
+)}
+DEFAULT_TEMPLATE = TEMPLATES["default"]
+
+
+def build_rooms(template: RoomTemplate, owner_ids: Sequence[Any]) -> pd.DataFrame:
+    """The template's rooms for every owner as one frame (built once, then tiled)."""
+    base = template.rooms()
+    k = len(owner_ids)
+    return pd.DataFrame({
+        "owner_id": np.repeat(np.asarray(owner_ids), len(base)),
+        "room_no": np.tile(base["room_no"].to_numpy(), k),
+        "type": np.tile(base["type"].to_numpy(), k),
+        "capacity": np.tile(base["capacity"].to_numpy(), k),
+        "occupied": 0,
+    })
+
+
+def provision_rooms(owner_ids: Iterable[Any], template: RoomTemplate = DEFAULT_TEMPLATE) -> List[Any]:
+    """
+    Give every owner without rooms the template's inventory, in one build and
+    one create_many (a single id block; each owner's partition is appended to
+    once). Owners that already have rooms are skipped. Returns the owners
+    that got rooms.
+    """
+    owners = list(dict.fromkeys(o for o in owner_ids if o is not None))
+    fresh = [o for o in owners if rooms_store.list_for_owner(o).empty]
+    if fresh:
+        rooms_store.create_many(build_rooms(template, fresh))
+    return fresh
+
+
+def generate_default_rooms(owner_id=None, template: RoomTemplate = DEFAULT_TEMPLATE) -> bool:
+    """
+    Create the template's rooms (default: 01–50 Triple, 51–100 Double) for one owner.
     Returns True if created, False if this owner already has rooms.
     """
-    # Load all rooms
-    df = rooms_store.list_all().copy()
-    # Ensure owner_id column exists even in legacy CSVs
-    if "owner_id" not in df.columns:
-        df["owner_id"] = None
-
-    # If this owner already has rooms, skip
-    if owner_id is not None and not df[df["owner_id"] == owner_id].empty:
-        return False
-
-    # Build rows for this owner only
-    rows = []
-    # 01–50 Triple
-    for i in range(1, 51):
-        rows.append({
-            "id": None,                  # let CSVStore/save_all keep order; id not required here
-            "owner_id": owner_id,
-            "room_no": f"{i:02d}",
-            "type": "Triple",
-            "capacity": TYPE_CAPACITY["Triple"],
-            "occupied": 0
-        })
-    # 51–100 Double
-    for i in range(51, 101):
-        rows.append({
-            "id": None,
-            "owner_id": owner_id,
-            "room_no": f"{i:02d}",
-            "type": "Double",
-            "capacity": TYPE_CAPACITY["Double"],
-            "occupied": 0
-        })
-
-    seed_df = pd.DataFrame(rows, columns=["id","owner_id","room_no","type","capacity","occupied"])
-
-    # Append to existing data without touching other owners’ rooms
-    combined = pd.concat([df, seed_df], ignore_index=True)
-
-    # Reassign IDs sequentially if needed
-    if "id" in combined.columns:
-        # Fill missing ids with incremental integers
-        if combined["id"].isna().any():
-            # Keep existing ids; assign new ones for NaNs
-            max_id = pd.to_numeric(combined["id"], errors="coerce").fillna(0).astype(int).max()
-            next_id = max_id + 1
-            new_ids = []
-            for val in combined["id"]:
-                if pd.isna(val) or str(val).strip() == "":
-                    new_ids.append(next_id)
-                    next_id += 1
-                else:
-                    new_ids.append(int(val))
-            combined["id"] = new_ids
-        combined["id"] = combined["id"].astype(int)
-
-    rooms_store.save_all(combined)
-    return True
+    return bool(provision_rooms([owner_id], template))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Give owners without rooms a room template.")
+    parser.add_argument("owner_ids", type=int, nargs="+")
+    parser.add_argument("--template", choices=sorted(TEMPLATES), default=DEFAULT_TEMPLATE.name)
+    args = parser.parse_args()
+    done = provision_rooms(args.owner_ids, TEMPLATES[args.template])
+    print(f"{args.template}: rooms created for {len(done)} owner(s), {len(args.owner_ids) - len(done)} skipped")
@@ -0,0 +1,21 @@
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+log = logging.getLogger(__name__)
+
+
+@contextmanager
+def all_or_nothing() -> Iterator[List[Callable[[], None]]]:
+    """Collects a compensating write after each step; if a later step raises,
+    they are replayed newest first and the error propagates."""
+    undo: List[Callable[[], None]] = []
+    try:
+        yield undo
+    except BaseException:
+        for step in reversed(undo):
+            try:
+                step()
+            except Exception:
+                log.exception("could not undo a step of a failed write")
+        raise
@@ -1,5 +1,6 @@
 import streamlit as st
-from ..services.auth_service import users_store
+from ..services.auth_service import users_store, OWNER
+from ..services.data_store import DuplicateKeyError
 import hashlib
 
 def hash_password(password: str) -> str:
@@ -22,20 +23,23 @@ def show_signup():
                 st.error("All fields are required")
                 return
 
-            # Duplicate email check (case-insensitive)
-            df = users_store.list_all()
-            if "email" in df.columns:
-                if (df["email"].str.lower() == email_norm).any():
-                    st.error("An account with this email already exists.")
-                    return
+            # Duplicate email check (case-insensitive, O(1) via the email index)
+            if users_store.exists("email", email_norm):
+                st.error("An account with this email already exists.")
+                return
 
-            # New users are admins by requirement
-            users_store.create({
-                "name": name,
-                "email": email_norm,
-                "password": hash_password(pwd),
-                "role": "admin",     # ✅ make every new signup an admin
-            })
+            # New users own their hostel; the admin role is granted separately
+            try:
+                users_store.create({
+                    "name": name,
+                    "email": email_norm,
+                    "password": hash_password(pwd),
+                    "role": OWNER,       # ✅ admin pages need an explicitly granted role
+                })
+            except DuplicateKeyError:
+                # someone signed up with this email a moment ago
+                st.error("An account with this email already exists.")
+                return
             st.success("Account created successfully! Please login.")
 
 def show_login():
@@ -49,21 +53,17 @@ def show_login():
             email_norm = (email or "").strip().lower()
             pwd = (password or "").strip()
 
-            df = users_store.list_all()
-            if "email" in df.columns:
-                df = df.copy()
-                # normalize email column for comparison
-                df["__email_norm__"] = df["email"].astype(str).str.lower()
-                hashed = hash_password(pwd)
-
-                user = df[(df["__email_norm__"] == email_norm) & (df["password"] == hashed)]
+            if "email" in users_store.columns:
+                # hash-index lookup on the normalized email, then check the password
+                user = users_store.find_by("email", email_norm)
+                user = user[user["password"] == hash_password(pwd)]
 
                 if not user.empty:
                     st.session_state["user"] = {
                         "id": int(user.iloc[0]["id"]),
                         "name": user.iloc[0]["name"],
                         "email": user.iloc[0]["email"],
-                        "role": user.iloc[0].get("role", "admin"),  # ✅ keep role in session
+                        "role": user.iloc[0]["role"],  # ✅ keep role in session (NA for legacy accounts)
                     }
                     st.success(f"Welcome, {user.iloc[0]['name']}!")
                     st.rerun()
@@ -2,141 +2,55 @@ import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
 from ..services.booking_service import bookings_store
-from ..services.student_service import students_store
-from ..services.room_service import rooms_store
-from ..utils.lookup import id_to_label
+from ..services.data_store import ConflictError
+from ..services.availability_service import availability
+from ..services.batch_service import BatchError
+from ..services.booking_batch_service import booking_ops
+from ..services.lookup_service import student_labels, room_labels
+from ..services.snapshot_service import load_snapshot
+from ..services.search_service import student_search
+from ..services.allocation_service import allocate_students
+from ..services.room_service import TYPE_PRICE
+from ..utils.editor import editor_delta, apply_delta, has_pending_edits
+from ..utils import perf
 
 STATUS_OPTS = ["active", "completed", "cancelled"]
 
-# ---------- helpers: scoped merge & occupancy ----------
+# ---------- helpers ----------
 
-def _save_scoped(df_full: pd.DataFrame, df_my: pd.DataFrame, owner_id: int, store) -> None:
-    """Merge only the current user's edits back into the full CSV."""
-    if df_full is None:
-        df_full = pd.DataFrame()
-    if df_my is None:
-        df_my = pd.DataFrame()
-
-    if df_full.empty and df_my.empty:
-        store.save_all(pd.DataFrame(columns=getattr(store, "columns", [])))
-        return
-
-    df_full = df_full.copy()
-    df_my = df_my.copy()
-
-    if "owner_id" not in df_full.columns:
-        df_full["owner_id"] = None
-    if "owner_id" not in df_my.columns:
-        df_my["owner_id"] = owner_id
-
-    others = df_full[df_full["owner_id"] != owner_id]
-    merged = pd.concat([others, df_my], ignore_index=True)
-    store.save_all(merged)
-
-def _available_beds_per_room_scoped(r_my: pd.DataFrame, b_my: pd.DataFrame) -> dict[int, int]:
-    """Available beds = capacity - active bookings (for this owner only). Safe with missing cols."""
-    avail: dict[int, int] = {}
-    if r_my is None or r_my.empty:
-        return avail
-
-    # default: no active counts
-    counts: dict = {}
-
-    if b_my is not None and not b_my.empty:
-        tmp = b_my.copy()
-        if "status" not in tmp.columns:
-            tmp["status"] = ""
-        if "room_id" not in tmp.columns:
-            tmp["room_id"] = None
-
-        tmp["status"] = tmp["status"].astype(str).str.lower()
-        tmp["room_id"] = pd.to_numeric(tmp["room_id"], errors="coerce")
-        tmp = tmp[(tmp["status"] == "active") & (~tmp["room_id"].isna())]
-
-        if not tmp.empty:
-            counts = tmp.groupby("room_id")["room_id"].count().astype(int).to_dict()
-
-    for _, r in r_my.iterrows():
-        rid = int(pd.to_numeric(r.get("id", 0), errors="coerce") or 0)
-        cap = int(pd.to_numeric(r.get("capacity", 0), errors="coerce") or 0)
-        occ = int(counts.get(rid, 0))
-        avail[rid] = max(cap - occ, 0)
-    return avail
-
-def _recompute_room_occupancy_scoped(owner_id: int):
-    """Recompute rooms.occupied only for this user's rooms using this user's ACTIVE bookings."""
-    r_full = rooms_store.list_all().copy()
-    b_full = bookings_store.list_all().copy()
-
-    for df in (r_full, b_full):
-        if "owner_id" not in df.columns:
-            df["owner_id"] = None
-
-    r_my = r_full[r_full["owner_id"] == owner_id].copy()
-    b_my = b_full[b_full["owner_id"] == owner_id].copy()
-
-    if r_my.empty:
-        return
-
-    # Ensure columns exist
-    if "status" not in b_my.columns:
-        b_my["status"] = ""
-    if "room_id" not in b_my.columns:
-        b_my["room_id"] = None
-
-    if b_my.empty:
-        r_my["occupied"] = 0
-    else:
-        tmp = b_my.copy()
-        tmp["status"] = tmp["status"].astype(str).str.lower()
-        tmp["room_id"] = pd.to_numeric(tmp["room_id"], errors="coerce")
-        tmp = tmp[(tmp["status"] == "active") & (~tmp["room_id"].isna())]
-
-        if tmp.empty:
-            r_my["occupied"] = 0
-        else:
-            occ = tmp.groupby("room_id")["room_id"].count().rename("occ")
-            r_my = r_my.merge(occ, how="left", left_on="id", right_index=True)
-            r_my["occ"] = r_my["occ"].fillna(0).astype(int)
-            # keep capacity numeric
-            r_my["capacity"] = pd.to_numeric(r_my["capacity"], errors="coerce").fillna(0).astype(int)
-            r_my["occupied"] = r_my[["occ", "capacity"]].min(axis=1)
-            r_my.drop(columns=["occ"], inplace=True)
-
-    _save_scoped(r_full, r_my, owner_id, rooms_store)
+def _clean_bookings(rows: pd.DataFrame) -> pd.DataFrame:
+    """Check edited/added booking statuses (the store types the rest): a blank
+    one on a new row means "active", anything unknown is refused."""
+    if "status" not in rows.columns:
+        return rows
+    status = rows["status"].where(rows["status"].notna() & (rows["status"].astype(str).str.strip() != ""))
+    bad = status.notna() & ~status.isin(STATUS_OPTS)
+    if bad.any():
+        shown = ", ".join(sorted({repr(s) for s in status[bad]}))
+        raise ValueError(f"Unknown status {shown}; use one of: {', '.join(STATUS_OPTS)}.")
+    return rows.assign(status=status.fillna("active"))
 
 # ---------- main view ----------
 
+@perf.timed("view.bookings")
 def show_bookings():
     st.subheader("Bookings")
 
     uid = int(st.session_state["user"]["id"])
 
-    # Load full CSVs
-    s_full = students_store.list_all()
-    r_full = rooms_store.list_all()
-    b_full = bookings_store.list_all()
-
-    # Ensure owner_id exists on all
-    for df in (s_full, r_full, b_full):
-        if "owner_id" not in df.columns:
-            df["owner_id"] = None
+    # ✅ my students, rooms and bookings as of one moment (read in parallel)
+    snap = load_snapshot(uid, ("students", "rooms", "bookings"))
 
-    # Scope to current user
-    s_df = s_full[s_full["owner_id"] == uid].copy()
-    r_df = r_full[r_full["owner_id"] == uid].copy()
-    b_df = b_full[b_full["owner_id"] == uid].copy()
+    # Friendly maps (cached per owner, pinned to the snapshot)
+    student_map = student_labels.labels(uid, at=snap)
+    room_map = room_labels.labels(uid, at=snap)
 
-    if s_df.empty or r_df.empty:
+    if not student_map or not room_map:
         st.info("Please add at least one Student and one Room before creating bookings.")
         st.stop()
 
-    # Friendly maps
-    student_map = id_to_label(s_df, "id", "name")
-    room_map = id_to_label(r_df, "id", "room_no")
-
     # Availability (mine)
-    avail_map = _available_beds_per_room_scoped(r_df, b_df)
+    avail_map = availability(uid, at=snap).by_room
 
     # ---------- Create booking (closed by default) ----------
     if "show_booking_form" not in st.session_state:
@@ -148,14 +62,17 @@ def show_bookings():
             st.rerun()
     else:
         with st.expander("New Booking", expanded=True):
+            # 🔎 type-ahead (outside the form so it updates as you type): top matches only
+            s_query = st.text_input("Find student (name, email, phone or course)", key="booking_student_search")
+            s_choices = student_search.choices(uid, s_query)
             with st.form("add_booking_form", clear_on_submit=True):
                 c1, c2 = st.columns(2)
 
                 # Student selection
                 student_id = c1.selectbox(
                     "Student",
-                    list(student_map.keys()),
-                    format_func=lambda k: f"{k} - {student_map.get(k,'')}"
+                    list(s_choices.keys()),
+                    format_func=lambda k: f"{k} - {s_choices.get(k,'')}"
                 )
 
                 # Room label shows availability: "07 (avail: 2)"
@@ -172,34 +89,24 @@ def show_bookings():
 
                 submitted = st.form_submit_button("Create")
                 if submitted:
-                    if end_date < start_date:
+                    if student_id is None:
+                        st.error("No student matches that search.")
+                    elif end_date < start_date:
                         st.error("End Date cannot be before Start Date.")
                     else:
-                        # Re-read latest and re-scope to avoid race conditions
-                        r_full_latest = rooms_store.list_all()
-                        b_full_latest = bookings_store.list_all()
-                        if "owner_id" not in r_full_latest.columns: r_full_latest["owner_id"] = None
-                        if "owner_id" not in b_full_latest.columns: b_full_latest["owner_id"] = None
-                        r_my_latest = r_full_latest[r_full_latest["owner_id"] == uid].copy()
-                        b_my_latest = b_full_latest[b_full_latest["owner_id"] == uid].copy()
-
-                        # Capacity check only for ACTIVE
-                        if status == "active":
-                            latest_avail = _available_beds_per_room_scoped(r_my_latest, b_my_latest).get(int(room_id), 0)
-                            if latest_avail <= 0:
-                                st.error("Selected room is at full capacity for ACTIVE bookings.")
-                                st.stop()
-
-                        # Create (tag owner)
-                        bookings_store.create({
-                            "owner_id": uid,
-                            "student_id": int(student_id),
-                            "room_id": int(room_id),
-                            "start_date": str(start_date),
-                            "end_date": str(end_date),
-                            "status": status,
-                        })
-                        _recompute_room_occupancy_scoped(uid)
+                        # Checked under my bookings lock: ACTIVE bookings need a free bed
+                        # over the requested dates (future and back-to-back stays are fine)
+                        try:
+                            booking_ops.create_bookings(uid, [{
+                                "student_id": int(student_id),
+                                "room_id": int(room_id),
+                                "start_date": start_date,
+                                "end_date": end_date,
+                                "status": status,
+                            }])
+                        except BatchError as e:
+                            st.error("; ".join(msg for _, msg in e.problems).capitalize() + ".")
+                            st.stop()
                         st.success("Booking created!")
                         st.session_state.show_booking_form = False
                         st.rerun()
@@ -208,12 +115,49 @@ def show_bookings():
             st.session_state.show_booking_form = False
             st.rerun()
 
+    # ---------- Auto-allocate (many students at once) ----------
+    with st.expander("🧮 Auto-allocate unassigned students", expanded=False):
+        with st.form("auto_allocate_form"):
+            a1, a2 = st.columns(2)
+            a_start = a1.date_input("Start Date", value=date.today(), key="alloc_start")
+            a_end = a2.date_input("End Date", value=date.today() + timedelta(days=180), key="alloc_end")
+            a3, a4 = st.columns(2)
+            a_type = a3.selectbox("Preferred room type", ["Any"] + list(TYPE_PRICE.keys()))
+            a_budget = a4.number_input("Budget per student (₹, 0 = no limit)", min_value=0, value=0, step=5000)
+            same_gender = st.checkbox("Keep rooms single-gender", value=True)
+            by_course = st.checkbox("Group students of the same course", value=False)
+            p1, p2 = st.columns(2)
+            preview = p1.form_submit_button("Preview")
+            commit = p2.form_submit_button("Allocate & create bookings", type="primary")
+
+        if preview or commit:
+            if a_end <= a_start:
+                st.error("End Date must be after Start Date.")
+            else:
+                plan = allocate_students(
+                    uid, a_start, a_end, dry_run=not commit,
+                    same_gender=same_gender, group_by_course=by_course,
+                    room_type=None if a_type == "Any" else a_type,
+                    budget=float(a_budget) or None,
+                )
+                if commit:
+                    st.success(f"Created {len(plan.created_ids)} bookings.")
+                else:
+                    st.info(f"{len(plan.assignments)} student(s) would be placed.")
+                if not plan.assignments.empty:
+                    st.dataframe(plan.assignments, width=True, hide_index=True)
+                if not plan.unassigned.empty:
+                    st.warning(f"{len(plan.unassigned)} student(s) could not be placed:")
+                    st.dataframe(plan.unassigned, width=True, hide_index=True)
+
     # ---------- All Bookings (editable, scoped) ----------
     st.write("### My Bookings (editable)")
-    b_full_now = bookings_store.list_all()
-    if "owner_id" not in b_full_now.columns:
-        b_full_now["owner_id"] = None
-    b_df = b_full_now[b_full_now["owner_id"] == uid].copy()
+    b_version = snap.versions["bookings"]
+    b_df = snap["bookings"]
+
+    # Edits are checked against the version the table had when editing began
+    if not has_pending_edits(st.session_state.get("bookings_editor")):
+        st.session_state["bookings_editor_version"] = b_version
 
     # Friendly display
     if not b_df.empty:
@@ -224,24 +168,25 @@ def show_bookings():
     else:
         b_show = b_df
 
-    edited = st.data_editor(b_show, key="bookings_editor", num_rows="dynamic", use_container_width=True)
+    st.data_editor(b_show, key="bookings_editor", num_rows="dynamic", use_container_width=True)
 
     if st.button("💾 Save booking changes", type="primary"):
-        # Convert back to storage format (drop friendly cols)
-        if not edited.empty:
-            save_df = edited.drop(columns=[c for c in ["student_name", "room_no"] if c in edited.columns]).copy()
-            for col in ["id", "student_id", "room_id"]:
-                if col in save_df.columns:
-                    save_df[col] = pd.to_numeric(save_df[col], errors="coerce").fillna(0).astype(int)
-            if "status" in save_df.columns:
-                save_df["status"] = save_df["status"].where(save_df["status"].isin(STATUS_OPTS), "active")
+        # Only the rows touched in the editor are written (friendly cols are dropped);
+        # occupancy is updated for the rooms those rows point at
+        delta = editor_delta(b_show, st.session_state.get("bookings_editor"), bookings_store.columns)
+        try:
+            apply_delta(bookings_store, uid, delta,
+                        expected_version=st.session_state.get("bookings_editor_version"),
+                        validate=_clean_bookings)
+        except ConflictError:
+            st.session_state.pop("bookings_editor", None)
+            st.error("Bookings were changed in another session. Reload and re-apply your edits.")
+        except ValueError as e:
+            # nothing was written; the edits stay in the editor to be fixed
+            st.error(str(e))
         else:
-            save_df = edited
-
-        # Merge only my changes back
-        _save_scoped(bookings_store.list_all(), save_df, uid, bookings_store)
-        _recompute_room_occupancy_scoped(uid)
-        st.success("Saved changes.")
+            st.session_state.pop("bookings_editor", None)
+            st.success(f"Saved {delta.size} change(s)." if delta.size else "Nothing to save.")
 
     # ---------- Delete (scoped) ----------
     st.write("### Delete Booking by ID (yours only)")
@@ -249,14 +194,9 @@ def show_bookings():
     if st.button("🗑️ Delete"):
         try:
             bid = int(did)
-            b_full_now = bookings_store.list_all()
-            if "owner_id" not in b_full_now.columns:
-                b_full_now["owner_id"] = None
-            row = b_full_now[b_full_now["id"] == bid]
-            if not row.empty and int(row.iloc[0].get("owner_id", -1)) == uid:
-                b_full_now = b_full_now[b_full_now["id"] != bid]
-                bookings_store.save_all(b_full_now)
-                _recompute_room_occupancy_scoped(uid)
+            b_my_now = bookings_store.list_for_owner(uid)
+            if (b_my_now["id"] == bid).any():
+                bookings_store.delete_by_id(bid, owner_id=uid)
                 st.success(f"Deleted booking with id={bid}")
                 st.rerun()
             else:
@@ -1,82 +1,67 @@
 import streamlit as st
-from ..services.room_service import rooms_store
-from ..services.student_service import students_store
-from ..services.booking_service import bookings_store
+from ..services.metrics_service import metrics
+from ..services.room_service import ROOM_TYPES
+from ..utils import perf
 
+@perf.timed("view.dashboard")
 def show_dashboard():
     st.title("🏨 Welcome to the Hostel")
 
     # Logged-in user
     uid = int(st.session_state["user"]["id"])
 
-    # Fetch & scope to current user (safe if old CSVs miss owner_id)
-    students = students_store.list_all()
-    rooms = rooms_store.list_all()
-    bookings = bookings_store.list_all()
+    # Materialized figures for this user (kept up to date on every write;
+    # the raw tables are not read here)
+    summary = metrics.summary(uid)
 
-    for df in (students, rooms, bookings):
-        if "owner_id" not in df.columns:
-            df["owner_id"] = None
-
-    students = students[students["owner_id"] == uid].copy()
-    rooms    = rooms[rooms["owner_id"] == uid].copy()
-    bookings = bookings[bookings["owner_id"] == uid].copy()
-
-    total_rooms = len(rooms)
+    total_rooms = summary.total_rooms
 
     # ---- Vacant beds overall
-    if not rooms.empty:
-        rooms["capacity"] = rooms["capacity"].fillna(0).astype(int)
-        rooms["occupied"] = rooms["occupied"].fillna(0).astype(int)
-        vacant_beds = int((rooms["capacity"] - rooms["occupied"]).clip(lower=0).sum())
-    else:
-        vacant_beds = 0
+    vacant_beds = summary.vacant_beds
 
     st.write(f"### Total Rooms Available: **{total_rooms}**")
 
     st.write("---")
     st.subheader("Room Segments Available")
 
-    col1, col2 = st.columns(2)
-    with col1:
-        st.info("""
-        **2-Sharing Room**
-        - Capacity: 2 Students
-        - Fee: **₹50,000** / 6 months
-        """)
-    with col2:
-        st.info("""
-        **3-Sharing Room**
-        - Capacity: 3 Students
-        - Fee: **₹40,000** / 6 months
+    # one card per room type (ROOM_TYPES is where types, beds and fees are defined)
+    for col, (name, room_type) in zip(st.columns(len(ROOM_TYPES)), ROOM_TYPES.items()):
+        col.info(f"""
+        **{room_type.capacity}-Sharing Room ({name})**
+        - Capacity: {room_type.capacity} Students
+        - Fee: **₹{room_type.price:,}** / 6 months
         """)
 
     st.write("---")
 
     # ---- Top metrics (now includes Vacant Beds)
     colA, colB, colC, colD = st.columns(4)
-    colA.metric("Total Students", len(students))
+    colA.metric("Total Students", summary.total_students)
     colB.metric("Total Rooms", total_rooms)
-    colC.metric("Active Bookings",
-                int((bookings["status"] == "active").sum()) if not bookings.empty else 0)
+    colC.metric("Active Bookings", summary.active_bookings)
     colD.metric("Vacant Beds", vacant_beds)
 
     # ---- Optional: segment-wise vacancy
     st.caption("Vacancy by segment")
-    seg = rooms.copy()
-    if not seg.empty:
-        seg["vacant"] = (seg["capacity"] - seg["occupied"]).clip(lower=0)
-        v2 = int(seg.loc[seg["type"] == "Double", "vacant"].sum())
-        v3 = int(seg.loc[seg["type"] == "Triple", "vacant"].sum())
-        s1, s2 = st.columns(2)
-        s1.metric("Double (2-share) vacant", v2)
-        s2.metric("Triple (3-share) vacant", v3)
+    if total_rooms:
+        # known types first, then any other type rooms were given
+        types = list(ROOM_TYPES) + sorted(t for t in summary.vacancy_by_type if t not in ROOM_TYPES)
+        for col, name in zip(st.columns(len(types)), types):
+            share = f" ({ROOM_TYPES[name].capacity}-share)" if name in ROOM_TYPES else ""
+            col.metric(f"{name}{share} vacant", summary.vacancy_by_type.get(name, 0))
 
     st.write("---")
 
     # ---- Recent tables
     st.write("### Recent Students")
-    st.dataframe(students.tail(5), width=True)
+    st.dataframe(summary.recent_students, width=True)
 
     st.write("### Recent Bookings")
-    st.dataframe(bookings.tail(5), width=True)
+    st.dataframe(summary.recent_bookings, width=True)
+
+    if st.button("🔄 Recount dashboard figures"):
+        drift = metrics.rebuild(uid)
+        if drift:
+            st.warning(f"Corrected: {', '.join(drift)}.")
+        else:
+            st.success("Dashboard figures match the data.")
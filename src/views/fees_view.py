@@ -1,58 +1,27 @@
 import streamlit as st
 from datetime import date
 from ..services.fee_service import fees_store
-from ..services.booking_service import bookings_store
-from ..services.student_service import students_store
-from ..utils.lookup import id_to_label
-import pandas as pd
-
-# --- helper: safe merge so we only update current user's rows ---
-def _save_scoped(df_full: pd.DataFrame, df_my: pd.DataFrame, owner_id: int, store) -> None:
-    if "owner_id" not in df_full.columns:
-        df_full["owner_id"] = None
-    if "owner_id" not in df_my.columns:
-        df_my["owner_id"] = owner_id
-    others = df_full[df_full["owner_id"] != owner_id]
-    store.save_all(pd.concat([others, df_my], ignore_index=True))
-
-def _recompute_room_occupancy_scoped(owner_id: int):
-    from ..services.room_service import rooms_store
-    r_full = rooms_store.list_all().copy()
-    b_full = bookings_store.list_all().copy()
-
-    # Ensure columns exist
-    if "owner_id" not in r_full.columns: r_full["owner_id"] = None
-    if "owner_id" not in b_full.columns: b_full["owner_id"] = None
-
-    r_my = r_full[r_full["owner_id"] == owner_id].copy()
-    b_my = b_full[b_full["owner_id"] == owner_id].copy()
-
-    if r_my.empty:
-        return
-
-    if b_my.empty:
-        r_my["occupied"] = 0
-    else:
-        active = b_my[b_my.get("status", "").eq("active")]
-        occ = active.groupby("room_id")["id"].count().rename("occ")
-        r_my = r_my.merge(occ, how="left", left_on="id", right_index=True)
-        r_my["occ"] = r_my["occ"].fillna(0).astype(int)
-        r_my["occupied"] = r_my[["occ", "capacity"]].min(axis=1)
-        r_my.drop(columns=["occ"], inplace=True)
-
-    _save_scoped(r_full, r_my, owner_id, rooms_store)
-
+from ..services.data_store import ConflictError
+from ..services.lookup_service import student_labels
+from ..services.snapshot_service import load_snapshot
+from ..services.search_service import student_search
+from ..services.batch_service import BatchError
+from ..services.booking_batch_service import booking_ops
+from ..services.ledger_service import ledger
+from ..utils.editor import editor_delta, apply_delta, has_pending_edits
+from ..utils import perf
+
+@perf.timed("view.fees")
 def show_fees():
     st.subheader("Fees")
 
     uid = int(st.session_state["user"]["id"])
 
+    # ✅ my students and fees as of one moment (read in parallel)
+    snap = load_snapshot(uid, ("students", "fees"))
+
     # ----- Students: only mine -----
-    s_df_full = students_store.list_all()
-    if "owner_id" not in s_df_full.columns:
-        s_df_full["owner_id"] = None
-    s_df = s_df_full[s_df_full["owner_id"] == uid].copy()
-    student_map = id_to_label(s_df, "id", "name")
+    student_map = student_labels.labels(uid, at=snap)
 
     # ---- Special Payment flow from Rooms (pending booking) ----
     pending = st.session_state.get("pending_booking")
@@ -61,35 +30,36 @@ def show_fees():
             f"Payment for Room **{pending['room_no']}** ({pending['room_type']}) — "
             f"₹{int(pending['amount'])} for 6 months"
         )
+        # 🔎 type-ahead (outside the form so it updates as you type): top matches only
+        s_query = st.text_input("Find student (name, email, phone or course)", key="pay_student_search")
+        s_choices = student_search.choices(uid, s_query)
         with st.form("pay_now_form", clear_on_submit=True):
             student_id = st.selectbox(
                 "Select Student",
-                options=list(student_map.keys()),
-                format_func=lambda k: f"{k} - {student_map.get(k, '')}"
+                options=list(s_choices.keys()),
+                format_func=lambda k: f"{k} - {s_choices.get(k, '')}"
             )
             amount = st.number_input("Amount", min_value=0, value=int(pending["amount"]), step=500)
             paid_on = st.date_input("Paid On", value=date.today())
             submitted = st.form_submit_button("Confirm Payment & Create Booking")
-            if submitted:
-                # 1) record fee as paid (scoped to this owner)
-                fees_store.create({
-                    "owner_id": uid,                       # 👈 tag owner
-                    "student_id": int(student_id),
-                    "month": str(paid_on)[:7],
-                    "amount": float(amount),
-                    "paid_on": str(paid_on),
-                    "status": "paid",
-                })
-                # 2) create booking (scoped to this owner)
-                bookings_store.create({
-                    "owner_id": uid,                       # 👈 tag owner
-                    "student_id": int(student_id),
-                    "room_id": int(pending["room_id"]),
-                    "start_date": pending["start_date"],
-                    "end_date": pending["end_date"],
-                    "status": "active",
-                })
-                _recompute_room_occupancy_scoped(uid)
+            if submitted and student_id is None:
+                st.error("No student matches that search.")
+            elif submitted:
+                # Fee + booking in one checked batch: the bed must be free for the
+                # whole stay, and either both rows are written or neither is
+                try:
+                    booking_ops.pay_and_book(uid, [{
+                        "student_id": int(student_id),
+                        "room_id": int(pending["room_id"]),
+                        "start_date": pending["start_date"],
+                        "end_date": pending["end_date"],
+                        "amount": float(amount),
+                        "paid_on": paid_on,
+                    }])
+                except BatchError as e:
+                    # the student, room or beds may have changed since the booking form
+                    st.error("; ".join(msg for _, msg in e.problems).capitalize() + ".")
+                    st.stop()
                 del st.session_state["pending_booking"]
                 st.success("Payment recorded and booking created!")
                 st.session_state["nav_choice"] = "Bookings"
@@ -101,19 +71,55 @@ def show_fees():
             st.rerun()
         st.write("---")
 
+    # ---- Ledger: what each student owes vs what they paid ----
+    with st.expander("📒 Dues & Collections", expanded=False):
+        balances = ledger.balances(uid)
+        overdue = ledger.overdue(uid)
+        collections = ledger.collections(uid)
+        l1, l2, l3 = st.columns(3)
+        l1.metric("Outstanding", f"₹{balances['balance'].clip(lower=0).sum():,.0f}")
+        l2.metric("Students overdue", len(overdue))
+        l3.metric("Collected (all time)", f"₹{collections['amount'].sum():,.0f}")
+
+        st.write("**Overdue**")
+        if overdue.empty:
+            st.caption("Nobody is overdue.")
+        else:
+            st.dataframe(overdue.assign(student=overdue["student_id"].map(student_map)),
+                         use_container_width=True, hide_index=True)
+
+        st.write("**Balances**")
+        owing = balances[balances["balance"] != 0]
+        st.dataframe(owing.assign(student=owing["student_id"].map(student_map)),
+                     use_container_width=True, hide_index=True)
+
+        st.write("**Collections by month**")
+        if not collections.empty:
+            st.bar_chart(collections.set_index("month")["amount"])
+
     # ---- Regular Fees list (editable, only mine) ----
     st.write("### My Fees (editable)")
-    f_full = fees_store.list_all()
-    if "owner_id" not in f_full.columns:
-        f_full["owner_id"] = None
-    f_df = f_full[f_full["owner_id"] == uid].copy()
+    f_version = snap.versions["fees"]
+    f_df = snap["fees"]
+
+    # Edits are checked against the version the table had when editing began
+    if not has_pending_edits(st.session_state.get("fees_editor")):
+        st.session_state["fees_editor_version"] = f_version
 
-    edited = st.data_editor(f_df, key="fees_editor", num_rows="dynamic", use_container_width=True)
+    st.data_editor(f_df, key="fees_editor", num_rows="dynamic", use_container_width=True)
 
     if st.button("💾 Save fee changes", type="primary"):
-        # Merge only my edits back to the full CSV
-        _save_scoped(f_full, edited, uid, fees_store)
-        st.success("Saved changes.")
+        # Only the rows touched in the editor are written, unless someone changed my fees meanwhile
+        delta = editor_delta(f_df, st.session_state.get("fees_editor"), fees_store.columns)
+        try:
+            # ids, amounts and dates are typed by the store's schema
+            apply_delta(fees_store, uid, delta, expected_version=st.session_state.get("fees_editor_version"))
+        except ConflictError:
+            st.session_state.pop("fees_editor", None)
+            st.error("Fees were changed in another session. Reload and re-apply your edits.")
+        else:
+            st.session_state.pop("fees_editor", None)
+            st.success(f"Saved {delta.size} change(s)." if delta.size else "Nothing to save.")
 
     st.write("### Delete Fee by ID (yours only)")
     did = st.text_input("Enter Fee ID", value="", key="fee_delete")
@@ -121,13 +127,9 @@ def show_fees():
         try:
             fid = int(did)
             # allow delete only if the row belongs to current user
-            f_full = fees_store.list_all()
-            if "owner_id" not in f_full.columns:
-                f_full["owner_id"] = None
-            row = f_full[f_full["id"] == fid]
-            if not row.empty and int(row.iloc[0].get("owner_id", -1)) == uid:
-                f_full = f_full[f_full["id"] != fid]
-                fees_store.save_all(f_full)
+            f_my = fees_store.list_for_owner(uid)
+            if (f_my["id"] == fid).any():
+                fees_store.delete_by_id(fid, owner_id=uid)
                 st.success(f"Deleted fee record with id={fid}")
                 st.rerun()
             else:
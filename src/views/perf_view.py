@@ -0,0 +1,61 @@
+import streamlit as st
+import pandas as pd
+from ..services.auth_service import is_admin
+from ..utils import perf
+from ..utils.locks import store_metrics
+
+
+def _table(metrics: dict, index: str) -> pd.DataFrame:
+    df = pd.DataFrame.from_dict(metrics, orient="index")
+    df.index.name = index
+    return df.reset_index()
+
+
+def show_performance():
+    st.title("⏱️ Performance")
+
+    # 🔒 process-wide figures (every hostel on this server), so admins only
+    if not is_admin(st.session_state["user"]):
+        st.error("Only admins can view performance data.")
+        return
+
+    on = st.toggle("Record timings", value=perf.enabled(),
+                   help=f"Start the server with {perf.ENV}=1 to record from startup, "
+                        f"and {perf.EXPORT_ENV}=<file> to append every span to a JSONL file.")
+    if on != perf.enabled():
+        perf.enable(on)
+        st.rerun()
+
+    spans = perf.span_metrics()
+    if not spans:
+        st.info("No timings recorded yet. Switch recording on and use the app.")
+    else:
+        # ---- Spans: slowest total time first
+        st.subheader("Spans")
+        df = _table(spans, "span").sort_values("total_ms", ascending=False)
+        st.dataframe(df, hide_index=True, use_container_width=True, column_config={
+            c: st.column_config.NumberColumn(format="%.2f") for c in ("p50_ms", "p90_ms", "p99_ms", "max_ms", "total_ms")
+        })
+
+    caches = perf.cache_metrics()
+    if caches:
+        st.subheader("Cache hit rates")
+        st.dataframe(_table(caches, "cache").sort_values("cache"), hide_index=True, use_container_width=True,
+                     column_config={"hit_rate": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)})
+
+    locks = store_metrics()
+    if locks:
+        st.subheader("Locks & conflicts")
+        st.dataframe(_table(locks, "store"), hide_index=True, use_container_width=True)
+
+    recent = perf.recent_spans()
+    if recent:
+        with st.expander(f"🧾 Latest {len(recent)} spans"):
+            st.dataframe(pd.DataFrame(recent[::-1]), hide_index=True, use_container_width=True)
+
+    c1, c2 = st.columns(2)
+    c1.download_button("⬇️ Export spans (JSONL)", perf.to_jsonl(recent), file_name="spans.jsonl",
+                       mime="application/jsonl", disabled=not recent)
+    if c2.button("Reset"):
+        perf.reset()
+        st.rerun()
@@ -1,10 +1,32 @@
+import html
 import streamlit as st
-from ..services.room_service import rooms_store
-from ..utils.seed_rooms import generate_default_rooms  # make sure it accepts owner_id
+from ..services.room_service import TYPE_PRICE
+from ..services.occupancy_service import occupancy
+from ..services.availability_service import availability, filter_rooms, page_of
+from ..utils.seed_rooms import generate_default_rooms, TEMPLATES
+from ..utils import perf
 
-TYPE_CAPACITY = {"Double": 2, "Triple": 3}
-TYPE_PRICE   = {"Double": 50000, "Triple": 40000}  # per 6 months
+PAGE_SIZES = [24, 48, 96, 200]
+MAP_COLOURS = {"free": "#2e7d32", "partial": "#f9a825", "full": "#c62828"}
 
+def _room_map_html(rows) -> str:
+    """Compact colour-coded tiles for one page of rooms (a single markdown element)."""
+    state = ["full" if a <= 0 else "free" if o == 0 else "partial"
+             for a, o in zip(rows["available"].tolist(), rows["occupied"].tolist())]
+    tiles = "".join(
+        f'<div title="{t} · {o}/{c} occupied" style="background:{MAP_COLOURS[s]};color:#fff;'
+        f'border-radius:4px;padding:4px 0;text-align:center;font-size:0.8rem">{no}<br>{o}/{c}</div>'
+        for no, t, o, c, s in zip(rows["room_no"].map(html.escape).tolist(), rows["type"].map(html.escape).tolist(),
+                                  rows["occupied"].tolist(), rows["capacity"].tolist(), state)
+    )
+    legend = " ".join(
+        f'<span style="color:{MAP_COLOURS[k]}">■</span> {label}'
+        for k, label in (("free", "empty"), ("partial", "partly taken"), ("full", "full"))
+    )
+    return (f'<div style="display:grid;grid-template-columns:repeat(auto-fill,minmax(56px,1fr));gap:4px">'
+            f'{tiles}</div><div style="font-size:0.8rem;margin-top:4px">{legend}</div>')
+
+@perf.timed("view.rooms")
 def show_rooms():
     st.subheader("Rooms")
 
@@ -12,58 +34,95 @@ def show_rooms():
     uid = int(st.session_state["user"]["id"])
 
     with st.expander("🏗️ One-time Setup", expanded=False):
-        st.caption("Generate a fixed inventory for YOUR hostel: 01–50 Triple (3-share), 51–100 Double (2-share).")
-        if st.button("Generate 100 Rooms (01–100) for Me"):
-            # ✅ ensure your seeder creates rows with owner_id=uid
-            created = generate_default_rooms(owner_id=uid)
+        st.caption("Generate a fixed inventory for YOUR hostel from a layout template.")
+        template = st.selectbox("Layout", list(TEMPLATES), format_func=lambda k: TEMPLATES[k].label or k,
+                                key="rooms_template")
+        if st.button("Generate Rooms for Me"):
+            # ✅ one batch write of the template's rooms, owned by uid
+            created = generate_default_rooms(owner_id=uid, template=TEMPLATES[template])
             if created:
                 st.success("Rooms generated for your account.")
             else:
                 st.info("You already have rooms. Skipped.")
             st.rerun()
 
+        st.caption("Occupancy follows bookings automatically. Re-count it from scratch if it ever looks off.")
+        if st.button("🔍 Verify / repair occupancy"):
+            fixed = occupancy.recompute(uid)
+            if fixed:
+                st.success(f"Corrected occupancy for {fixed} room(s).")
+            else:
+                st.info("Occupancy is consistent with bookings.")
+
     st.write("### My Rooms")
 
-    # ✅ show only this user's rooms
-    df = rooms_store.list_all()
-    if "owner_id" not in df.columns:
-        df["owner_id"] = None
-    df = df[df["owner_id"] == uid].copy()
+    # ✅ one vectorized pass over this user's rooms (memoized until a write)
+    grid = availability(uid).frame()
 
-    if df.empty:
-        st.info("No rooms for your account yet. Use the setup button above to generate your 100 rooms.")
+    if grid.empty:
+        st.info("No rooms for your account yet. Use the setup button above to generate your rooms.")
         return
 
-    # Capacity-aware “Book & Pay” button (hidden if full)
-    for _, row in df.iterrows():
-        with st.container():
-            cap = int(row.get("capacity", 0))
-            occ = int(row.get("occupied", 0))
-            available = max(cap - occ, 0)
-            price = TYPE_PRICE.get(str(row["type"]), 0)
+    # ---- Filters (applied server-side; only one page is ever rendered)
+    f1, f2, f3, f4 = st.columns([1.2, 1.2, 1, 1])
+    rtype = f1.selectbox("Type", ["All"] + sorted(grid["type"].unique().tolist()), key="rooms_type")
+    free = f2.selectbox("Availability", ["All", "Has free beds", "Full"], key="rooms_free")
+    room_from = f3.number_input("Room from", min_value=0, value=0, step=1, key="rooms_from")
+    room_to = f4.number_input("Room to", min_value=0, value=0, step=1, key="rooms_to",
+                              help="0 = no upper limit")
 
-            c1, c2, c3, c4, c5, c6 = st.columns([1.3, 1, 1, 1, 1.4, 1.2])
-            c1.write(f"**{row['room_no']}**")
-            c2.write(str(row["type"]))
-            c3.write(f"Cap: {cap}")
-            c4.write(f"Occ: {occ}")
+    shown = filter_rooms(
+        grid,
+        room_type=None if rtype == "All" else rtype,
+        min_free=1 if free == "Has free beds" else 0,
+        room_from=room_from or None,
+        room_to=room_to or None,
+    )
+    if free == "Full":
+        shown = shown[shown["available"] <= 0]
 
-            if available <= 0:
-                c5.write("**Status:** Full")
-                c6.button("Booked", key=f"full_{int(row['id'])}", disabled=True)
-            else:
-                c5.write(f"**Available:** {available}")
-                if c6.button(f"Book & Pay (₹{price})", key=f"book_{int(row['id'])}"):
-                    from datetime import date, timedelta
-                    st.session_state["pending_booking"] = {
-                        "owner_id": uid,                       # ✅ carry owner forward
-                        "room_id": int(row["id"]),
-                        "room_no": str(row["room_no"]),
-                        "room_type": str(row["type"]),
-                        "amount": int(price),
-                        "start_date": str(date.today()),
-                        "end_date": str(date.today() + timedelta(days=180)),
-                        "status": "active",
-                    }
-                    st.session_state["nav_choice"] = "Fees"
-                    st.rerun()
+    view = st.radio("View", ["Map", "Table"], horizontal=True, key="rooms_view")
+    p1, p2 = st.columns([1, 3])
+    page_size = p1.selectbox("Per page", PAGE_SIZES, index=1, key="rooms_page_size")
+    pages = max((len(shown) + page_size - 1) // page_size, 1)
+    # the widget's value lives in session state only (no value=), so it can be clamped here
+    page_now = st.session_state.setdefault("rooms_page", 1)
+    if page_now > pages:
+        st.session_state["rooms_page"] = pages   # filters shrank the result set
+    page = p2.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="rooms_page")
+    rows, _ = page_of(shown, page, page_size)
+    st.caption(f"{len(shown)} of {len(grid)} rooms match · {int(shown['available'].sum())} free beds")
+
+    if view == "Map":
+        # 🟩 free · 🟨 partly taken · 🟥 full, as one HTML block
+        st.markdown(_room_map_html(rows), unsafe_allow_html=True)
+    else:
+        table = rows.assign(price=rows["type"].map(TYPE_PRICE).fillna(0).astype(int)).drop(columns=["id"])
+        st.dataframe(table, width=True, hide_index=True)
+
+    # ---- Book & Pay: one picker for the rooms on this page that have a free bed
+    bookable = rows[rows["available"] > 0]
+    if bookable.empty:
+        return
+    labels = {
+        int(r.id): f"Room {r.room_no} · {r.type} · {int(r.available)} free · ₹{TYPE_PRICE.get(r.type, 0)}"
+        for r in bookable.itertuples(index=False)
+    }
+    b1, b2 = st.columns([3, 1])
+    rid = b1.selectbox("Book a bed in", list(labels), format_func=labels.get, key="rooms_book_pick")
+    if b2.button("Book & Pay", type="primary"):
+        from datetime import date, timedelta
+        room = bookable[bookable["id"] == rid].iloc[0]
+        price = TYPE_PRICE.get(str(room["type"]), 0)
+        st.session_state["pending_booking"] = {
+            "owner_id": uid,                       # ✅ carry owner forward
+            "room_id": int(rid),
+            "room_no": str(room["room_no"]),
+            "room_type": str(room["type"]),
+            "amount": int(price),
+            "start_date": str(date.today()),
+            "end_date": str(date.today() + timedelta(days=180)),
+            "status": "active",
+        }
+        st.session_state["nav_choice"] = "Fees"
+        st.rerun()
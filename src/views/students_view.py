@@ -1,6 +1,14 @@
 import streamlit as st
-from ..services.student_service import students_store
+from ..services.student_service import students_store, import_students, IMPORT_COLUMNS
+from ..services.batch_service import BatchError
+from ..services.student_batch_service import student_ops
+from ..services.search_service import student_search
+from ..services.availability_service import page_of
+from ..utils import perf
 
+PAGE_SIZE = 50
+
+@perf.timed("view.students")
 def show_students():
     st.subheader("Students")
 
@@ -16,25 +24,56 @@ def show_students():
             course = st.text_input("Course / Dept")
             submitted = st.form_submit_button("Add")
             if submitted:
-                students_store.create({
-                    "owner_id": uid,   # ✅ store who added this student
-                    "name": name,
-                    "email": email,
-                    "phone": phone,
-                    "gender": gender,
-                    "course": course
-                })
-                st.success("Student added!")
+                # same checks as the bulk import (name/email required, no duplicates)
+                try:
+                    student_ops.add_students(uid, [{
+                        "name": name,
+                        "email": email,
+                        "phone": phone,
+                        "gender": gender,
+                        "course": course
+                    }])
+                except BatchError as e:
+                    st.error("; ".join(msg for _, msg in e.problems).capitalize() + ".")
+                else:
+                    st.success("Student added!")
+
+    with st.expander("📥 Bulk Import (CSV / Excel)", expanded=False):
+        st.caption(f"Columns: {', '.join(IMPORT_COLUMNS)} (name and email required). "
+                   "Rows with a missing field, bad email, or an email/phone you already have are skipped.")
+        upload = st.file_uploader("Student list", type=["csv", "xlsx"], key="students_import_file")
+        dry_run = st.checkbox("Only validate (don't add anyone yet)", value=False)
+        if upload is not None and st.button("Import Students"):
+            try:
+                report = import_students(uid, upload, filename=upload.name, dry_run=dry_run)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                if dry_run:
+                    st.info(f"{report.accepted} of {report.rows} rows are ready to import.")
+                else:
+                    st.success(f"Imported {len(report.created_ids)} of {report.rows} students.")
+                if report.errors:
+                    st.warning(f"{len(report.errors)} problem(s) found:")
+                    st.dataframe(report.errors_frame(), width=True, hide_index=True)
 
     st.write("### My Students")
 
     # ✅ Show only current user's data
-    df = students_store.list_all()
-
-    # If the column didn't exist previously, create empty
-    if "owner_id" not in df.columns:
-        df["owner_id"] = None
+    df = students_store.list_for_owner(uid)   # ✅ only this owner's partition
 
-    df = df[df["owner_id"] == uid]   # ✅ filter
+    # 🔎 type-ahead: the best matches, else one page at a time (not the whole frame)
+    query = st.text_input("🔎 Search by name, email, phone or course", key="students_search")
+    if query.strip():
+        ids = student_search.search(uid, query, k=PAGE_SIZE)
+        rank = {sid: i for i, sid in enumerate(ids)}
+        shown = df[df["id"].isin(ids)].sort_values("id", key=lambda s: s.map(rank))
+        st.caption(f"{len(shown)} best match(es) of {len(df)} students")
+    else:
+        pages = max((len(df) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1,
+                               key="students_page")
+        shown, _ = page_of(df, page, PAGE_SIZE)
+        st.caption(f"{len(df)} students")
 
-    st.dataframe(df, width=True)
+    st.dataframe(shown, width=True, hide_index=True)
@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+from src.utils import io
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point every store at a throwaway data directory."""
+    monkeypatch.setattr(io, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def on_day(monkeypatch):
+    """Pin the day occupancy counts as "today": on_day("2025-03-01")."""
+    from src.services import occupancy_service
+
+    def pin(value):
+        day = int(pd.Timestamp(value).to_datetime64().astype("datetime64[D]").astype("int64"))
+        monkeypatch.setattr(occupancy_service, "_today", lambda: day)
+    return pin
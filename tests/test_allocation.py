@@ -0,0 +1,55 @@
+import pandas as pd
+from src.services import allocation_service, availability_service, occupancy_service
+from src.services.allocation_service import allocate_students
+from src.services.data_store import CSVStore
+from src.services.student_service import STUDENT_SCHEMA
+from src.services.room_service import ROOM_SCHEMA
+from src.services.booking_service import BOOKING_SCHEMA
+
+
+def _wire(monkeypatch):
+    students = CSVStore("a_students.csv", STUDENT_SCHEMA, append_only=True, partitioned=True)
+    rooms = CSVStore("a_rooms.csv", ROOM_SCHEMA, append_only=True, partitioned=True)
+    bookings = CSVStore("a_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    tracker = occupancy_service.OccupancyTracker(rooms, bookings)
+    calendar = availability_service.BookingCalendar(bookings)
+    for mod in (allocation_service, availability_service):
+        monkeypatch.setattr(mod, "bookings_store", bookings)
+        monkeypatch.setattr(mod, "rooms_store", rooms)
+    monkeypatch.setattr(allocation_service, "students_store", students)
+    monkeypatch.setattr(availability_service, "occupancy", tracker)
+    monkeypatch.setattr(availability_service, "calendar", calendar)
+    availability_service._CACHE.clear()
+    return students, rooms, bookings
+
+
+def test_allocation_packs_by_gender_and_budget(data_dir, monkeypatch, on_day):
+    on_day("2025-01-01")
+    students, rooms, bookings = _wire(monkeypatch)
+    rooms.create_many(pd.DataFrame([
+        {"owner_id": 1, "room_no": "A1", "type": "Triple", "capacity": 3, "occupied": 0},
+        {"owner_id": 1, "room_no": "A2", "type": "Triple", "capacity": 3, "occupied": 0},
+        {"owner_id": 1, "room_no": "B1", "type": "Double", "capacity": 2, "occupied": 0},
+    ]))
+    students.create_many(pd.DataFrame(
+        [{"owner_id": 1, "name": f"M{i}", "gender": "Male", "course": "CS"} for i in range(4)]
+        + [{"owner_id": 1, "name": f"F{i}", "gender": "Female", "course": "EE"} for i in range(2)]
+    ))
+    # one male already lives in room 02 for the whole term
+    bookings.create_many(pd.DataFrame([{"owner_id": 1, "student_id": 1, "room_id": 2, "status": "active",
+                                        "start_date": "2025-01-01", "end_date": "2025-12-31"}]))
+
+    preview = allocate_students(1, "2025-01-01", "2025-06-30", dry_run=True, budget=45000)
+    assert preview.dry_run and len(bookings.list_for_owner(1)) == 1
+    by_room = preview.assignments.groupby("room_no")["gender"].agg(set).to_dict()
+    # Double (50k) is over budget; males fill the gap in A2 before opening A1,
+    # which leaves no room the women can have to themselves
+    assert by_room == {"A2": {"Male"}, "A1": {"Male"}}
+    assert preview.assignments["room_no"].tolist() == ["A2", "A2", "A1"]
+    assert preview.unassigned["student_name"].tolist() == ["F0", "F1"]
+
+    plan = allocate_students(1, "2025-01-01", "2025-06-30", room_type="Double")
+    assert len(plan.created_ids) == 5
+    assert len(bookings.list_for_owner(1)) == 6
+    occupied = rooms.list_for_owner(1).set_index("room_no")["occupied"].to_dict()
+    assert occupied == {"A1": 2, "A2": 2, "B1": 2}
@@ -0,0 +1,19 @@
+import pandas as pd
+from src.services import auth_service
+from src.services.auth_service import USER_SCHEMA, ADMIN, OWNER, is_admin, set_role
+from src.services.data_store import CSVStore
+
+
+def test_only_granted_admins_pass_the_role_gate(data_dir, monkeypatch):
+    # a users file from before roles were stored
+    pd.DataFrame({"id": [1, 2], "owner_id": [1, 2], "name": ["A", "B"], "email": ["a@x.in", "b@x.in"],
+                  "password": ["h", "h"]}).to_csv(data_dir / "a_users.csv", index=False)
+    store = CSVStore("a_users.csv", USER_SCHEMA, append_only=True)
+    monkeypatch.setattr(auth_service, "users_store", store)
+
+    legacy = store.find_by("email", "a@x.in").iloc[0]
+    assert not is_admin(legacy) and not is_admin({}) and not is_admin({"role": OWNER})
+
+    assert set_role(" A@x.in ", ADMIN) and not set_role("nobody@x.in", ADMIN)
+    assert is_admin(store.find_by("email", "a@x.in").iloc[0])
+    assert not is_admin(store.find_by("email", "b@x.in").iloc[0])
@@ -0,0 +1,15 @@
+import pandas as pd
+from src.services.availability_service import compute_availability
+
+
+def test_availability_vectorized():
+    rooms = pd.DataFrame({
+        "id": [1, 2, 3], "type": ["Triple", "Double", "Double"],
+        "capacity": [3, 2, 2], "occupied": [0, 0, 0],
+    })
+    avail = compute_availability(rooms, {1: 1, 2: 3, 99: 1})
+    assert avail.by_room == {1: 2, 2: 0, 3: 2}
+    assert avail.total_vacant == 4 and avail.total_occupied == 3
+    assert avail.vacant_for_type("Double") == 2
+    assert avail.vacant_for_type("Triple") == 2
+    assert compute_availability(rooms.iloc[0:0], {}).total_vacant == 0
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+from src.services import batch_service, booking_batch_service
+from src.services.availability_service import BookingCalendar
+from src.services.batch_service import BatchError
+from src.services.booking_batch_service import BookingService
+from src.services.student_batch_service import StudentService
+from src.services.data_store import CSVStore
+from src.services.student_service import STUDENT_SCHEMA
+from src.services.room_service import ROOM_SCHEMA
+from src.services.booking_service import BOOKING_SCHEMA
+from src.services.fee_service import FEE_SCHEMA
+
+
+def _wire(monkeypatch):
+    students = CSVStore("t_students.csv", STUDENT_SCHEMA, append_only=True, partitioned=True)
+    rooms = CSVStore("t_rooms.csv", ROOM_SCHEMA, append_only=True, partitioned=True)
+    bookings = CSVStore("t_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    fees = CSVStore("t_fees.csv", FEE_SCHEMA, append_only=True, partitioned=True)
+    monkeypatch.setattr(booking_batch_service, "calendar", BookingCalendar(bookings))
+    monkeypatch.setattr(batch_service, "LOCK_ORDER", (students, bookings, fees))
+    rooms.create_many(pd.DataFrame([
+        {"owner_id": 1, "room_no": "A", "type": "Double", "capacity": 2, "occupied": 0},
+        {"owner_id": 1, "room_no": "B", "type": "Triple", "capacity": 3, "occupied": 0},
+    ]))
+    return (StudentService(students, bookings), BookingService(bookings, fees, students, rooms),
+            students, bookings, fees)
+
+
+def test_batches_validate_everything_then_write_once(data_dir, monkeypatch):
+    student_ops, booking_ops, students, bookings, fees = _wire(monkeypatch)
+    sids = student_ops.add_students(1, [{"name": f"S{i}", "email": f"s{i}@x.io", "gender": "f"} for i in range(4)])
+    with pytest.raises(BatchError) as err:
+        student_ops.add_students(1, [{"name": "Dup", "email": "S0@x.io"}])
+    assert err.value.problems == [(0, "duplicate email")]
+
+    stay = {"start_date": "2025-01-01", "end_date": "2025-07-01", "amount": 50000}
+    paid = booking_ops.pay_and_book(1, [{**stay, "student_id": s, "room_id": 1} for s in sids[:2]])
+    assert len(paid.booking_ids) == 2 and len(fees.list_for_owner(1)) == 2
+    # room A is full: the third row sinks the whole batch, including the valid first row
+    with pytest.raises(BatchError) as err:
+        booking_ops.create_bookings(1, [{**stay, "student_id": sids[2], "room_id": 2},
+                                        {**stay, "student_id": 99, "room_id": 2},
+                                        {**stay, "student_id": sids[3], "room_id": 1}])
+    assert [p for p, _ in err.value.problems] == [1, 2] and len(bookings.list_for_owner(1)) == 2
+
+    # the move frees the bed in A from the transfer day, so S2 can take it then
+    moved = booking_ops.transfer_students(1, [{"student_id": sids[0], "room_id": 2}], on="2025-03-01")
+    b = bookings.list_for_owner(1).set_index("id")
+    assert b.loc[paid.booking_ids[0], "status"] == "completed" and str(b.loc[moved[0], "start_date"].date()) == "2025-03-01"
+    booking_ops.create_bookings(1, [{**stay, "start_date": "2025-03-01", "student_id": sids[2], "room_id": 1}])
+
+    assert student_ops.remove_students(1, [sids[1]]) == 1
+    b = bookings.list_for_owner(1).set_index("id")
+    assert b.loc[paid.booking_ids[1], "status"] == "cancelled" and len(fees.list_for_owner(1)) == 2
+    assert booking_ops.cancel_bookings(1, moved + moved) == 1
+
+
+def test_failed_write_undoes_the_earlier_ones(data_dir, monkeypatch):
+    student_ops, booking_ops, students, bookings, fees = _wire(monkeypatch)
+    sid = student_ops.add_students(1, [{"name": "S", "email": "s@x.io"}])[0]
+
+    def disk_full(records):
+        raise OSError("disk full")
+    monkeypatch.setattr(bookings, "create_many", disk_full)
+    with pytest.raises(OSError):
+        booking_ops.pay_and_book(1, [{"student_id": sid, "room_id": 1, "start_date": "2025-01-01",
+                                      "end_date": "2025-07-01", "amount": 50000}])
+    assert fees.list_for_owner(1).empty
@@ -0,0 +1,14 @@
+from benchmarks.runner import compare
+
+
+def _report(**medians):
+    return {"scales": {"small": {"scenarios": {n: {"median_ms": ms} for n, ms in medians.items()}}}}
+
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = _report(fast=0.2, steady=10.0, slower=10.0)
+    report = _report(fast=0.9, steady=12.0, slower=20.0, new=5.0)
+    # fast: 4.5x but under the 1 ms floor; steady: within 50%; new: not in the baseline
+    regressions = compare(report, baseline, threshold=0.5, min_delta_ms=1.0)
+    assert len(regressions) == 1 and regressions[0].startswith("small/slower:")
+    assert compare(report, {}, threshold=0.5) == []
@@ -0,0 +1,45 @@
+import pandas as pd
+from src.services.availability_service import BookingCalendar
+from src.services.booking_service import BOOKING_SCHEMA
+from src.services.data_store import CSVStore
+from src.services import occupancy_service
+from src.services.occupancy_service import _in_house
+
+
+def test_calendar_free_beds_over_date_ranges(data_dir):
+    bookings = CSVStore("c_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    calendar = BookingCalendar(bookings)
+    stay = {"owner_id": 1, "student_id": 1, "room_id": 7, "status": "active"}
+    bookings.create_many(pd.DataFrame([
+        {**stay, "start_date": "2025-01-01", "end_date": "2025-03-01"},
+        {**stay, "start_date": "2025-03-01", "end_date": "2025-06-01"},   # back-to-back
+        {**stay, "start_date": "2025-02-01", "end_date": "2025-04-01"},
+    ]))
+    assert calendar.booked(1, 7, "2025-01-01", "2025-02-01") == 1
+    assert calendar.booked(1, 7, "2025-01-15", "2025-03-15") == 2
+    assert calendar.booked(1, 7, "2025-06-01", "2025-12-01") == 0
+    assert calendar.booked_per_room(1, "2025-02-15", "2025-02-16") == {7: 2}
+
+    # writes are applied to the built index
+    bookings.upsert_many(pd.DataFrame([{"id": 3, "status": "cancelled"}]), owner_id=1)
+    bookings.create_many(pd.DataFrame([{**stay, "room_id": 8, "start_date": "2025-07-01", "end_date": "2025-08-01"}]))
+    assert calendar.booked(1, 7, "2025-01-15", "2025-03-15") == 1
+    assert calendar.booked(1, 8, "2025-07-15", "2025-07-16") == 1
+
+
+def test_missing_dates_leave_the_stay_open(data_dir, on_day):
+    bookings = CSVStore("c_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    calendar = BookingCalendar(bookings)
+    stay = {"owner_id": 1, "student_id": 1, "room_id": 7, "status": "active"}
+    bookings.create_many(pd.DataFrame([
+        {**stay, "start_date": "2025-03-01", "end_date": None},    # no check-out yet
+        {**stay, "start_date": None, "end_date": "2025-02-01"},
+    ]))
+    assert calendar.booked(1, 7, "2030-01-01", "2030-02-01") == 1
+    assert calendar.booked(1, 7, "2020-01-01", "2020-02-01") == 1
+    assert calendar.booked(1, 7, "2025-02-01", "2025-03-01") == 0
+
+    # and the same stays are the ones occupancy counts as in house
+    on_day("2030-01-01")
+    in_house = _in_house(bookings.list_for_owner(1), occupancy_service._today())
+    assert in_house.tolist() == [True, False]
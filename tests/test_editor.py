@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from src.services.data_store import CSVStore, ConflictError
+from src.utils.editor import editor_delta, apply_delta
+
+COLS = ["id", "owner_id", "name", "amount"]
+
+
+def test_editor_delta_writes_only_touched_rows(data_dir, monkeypatch):
+    store = CSVStore("e_fees.csv", COLS, append_only=True, partitioned=True)
+    store.create_many(pd.DataFrame({"owner_id": [1] * 4, "name": list("abcd"), "amount": [10, 20, 30, 40]}))
+    shown = store.list_for_owner(1).assign(label="display only")
+    version = store.version_for_owner(1)
+
+    state = {"edited_rows": {1: {"amount": 25}}, "deleted_rows": [3],
+             "added_rows": [{"name": "e", "amount": 50}, {}]}
+    delta = editor_delta(shown, state, COLS)
+    assert delta.updates.to_dict("records") == [{"id": 2, "name": "b", "amount": 25}]
+    assert delta.deletes == [4] and len(delta.inserts) == 1
+
+    # no full-partition rewrite on save
+    monkeypatch.setattr(store, "save_for_owner", lambda *a, **k: (_ for _ in ()).throw(AssertionError))
+    apply_delta(store, 1, delta, expected_version=version)
+    rows = store.list_for_owner(1).set_index("name")["amount"].to_dict()
+    assert rows == {"a": 10, "b": 25, "c": 30, "e": 50}
+
+    # the editor's positions are stale once the owner's rows moved on
+    with pytest.raises(ConflictError):
+        apply_delta(store, 1, delta, expected_version=version)
+
+
+def test_failed_save_is_undone(data_dir, monkeypatch):
+    store = CSVStore("e_fees.csv", COLS, append_only=True, partitioned=True)
+    store.create_many(pd.DataFrame({"owner_id": [1] * 3, "name": list("abc"), "amount": [10, 20, 30]}))
+    shown = store.list_for_owner(1)
+    before = shown.copy()
+    state = {"edited_rows": {0: {"amount": 15}}, "deleted_rows": [2], "added_rows": [{"name": "d", "amount": 40}]}
+    delta = editor_delta(shown, state, COLS)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(store, "create_many", fail)
+    with pytest.raises(OSError):
+        apply_delta(store, 1, delta)
+    after = store.list_for_owner(1).sort_values("id").reset_index(drop=True)
+    pd.testing.assert_frame_equal(after, before.reset_index(drop=True), check_dtype=False)
@@ -0,0 +1,71 @@
+import pandas as pd
+from src.services.data_store import CSVStore
+from src.services.ledger_service import FeeLedger
+from src.services.occupancy_service import OccupancyTracker
+from src.services.fee_service import FEE_SCHEMA
+from src.services.room_service import ROOM_SCHEMA
+from src.services.booking_service import BOOKING_SCHEMA
+
+
+def test_ledger_balances_collections_and_overdue(data_dir, monkeypatch):
+    fees = CSVStore("g_fees.csv", FEE_SCHEMA, append_only=True, partitioned=True)
+    rooms = CSVStore("g_rooms.csv", ROOM_SCHEMA, append_only=True, partitioned=True)
+    bookings = CSVStore("g_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    ledger = FeeLedger(fees, bookings, rooms)
+    rooms.create_many(pd.DataFrame([{"owner_id": 1, "room_no": "A", "type": "Double", "capacity": 2}]))
+    half = {"owner_id": 1, "room_id": 1, "status": "active"}
+    bookings.create_many(pd.DataFrame([
+        {**half, "student_id": 1, "start_date": "2025-01-01", "end_date": "2025-06-30"},   # 180 days
+        {**half, "student_id": 1, "start_date": "2025-06-30", "end_date": "2025-09-28"},   # 90 days
+        {**half, "student_id": 2, "start_date": "2025-01-01", "end_date": "2025-03-02"},   # 60 days
+    ]))
+    assert ledger.balance(1, 1) == 75000
+
+    builds = []
+    real_build = ledger._build
+    monkeypatch.setattr(ledger, "_build", lambda o: builds.append(o) or real_build(o))
+    paid = {"owner_id": 1, "status": "paid"}
+    fees.create_many(pd.DataFrame([
+        {**paid, "student_id": 1, "month": "2025-01", "amount": 50000, "paid_on": "2025-01-03"},
+        {**paid, "student_id": 2, "month": "2025-01", "amount": 10000, "paid_on": "2025-01-20"},
+        {**paid, "student_id": 2, "month": "2025-02", "amount": 9000, "paid_on": "2025-02-01"},
+        {"owner_id": 1, "student_id": 2, "month": "2025-03", "amount": 500, "status": "pending"},
+    ]))
+    bookings.upsert_many(pd.DataFrame([{"id": 3, "status": "cancelled"}]), owner_id=1)
+
+    b = ledger.balances(1).set_index("student_id")
+    assert b.loc[1, "balance"] == 25000 and b.loc[2, "balance"] == -19000
+    assert ledger.collections(1).values.tolist() == [["2025-01", 60000.0, 2], ["2025-02", 9000.0, 1]]
+    # the first stay is paid off, the second (from 2025-06-30) is not
+    late = ledger.overdue(1, as_of="2025-07-10")
+    assert late.values.tolist() == [[1, 25000.0, "2025-06-30", 10]]
+    assert ledger.overdue(1, as_of="2025-07-03").empty
+    assert builds == []
+
+
+def test_occupancy_writes_dont_rebuild_the_ledger(data_dir, monkeypatch):
+    fees = CSVStore("g_fees.csv", FEE_SCHEMA, append_only=True, partitioned=True)
+    rooms = CSVStore("g_rooms.csv", ROOM_SCHEMA, append_only=True, partitioned=True)
+    bookings = CSVStore("g_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    ledger = FeeLedger(fees, bookings, rooms)
+    tracker = OccupancyTracker(rooms, bookings)
+    rooms.create_many(pd.DataFrame([{"owner_id": 1, "room_no": "A", "type": "Double", "capacity": 2}]))
+    assert ledger.balances(1).empty
+
+    builds = []
+    real_build = ledger._build
+    monkeypatch.setattr(ledger, "_build", lambda o: builds.append(o) or real_build(o))
+    room_version = rooms.version_for_owner(1)
+    today = pd.Timestamp.today().normalize()
+    bookings.create_many(pd.DataFrame([{"owner_id": 1, "room_id": 1, "student_id": 1, "status": "active",
+                                        "start_date": today, "end_date": today + pd.Timedelta(days=180)}]))
+    assert rooms.version_for_owner(1) != room_version          # the tracker wrote "occupied"
+    assert tracker.counts(1) == {1: 1}
+    assert rooms.list_for_owner(1)["occupied"].tolist() == [1]
+    assert ledger.balance(1, 1) == 50000
+    assert builds == []
+
+    # a new price does rebuild
+    rooms.upsert_many(pd.DataFrame([{"id": 1, "type": "Triple"}]), owner_id=1)
+    assert ledger.balance(1, 1) == 40000
+    assert builds == [1]
@@ -0,0 +1,55 @@
+import pandas as pd
+from src.services.data_store import CSVStore
+from src.services.occupancy_service import OccupancyTracker
+from src.services.lifecycle_service import BookingLifecycle
+from src.services.room_service import ROOM_SCHEMA
+from src.services.booking_service import BOOKING_SCHEMA
+
+
+def _stores():
+    rooms = CSVStore("l_rooms.csv", ROOM_SCHEMA, append_only=True, partitioned=True)
+    bookings = CSVStore("l_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    OccupancyTracker(rooms, bookings)
+    rooms.create_many(pd.DataFrame([
+        {"owner_id": owner, "room_no": "01", "type": "Triple", "capacity": 3, "occupied": 0} for owner in (1, 2)
+    ]))
+    return rooms, bookings
+
+
+def _book(bookings, owner, room_id, end, status="active"):
+    return bookings.create_many(pd.DataFrame([{"owner_id": owner, "student_id": 1, "room_id": room_id,
+                                               "start_date": "2025-01-01", "end_date": end, "status": status}]))[0]
+
+
+def test_expired_bookings_complete_and_free_their_beds(data_dir, on_day):
+    on_day("2025-02-01")
+    rooms, bookings = _stores()
+    lifecycle = BookingLifecycle(bookings, batch_size=1)
+    old = _book(bookings, 1, 1, "2025-03-01")
+    _book(bookings, 1, 1, "2025-09-01")
+    _book(bookings, 2, 2, "2025-03-01")
+    assert rooms.list_all()["occupied"].tolist() == [2, 1]
+
+    # written after the first sync: reaches the heap through the change event
+    assert lifecycle.tick("2025-02-01") == {}
+    later = _book(bookings, 1, 1, "2025-03-15")
+
+    on_day("2025-03-01")
+    assert lifecycle.tick("2025-03-01") == {}   # not completed on its end_date itself
+    on_day("2025-04-01")
+    assert lifecycle.tick("2025-04-01") == {1: 2, 2: 1}
+    b = bookings.list_all().set_index("id")["status"]
+    assert b[old] == "completed" and b[later] == "completed"
+    assert rooms.list_all()["occupied"].tolist() == [1, 0]
+
+    # idempotent, and an extended stay is not completed on its old date
+    assert lifecycle.tick("2025-04-01") == {}
+    active = bookings.list_for_owner(1, status="active")["id"].iloc[0]
+    bookings.upsert_many(pd.DataFrame([{"id": active, "end_date": "2026-01-01"}]), owner_id=1)
+    on_day("2025-10-01")
+    assert lifecycle.tick("2025-10-01") == {}
+
+    # a fresh scheduler (restart) picks up from the stored bookings
+    on_day("2026-02-01")
+    assert BookingLifecycle(bookings).tick("2026-02-01") == {1: 1}
+    assert rooms.list_all()["occupied"].tolist() == [0, 0]
@@ -0,0 +1,25 @@
+import pandas as pd
+from src.services.data_store import CSVStore
+from src.services.lookup_service import LabelLookup
+from src.utils.lookup import id_to_label
+
+
+def test_id_to_label_skips_bad_ids():
+    df = pd.DataFrame({"id": [1, "x", 3], "name": ["a", "b", "c"]})
+    assert id_to_label(df, "id", "name") == {1: "a", 3: "c"}
+
+
+def test_lookup_follows_writes(data_dir, monkeypatch):
+    store = CSVStore("l_students.csv", ["id", "owner_id", "name"], append_only=True, partitioned=True)
+    lookup = LabelLookup(store, "name")
+    store.create_many(pd.DataFrame({"owner_id": [1, 1, 2], "name": ["Asha", "Ravi", "Asha"]}))
+    assert lookup.labels(1) == {1: "Asha", 2: "Ravi"}
+    assert lookup.ids_for(1, "Asha") == [1]
+
+    # later writes are applied as deltas, without re-reading the partition
+    monkeypatch.setattr(lookup, "_build", lambda owner_id: (_ for _ in ()).throw(AssertionError))
+    ids = store.create_many(pd.DataFrame({"owner_id": [1], "name": ["Asha"]}))
+    store.upsert_many(pd.DataFrame({"id": [2], "name": ["Ravi K"]}), owner_id=1)
+    store.delete_by_id(1, owner_id=1)
+    assert lookup.labels(1) == {2: "Ravi K", ids[0]: "Asha"}
+    assert lookup.reverse(1) == {"Ravi K": [2], "Asha": [ids[0]]}
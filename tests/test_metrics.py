@@ -0,0 +1,39 @@
+import pandas as pd
+from src.services.data_store import CSVStore
+from src.services.metrics_service import DashboardMetrics, RECENT_N
+from src.services.student_service import STUDENT_SCHEMA
+from src.services.room_service import ROOM_SCHEMA
+from src.services.booking_service import BOOKING_SCHEMA
+
+
+def test_metrics_follow_writes_without_rereading(data_dir, monkeypatch, on_day):
+    on_day("2025-03-01")
+    students = CSVStore("m_students.csv", STUDENT_SCHEMA, append_only=True, partitioned=True)
+    rooms = CSVStore("m_rooms.csv", ROOM_SCHEMA, append_only=True, partitioned=True)
+    bookings = CSVStore("m_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    metrics = DashboardMetrics(students, rooms, bookings)
+    rooms.create_many(pd.DataFrame([
+        {"owner_id": 1, "room_no": "A", "type": "Triple", "capacity": 3},
+        {"owner_id": 1, "room_no": "B", "type": "Double", "capacity": 2},
+    ]))
+    assert metrics.summary(1).vacancy_by_type == {"Triple": 3, "Double": 2}
+
+    builds = []
+    real_build = metrics._build
+    monkeypatch.setattr(metrics, "_build", lambda o: builds.append(o) or real_build(o))
+
+    ids = students.create_many(pd.DataFrame({"owner_id": 1, "name": [f"S{i}" for i in range(8)]}))
+    stay = {"owner_id": 1, "start_date": "2025-01-01", "end_date": "2025-06-30", "status": "active"}
+    b = bookings.create_many(pd.DataFrame([{**stay, "student_id": ids[0], "room_id": 1},
+                                           {**stay, "student_id": ids[1], "room_id": 2},
+                                           {**stay, "student_id": ids[2], "room_id": 2}]))
+    bookings.upsert_many(pd.DataFrame([{"id": b[2], "status": "cancelled"}]), owner_id=1)
+    students.delete_by_id(ids[-1], owner_id=1)
+
+    s = metrics.summary(1)
+    assert builds == []
+    assert (s.total_students, s.total_rooms, s.active_bookings, s.vacant_beds) == (7, 2, 2, 3)
+    assert s.vacancy_by_type == {"Triple": 2, "Double": 1}
+    assert s.recent_students["name"].tolist() == [f"S{i}" for i in range(7 - RECENT_N, 7)]
+    assert s.recent_bookings["status"].tolist() == ["active", "active", "cancelled"]
+    assert metrics.rebuild(1) == []
@@ -0,0 +1,77 @@
+import pandas as pd
+from src.services.data_store import CSVStore
+from src.services.occupancy_service import OccupancyTracker
+from src.services.room_service import ROOM_SCHEMA
+from src.services.booking_service import BOOKING_SCHEMA
+
+
+def _stores():
+    rooms = CSVStore("o_rooms.csv", ROOM_SCHEMA, append_only=True, partitioned=True)
+    bookings = CSVStore("o_bookings.csv", BOOKING_SCHEMA, append_only=True, partitioned=True)
+    rooms.create_many(pd.DataFrame([
+        {"owner_id": 1, "room_no": "01", "type": "Triple", "capacity": 3, "occupied": 0},
+        {"owner_id": 1, "room_no": "02", "type": "Double", "capacity": 2, "occupied": 0},
+    ]))
+    return rooms, bookings, OccupancyTracker(rooms, bookings)
+
+
+def _occupied(rooms):
+    df = rooms.list_for_owner(1)
+    return dict(zip(df["id"].astype(int), df["occupied"].astype(int)))
+
+
+def _book(bookings, room_id, status="active"):
+    row = {"owner_id": 1, "student_id": 1, "room_id": room_id,
+           "start_date": "2025-01-01", "end_date": "2025-06-30", "status": status}
+    return bookings.create_many(pd.DataFrame([row]))[0]
+
+
+def test_booking_writes_update_occupancy(data_dir, on_day):
+    on_day("2025-03-01")
+    rooms, bookings, tracker = _stores()
+
+    b1 = _book(bookings, 1)
+    _book(bookings, 1)
+    _book(bookings, 2, status="cancelled")
+    assert _occupied(rooms) == {1: 2, 2: 0}
+    assert tracker.counts(1) == {1: 2}
+
+    # room move
+    bookings.upsert_many(pd.DataFrame([{"id": b1, "room_id": 2}]), owner_id=1)
+    assert _occupied(rooms) == {1: 1, 2: 1}
+
+    # status change and delete
+    bookings.upsert_many(pd.DataFrame([{"id": b1, "status": "completed"}]), owner_id=1)
+    bookings.delete_by_id(b1 + 1, owner_id=1)
+    assert _occupied(rooms) == {1: 0, 2: 0}
+
+
+def test_only_stays_covering_today_take_a_bed(data_dir, on_day):
+    on_day("2025-03-01")
+    rooms, bookings, tracker = _stores()
+    stay = {"owner_id": 1, "student_id": 1, "room_id": 1, "status": "active"}
+    bookings.create_many(pd.DataFrame([
+        {**stay, "start_date": "2025-02-01", "end_date": "2025-03-01"},   # checked out today
+        {**stay, "start_date": "2025-03-01", "end_date": "2025-03-01"},   # same-day stay
+        {**stay, "start_date": "2025-04-01", "end_date": "2025-05-01"},   # reservation
+    ]))
+    assert _occupied(rooms) == {1: 1, 2: 0}
+
+    # the reservation's first night: counters roll over and occupied follows
+    on_day("2025-04-01")
+    assert tracker.counts(1) == {1: 1}
+    assert _occupied(rooms) == {1: 1, 2: 0}
+    on_day("2025-05-01")
+    assert tracker.counts(1) == {}
+    assert _occupied(rooms) == {1: 0, 2: 0}
+
+
+def test_recompute_repairs_drift(data_dir, on_day):
+    on_day("2025-03-01")
+    rooms, bookings, tracker = _stores()
+    _book(bookings, 2)
+
+    rooms.upsert_many(pd.DataFrame([{"id": 1, "occupied": 3}, {"id": 2, "occupied": 0}]), owner_id=1)
+    assert tracker.recompute(1) == 2
+    assert _occupied(rooms) == {1: 0, 2: 1}
+    assert tracker.recompute(1) == 0
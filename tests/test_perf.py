@@ -0,0 +1,29 @@
+import json
+import pandas as pd
+from src.services.data_store import CSVStore
+from src.utils import perf
+
+
+def test_spans_and_caches_only_recorded_when_enabled(data_dir, monkeypatch, tmp_path):
+    monkeypatch.setattr(perf, "_ENABLED", False)
+    perf.reset()
+    store = CSVStore("t.csv", ["id", "owner_id", "name"], append_only=True)
+    store.create_many(pd.DataFrame({"owner_id": [1, 1], "name": ["a", "b"]}))
+    assert perf.span_metrics() == {} and perf.cache_metrics() == {}
+
+    export = tmp_path / "spans.jsonl"
+    perf.enable(export=str(export))
+    try:
+        store.create_many(pd.DataFrame({"owner_id": [1, 1, 1], "name": ["c", "d", "e"]}))
+        store.list_for_owner(1)
+        store.list_for_owner(1)
+    finally:
+        perf.enable(False, export="")
+    spans = perf.span_metrics()
+    assert spans["t.csv.create_many"]["rows"] == 3
+    assert spans["t.csv.list_for_owner"]["calls"] == 2 and spans["t.csv.list_for_owner"]["rows"] == 10
+    assert spans["csv.append"]["bytes"] > 0
+    assert perf.cache_metrics()["snapshot:t.csv"]["hits"] >= 2
+    lines = [json.loads(l) for l in export.read_text().splitlines()]
+    assert [l["name"] for l in lines] == [s["name"] for s in perf.recent_spans()]
+    perf.reset()
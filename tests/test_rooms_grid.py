@@ -0,0 +1,14 @@
+import pandas as pd
+from src.services.availability_service import compute_availability, filter_rooms, page_of
+
+
+def test_room_grid_filters_and_pages():
+    rooms = pd.DataFrame({
+        "id": range(1, 11), "room_no": [f"{i:02d}" for i in range(1, 11)],
+        "type": ["Triple"] * 5 + ["Double"] * 5, "capacity": [3] * 5 + [2] * 5, "occupied": 0,
+    })
+    grid = compute_availability(rooms, {1: 3, 6: 1}).frame()
+    assert filter_rooms(grid, room_type="Triple", min_free=1)["room_no"].tolist() == ["02", "03", "04", "05"]
+    assert filter_rooms(grid, room_from=4, room_to=6)["available"].tolist() == [3, 3, 1]
+    rows, pages = page_of(grid, 9, 4)
+    assert pages == 3 and rows["room_no"].tolist() == ["09", "10"]
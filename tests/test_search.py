@@ -0,0 +1,46 @@
+import pandas as pd
+from src.services.data_store import CSVStore
+from src.services.search_service import StudentSearch
+from src.services.student_service import STUDENT_SCHEMA
+
+
+def _student(name, email, phone="", course="", owner_id=1):
+    return {"owner_id": owner_id, "name": name, "email": email, "phone": phone, "course": course}
+
+
+def test_search_prefix_words_typos_and_phone(data_dir):
+    store = CSVStore("q_students.csv", STUDENT_SCHEMA, append_only=True, partitioned=True)
+    store.create_many(pd.DataFrame([
+        _student("Johnathan Smith", "john.s@mail.com", "+91 98765 43210", "CSE"),
+        _student("Joan Smithers", "joan@mail.com", "9123456789", "ECE"),
+        _student("Priya Iyer", "priya@mail.com", "9000000001", "CSE"),
+        _student("Other Owner", "o@mail.com", owner_id=2),
+    ]))
+    search = StudentSearch(store)
+
+    assert search.search(1, "jo", k=10) == [2, 1]          # by label among equal scores
+    assert search.search(1, "smith") == [1, 2]              # exact word beats prefix
+    assert search.search(1, "john smi") == [1, 2]           # "joan" is one typo away
+    assert search.search(1, "cse priya") == [3]
+    assert search.search(1, "jhonathan") == [1]             # one swapped pair
+    assert search.search(1, "98765") == [1]
+    assert search.search(1, "+91 98765-43210") == [1]
+    assert search.search(1, "john.s@") == [1]
+    assert search.search(1, "other") == []                  # another owner's student
+    assert search.search(1, "  ") == []
+    assert list(search.choices(1, "", k=2)) == [1, 2]
+
+
+def test_search_index_follows_writes(data_dir):
+    store = CSVStore("q_students.csv", STUDENT_SCHEMA, append_only=True, partitioned=True)
+    store.create_many(pd.DataFrame([_student("Asha Rao", "asha@mail.com")]))
+    search = StudentSearch(store)
+    assert search.search(1, "asha") == [1]
+
+    store.create_many(pd.DataFrame([_student("Ashwin Rao", "ashwin@mail.com")]))
+    assert search.search(1, "ash") == [1, 2]
+    store.upsert_many(pd.DataFrame([{"id": 1, "name": "Meera Rao", "email": "meera@mail.com"}]), owner_id=1)
+    assert search.search(1, "ash") == [2]
+    assert search.labels(1, [1]) == {1: "Meera Rao · meera@mail.com"}
+    store.delete_many([2], owner_id=1)
+    assert search.search(1, "rao") == [1]
@@ -0,0 +1,37 @@
+import pytest
+from src.services.room_service import rooms_store
+from src.utils.seed_rooms import TEMPLATES, RoomTemplate, generate_default_rooms, provision_rooms
+
+
+def test_templates_number_and_type_rooms():
+    rooms = TEMPLATES["default"].rooms()
+    assert len(rooms) == 100
+    assert rooms["room_no"].iloc[[0, 49, 50, 99]].tolist() == ["01", "50", "51", "100"]
+    assert rooms.groupby("type")["capacity"].first().to_dict() == {"Double": 2, "Triple": 3}
+
+    annex = RoomTemplate.from_dict({"name": "annex", "blocks": [{"name": "C", "floors": [
+        [{"type": "Double", "count": 2}, {"type": "Triple", "count": 1, "capacity": 4}],
+        [{"type": "Triple", "count": 1}],
+    ]}]})
+    rooms = annex.rooms()
+    assert rooms["room_no"].tolist() == ["C-101", "C-102", "C-103", "C-201"]
+    assert rooms["capacity"].tolist() == [2, 2, 4, 3]
+
+    with pytest.raises(ValueError):
+        RoomTemplate.from_dict({"name": "bad", "blocks": [{"floors": [[{"type": "Suite", "count": 1}]]}]}).rooms()
+
+
+def test_provision_rooms_for_many_owners_in_one_batch(data_dir):
+    assert generate_default_rooms(owner_id=1)
+    assert not generate_default_rooms(owner_id=1)
+
+    done = provision_rooms([1, 2, 3, 3], TEMPLATES["two-blocks"])
+    assert done == [2, 3]
+    assert len(rooms_store.list_for_owner(1)) == 100
+    mine = rooms_store.list_for_owner(3)
+    assert len(mine) == 120 and mine["owner_id"].eq(3).all()
+    assert mine["room_no"].iloc[0] == "A-101"
+
+    # one id block, no id reused across owners
+    ids = rooms_store.list_all()["id"]
+    assert ids.is_unique and len(ids) == 340
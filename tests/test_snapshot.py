@@ -0,0 +1,39 @@
+import pandas as pd
+from src.services import snapshot_service
+from src.services.data_store import CSVStore
+from src.services.snapshot_service import load_snapshot
+from src.services.student_service import STUDENT_SCHEMA
+from src.services.fee_service import FEE_SCHEMA
+
+
+class _WritesOnFirstRead:
+    """Lands a write on `other` during this store's first read of the owner."""
+
+    def __init__(self, store, other, row):
+        self.store, self.other, self.row, self.reads = store, other, row, 0
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def list_for_owner(self, owner_id):
+        self.reads += 1
+        if self.reads == 1:
+            self.other.create_many(pd.DataFrame([self.row]))
+        return self.store.list_for_owner(owner_id)
+
+
+def test_snapshot_is_consistent_across_tables(data_dir, monkeypatch):
+    students = CSVStore("s_students.csv", STUDENT_SCHEMA, append_only=True, partitioned=True)
+    fees = CSVStore("s_fees.csv", FEE_SCHEMA, append_only=True, partitioned=True)
+    students.create_many(pd.DataFrame([{"owner_id": 1, "name": "A", "email": "a@x.com"}]))
+    fee = {"owner_id": 1, "student_id": 1, "month": "2025-01", "amount": 100.0, "status": "paid"}
+
+    for workers in (1, 2):
+        monkeypatch.setattr(snapshot_service, "WORKERS", workers)
+        racing = _WritesOnFirstRead(students, fees, fee)
+        snap = load_snapshot(1, stores={"fees": fees, "students": racing})
+        if workers == 1:
+            assert racing.reads == 2   # fees changed after they were read: retried
+        assert len(snap["fees"]) == len(fees.list_for_owner(1)) == workers
+        assert snap.versions == {"students": students.version_for_owner(1), "fees": fees.version_for_owner(1)}
+        assert snap.of(fees)[0] is snap["fees"]
@@ -0,0 +1,36 @@
+from src.services.data_store import CSVStore
+from src.services import student_service
+from src.services.student_service import STUDENT_SCHEMA, import_students
+
+
+def test_import_validates_and_writes_once(data_dir, monkeypatch):
+    store = CSVStore("students.csv", STUDENT_SCHEMA, append_only=True, partitioned=True)
+    monkeypatch.setattr(student_service, "students_store", store)
+    store.create({"owner_id": 1, "name": "X", "email": "x@y.com", "phone": "111"})
+
+    writes = []
+    real_create_many = store.create_many
+    monkeypatch.setattr(store, "create_many", lambda df: writes.append(len(df)) or real_create_many(df))
+
+    csv = (
+        "Full Name,E-mail,Mobile,Gender,Course / Dept\n"
+        "A,A@x.com ,+91 98765-43210,f,CS\n"   # ok (email/phone normalized)
+        "B,not-an-email,2,M,EE\n"              # row 3: bad email
+        ",c@x.com,3,male,\n"                   # row 4: missing name
+        "D,x@Y.com,4,,ME\n"                    # row 5: email already in hostel
+        "E,e@x.com,+919876543210,other,\n"     # row 6: phone repeats row 2
+        "F,f@x.com,5,x,\n"                     # ok, unknown gender -> Other
+    )
+    report = import_students(1, csv.encode(), "students.csv", chunk_rows=2)
+
+    assert report.rows == 6 and report.accepted == 2
+    assert [row for row, _ in report.errors] == [3, 4, 5, 6]
+    assert writes == [2]
+    mine = store.list_for_owner(1)
+    assert mine["email"].tolist() == ["x@y.com", "a@x.com", "f@x.com"]
+    assert mine["gender"].tolist()[1:] == ["Female", "Other"]
+    assert report.created_ids == mine["id"].tolist()[1:]
+
+    # a dry run reports without writing
+    again = import_students(1, csv.encode(), "students.csv", dry_run=True)
+    assert again.accepted == 0 and len(store.list_for_owner(1)) == 3